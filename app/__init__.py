@@ -1,7 +1,3 @@
 """AI Velocity Dashboard - Monitor your AI development team's productivity, test coverage, and infrastructure health."""
 
 __version__ = "0.1.0"
-
-# Initialize logging when the package is imported
-from app.utils.logger import setup_logging
-setup_logging()
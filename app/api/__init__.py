@@ -0,0 +1 @@
+"""JSON metrics API for the AI Velocity Dashboard."""
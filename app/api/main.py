@@ -0,0 +1,46 @@
+"""FastAPI application serving dashboard metrics as JSON.
+
+Run with ``uvicorn app.api.main:app``.
+"""
+import asyncio
+
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+
+from app import __version__
+from app.api.routes import router
+from app.utils.config import settings
+from app.utils.logger import setup_logging
+
+
+def create_app() -> FastAPI:
+    """Create the metrics API application."""
+    load_dotenv()
+    setup_logging()
+
+    app = FastAPI(
+        title=f"{settings.APP_NAME} API",
+        version=__version__,
+        openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    )
+
+    app.add_middleware(GZipMiddleware, minimum_size=settings.API_GZIP_MIN_SIZE)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.BACKEND_CORS_ORIGINS,
+        allow_methods=["GET"],
+        allow_headers=["*"],
+        expose_headers=["ETag"],
+    )
+
+    # Upstream fetch limit and in-flight fetches, shared by all requests
+    app.state.upstream_limit = asyncio.Semaphore(settings.API_MAX_CONCURRENT_FETCHES)
+    app.state.inflight = {}
+
+    app.include_router(router, prefix=settings.API_V1_STR)
+    return app
+
+
+app = create_app()
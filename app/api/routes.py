@@ -0,0 +1,268 @@
+"""JSON endpoints for velocity and coverage metrics.
+
+Responses are serialized once with orjson and the encoded body is cached in
+the process-wide :class:`~app.utils.cache.SharedCache` together with its
+ETag, so a cache hit costs a dictionary lookup and no upstream or
+serialization work. Conditional requests with a matching ``If-None-Match``
+get an empty 304.
+
+Cache misses for the same key are deduplicated on the event loop, and at most
+``API_MAX_CONCURRENT_FETCHES`` distinct upstream fetches run at once. Each
+fetch waits at most ``FETCH_TIME_BUDGET`` seconds; partial payloads say so in
+their ``completeness`` and are cached for ``PARTIAL_RESULT_TTL`` seconds only.
+
+Exports are streamed chunk by chunk as they are encoded and never cached.
+"""
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, Literal, Optional, Tuple
+
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.services.collection import is_partial
+from app.utils.cache import get_shared_cache
+from app.utils.cache_backends import get_result_cache
+from app.utils.config import settings
+from app.utils.http import transport_stats
+from app.utils.logger import get_logger
+from app.utils.metrics import CONTENT_TYPE, render_metrics
+
+logger = get_logger(__name__)
+
+router = APIRouter()
+
+# Encoded response body and its ETag
+CachedBody = Tuple[bytes, str]
+
+
+@lru_cache(maxsize=None)
+def get_github_service():
+    """Get the shared GitHub client."""
+    from app.services.github_service import GitHubService
+
+    return GitHubService(cache=get_result_cache())
+
+
+@lru_cache(maxsize=None)
+def get_langsmith_service():
+    """Get the shared LangSmith client."""
+    from app.services.langsmith_service import LangSmithService
+
+    return LangSmithService(cache=get_result_cache())
+
+
+def _service(factory: Callable[[], Any], name: str) -> Any:
+    """Resolve a service client, answering 503 if it is not configured."""
+    try:
+        return factory()
+    except Exception as e:
+        logger.warning(f"{name} service unavailable: {e}")
+        raise HTTPException(status_code=503, detail=f"{name} is not configured")
+
+
+def encode_body(payload: Any) -> CachedBody:
+    """Serialize a payload and compute its strong ETag."""
+    body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    return body, etag
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+async def _load(request: Request, key: Hashable, compute: Callable[[], Any]) -> CachedBody:
+    """Load and encode a payload, sharing one upstream fetch per key."""
+    state = request.app.state
+    task = state.inflight.get(key)
+    if task is None:
+        async def fetch() -> CachedBody:
+            partial = False
+
+            def encode() -> CachedBody:
+                nonlocal partial
+                payload = compute()
+                partial = is_partial(payload)
+                return encode_body(payload)
+
+            async with state.upstream_limit:
+                return await run_in_threadpool(
+                    get_shared_cache().get_or_compute,
+                    key,
+                    encode,
+                    lambda _: settings.PARTIAL_RESULT_TTL if partial else settings.API_CACHE_TTL,
+                )
+
+        task = state.inflight[key] = asyncio.ensure_future(fetch())
+        task.add_done_callback(lambda _: state.inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def cached_json(request: Request, key: Hashable, compute: Callable[[], Any]) -> Response:
+    """Answer a request from the response cache, computing it on a miss.
+
+    Args:
+        request: Incoming request, used for ``If-None-Match``
+        key: Cache key identifying the endpoint and its parameters
+        compute: Zero-argument function returning the JSON-serializable payload
+    """
+    cached = get_shared_cache().get(key)
+    body, etag = cached if cached is not None else await _load(request, key, compute)
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.API_CACHE_MAX_AGE}",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/velocity")
+async def velocity(
+    request: Request,
+    days: int = Query(30, ge=1, le=365, description="Number of days to look back"),
+    repos: Optional[List[str]] = Query(None, description="Repositories to include"),
+) -> Response:
+    """Team velocity metrics from GitHub."""
+    service = _service(get_github_service, "GitHub")
+    repo_key = tuple(sorted(set(repos))) if repos else None
+    return await cached_json(
+        request,
+        ("api", "velocity", days, repo_key),
+        lambda: service.get_team_velocity(
+            days=days, repo_names=list(repo_key) if repo_key else None, timeout=settings.FETCH_TIME_BUDGET
+        ),
+    )
+
+
+@router.get("/churn")
+async def churn(
+    request: Request,
+    days: int = Query(30, ge=1, le=365, description="Number of days to look back"),
+    repos: Optional[List[str]] = Query(None, description="Repositories to include"),
+) -> Response:
+    """Lines added and deleted per repository and author, from GitHub's repository statistics."""
+    service = _service(get_github_service, "GitHub")
+    repo_key = tuple(sorted(set(repos))) if repos else None
+    return await cached_json(
+        request,
+        ("api", "churn", days, repo_key),
+        lambda: service.get_code_churn(
+            days=days, repo_names=list(repo_key) if repo_key else None, timeout=settings.FETCH_TIME_BUDGET
+        ),
+    )
+
+
+@router.get("/reviews")
+async def reviews(
+    request: Request,
+    days: int = Query(30, ge=1, le=365, description="Number of days to look back"),
+    repos: Optional[List[str]] = Query(None, description="Repositories to include"),
+) -> Response:
+    """PR metrics with time to first review, review rounds and time from approval to merge."""
+    service = _service(get_github_service, "GitHub")
+    repo_key = tuple(sorted(set(repos))) if repos else None
+    return await cached_json(
+        request,
+        ("api", "reviews", days, repo_key),
+        lambda: service.get_pr_metrics(
+            days=days,
+            repo_names=list(repo_key) if repo_key else None,
+            timeout=settings.FETCH_TIME_BUDGET,
+            reviews=True,
+        ),
+    )
+
+
+@router.get("/prompt-coverage")
+async def prompt_coverage(
+    request: Request,
+    days: int = Query(30, ge=1, le=365, description="Number of days to look back"),
+    project: Optional[str] = Query(None, description="LangSmith project name"),
+) -> Response:
+    """Prompt coverage metrics from LangSmith."""
+    service = _service(get_langsmith_service, "LangSmith")
+    return await cached_json(
+        request,
+        ("api", "prompt_coverage", days, project),
+        lambda: service.get_prompt_coverage(days=days, project_name=project, timeout=settings.FETCH_TIME_BUDGET),
+    )
+
+
+@router.get("/test-results")
+async def test_results(
+    request: Request,
+    days: int = Query(30, ge=1, le=365, description="Number of days to look back"),
+    project: Optional[str] = Query(None, description="LangSmith project name"),
+) -> Response:
+    """Test execution results from LangSmith."""
+    service = _service(get_langsmith_service, "LangSmith")
+    return await cached_json(
+        request,
+        ("api", "test_results", days, project),
+        lambda: service.get_test_results(days=days, project_name=project, timeout=settings.FETCH_TIME_BUDGET),
+    )
+
+
+@router.get("/export/{source}")
+async def export_records(
+    source: str,
+    fmt: Literal["csv", "ndjson", "parquet"] = Query("csv", alias="format", description="File format"),
+    days: int = Query(30, ge=1, description="Number of days to look back"),
+    repos: Optional[List[str]] = Query(None, description="Repositories to include"),
+    archive: bool = Query(False, description="Read from the local archive instead of upstream"),
+    daily: bool = Query(False, description="Export the number of records per day and repository"),
+) -> StreamingResponse:
+    """PR, commit or run records as a CSV, NDJSON or Parquet file, streamed in chunks."""
+    from app.services.archive import RUNS, MetricsArchive
+    from app.services.export import FORMATS, SOURCES, export
+
+    if source not in SOURCES:
+        raise HTTPException(status_code=404, detail=f"Unknown export source: {source}")
+    if not archive and days > settings.EXPORT_MAX_DAYS:
+        raise HTTPException(
+            status_code=422, detail=f"Upstream exports cover at most {settings.EXPORT_MAX_DAYS} days; use archive=true"
+        )
+    if archive:
+        services = {'archive': MetricsArchive()}
+    elif source == RUNS:
+        services = {'langsmith_service': _service(get_langsmith_service, "LangSmith")}
+    else:
+        services = {'github_service': _service(get_github_service, "GitHub")}
+
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    # Listing the repositories is an upstream request, so it runs off the event loop
+    parts = await run_in_threadpool(export, source, fmt, since, repos=repos, daily=daily, **services)
+    filename = f"{source}{'_daily' if daily else ''}.{fmt}"
+    return StreamingResponse(
+        parts,
+        media_type=FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/transport")
+async def transport() -> Dict[str, Dict[str, Any]]:
+    """Per-host upstream request counts, latency and connection reuse."""
+    return transport_stats()
+
+
+@router.get("/metrics")
+async def metrics() -> Response:
+    """Upstream, cache and service metrics in the Prometheus text format."""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
+
+
+@router.get("/health")
+async def health() -> Dict[str, str]:
+    """Liveness check."""
+    return {"status": "ok"}
@@ -0,0 +1,371 @@
+"""Resumable backfill of the metrics archive.
+
+``python -m app.worker --archive-days 365`` fetches a year in one pass that
+takes hours and starts over after any failure. ``python -m app.backfill``
+instead splits the history into work units of one archive source, one
+repository (or LangSmith project) and ``BACKFILL_SLICE_DAYS`` whole days.
+``BACKFILL_WORKERS`` threads fetch units in parallel. Each finished unit is
+written to the :class:`~app.services.archive.MetricsArchive` and recorded in
+a SQLite checkpoint (``BACKFILL_CHECKPOINT``). Running the same command again
+skips the units already done, so an interrupted backfill resumes where it
+stopped.
+
+Slices are aligned to multiples of the slice length counted from 1970-01-01,
+so a run resumed on a later day plans the same units; only the newest slice,
+which still grows, is fetched again. Units are fetched oldest first.
+
+Requests to GitHub and LangSmith take a token from a per-host
+:class:`~app.utils.rate_limit.TokenBucket` first, so the backfill stays
+within ``BACKFILL_GITHUB_REQUESTS_PER_HOUR`` and
+``BACKFILL_LANGSMITH_REQUESTS_PER_HOUR`` however many workers it runs.
+Progress, throughput and an ETA are logged after every unit.
+"""
+import argparse
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+
+from app.services.archive import COMMITS, PRS, RUNS, MetricsArchive
+from app.utils.config import settings
+from app.utils.logger import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+SOURCES = (PRS, COMMITS, RUNS)
+
+
+@dataclass(frozen=True)
+class WorkUnit:
+    """Records of one source and repository from ``start`` up to (not including) ``end``."""
+
+    source: str
+    repo: str
+    start: date
+    end: date
+
+    @property
+    def since(self) -> datetime:
+        return datetime.combine(self.start, datetime.min.time(), timezone.utc)
+
+    @property
+    def until(self) -> datetime:
+        return datetime.combine(self.end, datetime.min.time(), timezone.utc)
+
+    def __str__(self) -> str:
+        return f"{self.source}/{self.repo}/{self.start}..{self.end}"
+
+
+# Fetches every record of a work unit
+Fetch = Callable[[WorkUnit], List[Dict]]
+
+
+def plan_units(
+    repos: Dict[str, Sequence[str]],
+    days: int,
+    slice_days: Optional[int] = None,
+    today: Optional[date] = None,
+) -> List[WorkUnit]:
+    """Split at least the last ``days`` whole days (UTC) into work units, oldest first.
+
+    Args:
+        repos: Repositories (or LangSmith projects) to backfill, per source
+        days: Days to cover, including today
+        slice_days: Days per unit. If not provided, uses BACKFILL_SLICE_DAYS.
+        today: Last day to cover. If not provided, uses the current UTC date.
+    """
+    slice_days = slice_days or settings.BACKFILL_SLICE_DAYS
+    today = today or datetime.now(timezone.utc).date()
+    end = (today + timedelta(days=1)).toordinal()
+    first = (today - timedelta(days=days - 1)).toordinal()
+    # Slice boundaries are multiples of slice_days, so every run plans the same units
+    boundary = first - (first - date(1970, 1, 1).toordinal()) % slice_days
+
+    units = []
+    while boundary < end:
+        start, boundary = boundary, min(boundary + slice_days, end)
+        for source, names in repos.items():
+            for repo in names:
+                units.append(WorkUnit(source, repo, date.fromordinal(start), date.fromordinal(boundary)))
+    return units
+
+
+class Checkpoint:
+    """SQLite record of the work units that are done, shared by the worker threads."""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """Open or create the checkpoint.
+
+        Args:
+            path: Database file. If not provided, uses BACKFILL_CHECKPOINT.
+        """
+        self.path = Path(path or settings.BACKFILL_CHECKPOINT)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS units ("
+            " source TEXT NOT NULL, repo TEXT NOT NULL, start TEXT NOT NULL, end TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0,"
+            " records INTEGER, seconds REAL, error TEXT, updated_at TEXT,"
+            " PRIMARY KEY (source, repo, start, end))"
+        )
+
+    @staticmethod
+    def _key(unit: WorkUnit) -> tuple:
+        return unit.source, unit.repo, unit.start.isoformat(), unit.end.isoformat()
+
+    def pending(self, units: Iterable[WorkUnit]) -> List[WorkUnit]:
+        """Record ``units`` in the checkpoint and return those that are not done yet, in order."""
+        units = list(units)
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO units (source, repo, start, end) VALUES (?, ?, ?, ?)",
+                [self._key(unit) for unit in units],
+            )
+            done = set(self._db.execute("SELECT source, repo, start, end FROM units WHERE status = 'done'"))
+        return [unit for unit in units if self._key(unit) not in done]
+
+    def _update(self, unit: WorkUnit, status: str, records: Optional[int], seconds: Optional[float],
+                error: Optional[str]) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE units SET status = ?, attempts = attempts + 1, records = ?, seconds = ?, error = ?,"
+                " updated_at = ? WHERE source = ? AND repo = ? AND start = ? AND end = ?",
+                (status, records, seconds, error, datetime.now(timezone.utc).isoformat(), *self._key(unit)),
+            )
+
+    def done(self, unit: WorkUnit, records: int, seconds: float) -> None:
+        self._update(unit, 'done', records, seconds, None)
+
+    def failed(self, unit: WorkUnit, error: Exception) -> None:
+        self._update(unit, 'failed', None, None, str(error))
+
+    def reset(self) -> None:
+        """Forget all progress, so every unit is fetched again."""
+        with self._lock:
+            self._db.execute("DELETE FROM units")
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class Progress:
+    """Units and records done so far, with throughput and ETA of the current run."""
+
+    def __init__(self, total: int, resumed: int = 0, clock: Callable[[], float] = time.monotonic):
+        self.total = total
+        # Units done by earlier runs
+        self.resumed = resumed
+        self.done = 0
+        self.failed = 0
+        self.records = 0
+        self._clock = clock
+        self._started = clock()
+
+    def add(self, records: int) -> None:
+        self.done += 1
+        self.records += records
+
+    @property
+    def elapsed(self) -> float:
+        return self._clock() - self._started
+
+    @property
+    def units_per_second(self) -> float:
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.resumed - self.done - self.failed
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Seconds until the remaining units are done at the current rate, None before the first unit."""
+        return self.remaining / self.units_per_second if self.done else None
+
+    def __str__(self) -> str:
+        completed = self.resumed + self.done
+        eta = _duration(self.eta_seconds) if self.eta_seconds is not None else "unknown"
+        return (
+            f"{completed}/{self.total} units ({completed / max(self.total, 1):.0%}), "
+            f"{self.records_per_second:.1f} records/s, {self.units_per_second * 60:.1f} units/min, ETA {eta}"
+        )
+
+
+def run_backfill(
+    units: Sequence[WorkUnit],
+    fetchers: Dict[str, Fetch],
+    archive: MetricsArchive,
+    checkpoint: Checkpoint,
+    workers: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+) -> Progress:
+    """Fetch and archive every unit that the checkpoint does not record as done.
+
+    A failed unit is retried after the others, up to ``max_attempts`` times,
+    and otherwise left for the next run.
+
+    Args:
+        units: Work units, in the order to fetch them
+        fetchers: Fetch function per archive source
+        archive: Archive the records are written to
+        checkpoint: Progress of earlier runs, updated as units finish
+        workers: Units fetched in parallel. If not provided, uses BACKFILL_WORKERS.
+        max_attempts: Tries per unit. If not provided, uses BACKFILL_MAX_ATTEMPTS.
+    """
+    workers = workers or settings.BACKFILL_WORKERS
+    max_attempts = max_attempts or settings.BACKFILL_MAX_ATTEMPTS
+    todo = checkpoint.pending(units)
+    progress = Progress(len(units), resumed=len(units) - len(todo))
+    if progress.resumed:
+        logger.info(f"Resuming backfill: {progress.resumed} of {len(units)} units already done")
+    # Units never share a partition, but the archive directory itself is shared
+    write_lock = threading.Lock()
+
+    def run(unit: WorkUnit) -> int:
+        started = time.monotonic()
+        records = fetchers[unit.source](unit)
+        with write_lock:
+            archive.write(unit.source, records)
+        checkpoint.done(unit, len(records), time.monotonic() - started)
+        return len(records)
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill")
+    try:
+        for attempt in range(1, max_attempts + 1):
+            futures = {pool.submit(run, unit): unit for unit in todo}
+            todo = []
+            for future in as_completed(futures):
+                unit = futures[future]
+                try:
+                    records = future.result()
+                except Exception as e:
+                    checkpoint.failed(unit, e)
+                    if attempt < max_attempts:
+                        logger.warning(f"Backfill of {unit} failed (attempt {attempt}), will retry: {e}")
+                        todo.append(unit)
+                    else:
+                        logger.error(f"Backfill of {unit} failed {attempt} times, leaving it for the next run: {e}")
+                        progress.failed += 1
+                    continue
+                progress.add(records)
+                logger.info(f"Backfilled {unit}: {records} records; {progress}")
+            if not todo:
+                break
+    except KeyboardInterrupt:
+        logger.warning("Backfill interrupted; units in flight will finish, rerun the same command to resume")
+        pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return progress
+
+
+def build_fetchers(github_service, langsmith_service) -> Dict[str, Fetch]:
+    """Fetch functions for the sources whose service is configured."""
+    fetchers: Dict[str, Fetch] = {}
+    if github_service is not None:
+        fetchers[PRS] = lambda unit: github_service.get_pr_records(unit.since, [unit.repo], until=unit.until)
+        fetchers[COMMITS] = lambda unit: github_service.get_commit_records(unit.since, [unit.repo], until=unit.until)
+    if langsmith_service is not None:
+        fetchers[RUNS] = lambda unit: langsmith_service.get_run_records(unit.since, unit.repo, until=unit.until)
+    return fetchers
+
+
+def limit_upstream_rates(github_service, langsmith_service, burst: int) -> None:
+    """Keep this process's GitHub and LangSmith requests within the backfill's budget."""
+    from app.utils.http import GITHUB_API_URL, limit_rate
+    from app.utils.rate_limit import TokenBucket
+
+    if github_service is not None:
+        limit_rate(
+            urlsplit(GITHUB_API_URL).netloc,
+            TokenBucket.per_hour(settings.BACKFILL_GITHUB_REQUESTS_PER_HOUR, capacity=burst),
+        )
+    if langsmith_service is not None:
+        limit_rate(
+            urlsplit(langsmith_service.client.api_url).netloc,
+            TokenBucket.per_hour(settings.BACKFILL_LANGSMITH_REQUESTS_PER_HOUR, capacity=burst),
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point for ``python -m app.backfill``."""
+    load_dotenv()
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="Backfill the metrics archive, resuming any interrupted run.")
+    parser.add_argument("--days", type=int, default=365, help="Days of history to archive, including today")
+    parser.add_argument(
+        "--sources",
+        default=",".join(SOURCES),
+        help=f"Comma-separated archive sources (default: {','.join(SOURCES)})",
+    )
+    parser.add_argument("--repos", nargs="+", help="Repositories to backfill (default: every repository in the org)")
+    parser.add_argument("--slice-days", type=int, default=settings.BACKFILL_SLICE_DAYS, help="Days per work unit")
+    parser.add_argument("--workers", type=int, default=settings.BACKFILL_WORKERS, help="Units fetched in parallel")
+    parser.add_argument("--checkpoint", default=settings.BACKFILL_CHECKPOINT, help="Checkpoint database")
+    parser.add_argument("--restart", action="store_true", help="Forget recorded progress and fetch every unit again")
+    args = parser.parse_args(argv)
+
+    sources = [source.strip() for source in args.sources.split(",") if source.strip()]
+    unknown = set(sources) - set(SOURCES)
+    if unknown:
+        parser.error(f"unknown sources: {', '.join(sorted(unknown))}")
+
+    from app.worker import _build_services
+
+    github_service, langsmith_service = _build_services()
+    fetchers = build_fetchers(github_service, langsmith_service)
+    sources = [source for source in sources if source in fetchers]
+    if not sources:
+        raise SystemExit("No services configured for the requested sources; nothing to backfill.")
+
+    repos: Dict[str, List[str]] = {}
+    for source in sources:
+        if source == RUNS:
+            repos[source] = [langsmith_service.project_name] if langsmith_service.project_name else []
+        else:
+            repos[source] = args.repos or [repo.name for repo in github_service.org.get_repos()]
+    units = plan_units(repos, args.days, args.slice_days)
+
+    limit_upstream_rates(github_service, langsmith_service, burst=args.workers)
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.restart:
+        checkpoint.reset()
+    try:
+        progress = run_backfill(units, fetchers, MetricsArchive(), checkpoint, workers=args.workers)
+    finally:
+        checkpoint.close()
+
+    logger.info(
+        f"Backfill finished in {_duration(progress.elapsed)}: {progress.done} units and "
+        f"{progress.records} records archived, {progress.failed} units failed"
+    )
+    if progress.failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Bulk export of PR, commit and run records.
+
+``python -m app.export`` streams the records of one source, read from
+GitHub or LangSmith or from the local archive, to a CSV, NDJSON or Parquet
+file in chunks of ``EXPORT_CHUNK_ROWS`` records, so exports of any size run
+in constant memory::
+
+    python -m app.export github_prs --days 90 --output prs.parquet
+    python -m app.export langsmith_runs --archive --days 365 --format ndjson > runs.ndjson
+    python -m app.export github_commits --archive --days 365 --daily --output commits_per_day.csv
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from app.services.archive import RUNS, MetricsArchive
+from app.services.export import FORMATS, SOURCES, export, write_export
+from app.utils.config import settings
+from app.utils.logger import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point for ``python -m app.export``."""
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Stream PR, commit or run records to a CSV, NDJSON or Parquet file.")
+    parser.add_argument("source", choices=SOURCES, help="Records to export")
+    parser.add_argument(
+        "--format",
+        choices=sorted(FORMATS),
+        help="Output format (default: from the --output suffix, else csv)",
+    )
+    parser.add_argument("--days", type=int, default=30, help="Days of history to export")
+    parser.add_argument("--repos", nargs="+", help="Repositories to export (default: every repository)")
+    parser.add_argument("--archive", action="store_true", help="Read from the local archive instead of upstream")
+    parser.add_argument("--daily", action="store_true", help="Export the number of records per day and repository")
+    parser.add_argument("--output", default="-", help="File to write (default: standard output)")
+    parser.add_argument("--chunk-rows", type=int, default=settings.EXPORT_CHUNK_ROWS, help="Records encoded at a time")
+    args = parser.parse_args(argv)
+    # Standard output may carry the export itself
+    setup_logging(console=sys.stderr)
+
+    fmt = args.format or Path(args.output).suffix.lstrip(".").lower()
+    if fmt not in FORMATS:
+        fmt = "csv"
+    since = datetime.now(timezone.utc) - timedelta(days=args.days)
+
+    archive = github_service = langsmith_service = None
+    if args.archive:
+        archive = MetricsArchive()
+    else:
+        from app.worker import _build_services
+
+        github_service, langsmith_service = _build_services()
+        if (langsmith_service if args.source == RUNS else github_service) is None:
+            raise SystemExit(f"The service for {args.source} is not configured; use --archive to export archived records.")
+
+    parts = export(
+        args.source, fmt, since,
+        repos=args.repos,
+        archive=archive,
+        daily=args.daily,
+        github_service=github_service,
+        langsmith_service=langsmith_service,
+        rows=args.chunk_rows,
+    )
+    if args.output == "-":
+        written = write_export(parts, sys.stdout.buffer)
+    else:
+        with open(args.output, "wb") as out:
+            written = write_export(parts, out)
+    logger.info(f"Exported {args.source} as {fmt}: {written} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,29 @@
 import streamlit as st
 from dotenv import load_dotenv
 import os
-from datetime import datetime, timedelta
-import pandas as pd
-import plotly.express as px
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlencode
+
+# Make the app package importable when run with `streamlit run app/main.py`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.dashboard_service import (
+    clear_dashboard_cache,
+    get_coverage_metrics,
+    get_team_names,
+    get_velocity_metrics,
+    load_concurrently,
+    revalidate_snapshots,
+)
+from app.utils.config import settings
+from app.utils.logger import setup_logging
+from app.utils.profiling import get_profile_store, start_profiler
 
 # Load environment variables
 load_dotenv()
+setup_logging()
 
 # Set page config
 st.set_page_config(
@@ -16,6 +33,16 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Profile this rerun, including sections loaded on other threads, with
+# PROFILING_ENABLED=true or ?profile=1. A profile left running by an
+# interrupted rerun (e.g. st.rerun()) is discarded.
+rerun_profiler = st.session_state.pop("rerun_profiler", None)
+if rerun_profiler is not None:
+    rerun_profiler.stop()
+    rerun_profiler = None
+if settings.PROFILING_ENABLED or st.query_params.get("profile") == "1":
+    rerun_profiler = st.session_state["rerun_profiler"] = start_profiler(all_threads=True)
+
 # Custom CSS
 st.markdown("""
     <style>
@@ -26,7 +53,7 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Mock data for demo (will be replaced with real API calls)
+# Mock data for demo, used when GitHub/LangSmith are not configured
 def get_mock_velocity_metrics():
     return {
         "pr_cycle_time_days": 2.5,
@@ -44,122 +71,257 @@ def get_mock_coverage_metrics():
         "prompts_tracked": 145
     }
 
+def get_mock_activity(start_date, end_date):
+    import pandas as pd
+
+    dates = pd.date_range(start=start_date, end=end_date, freq='D')
+    return pd.DataFrame({
+        'date': dates,
+        'commits': [max(0, int(10 + 10 * (i % 7) / 7 + (i % 30) / 30)) for i in range(len(dates))],
+        'prs_created': [max(1, int(2 + 3 * (i % 7) / 7 + (i % 14) / 14)) for i in range(len(dates))],
+        'prs_merged': [max(0, int(1 + 2 * (i % 7) / 7 + (i % 21) / 21)) for i in range(len(dates))]
+    })
+
+def completeness_note(metrics, sources):
+    """Mark numbers that are missing sources which timed out or failed."""
+    completeness = metrics.get('completeness')
+    if not completeness or completeness['complete']:
+        return
+    total = len(completeness['done']) + len(completeness['pending']) + len(completeness['failed'])
+    missing = []
+    if completeness['pending']:
+        missing.append(f"{len(completeness['pending'])} still loading")
+    if completeness['failed']:
+        missing.append(f"{len(completeness['failed'])} failed ({', '.join(sorted(completeness['failed']))})")
+    st.warning(
+        f"Partial data: {len(completeness['done'])} of {total} {sources} loaded, "
+        f"{' and '.join(missing)}. Refresh to retry.",
+        icon="⚠️",
+    )
+
+# Dashboard sections. Each one is a fragment, so a widget inside a section
+# reruns only that section instead of the whole page.
+@st.fragment
+def velocity_section(start_date, team):
+    st.markdown("### Team Velocity")
+
+    velocity_metrics = (
+        get_velocity_metrics(start_date, team)
+        or get_mock_velocity_metrics()
+    )
+    completeness_note(velocity_metrics, "repositories")
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.markdown("<div class='metric-card'>"
+                    f"<div class='metric-value'>{velocity_metrics['pr_cycle_time_days']:.1f} days</div>"
+                    "<div class='metric-label'>Avg PR Cycle Time</div>"
+                    "</div>", unsafe_allow_html=True)
+
+    with col2:
+        st.markdown("<div class='metric-card'>"
+                    f"<div class='metric-value'>{velocity_metrics['daily_commits']:.1f}</div>"
+                    "<div class='metric-label'>Daily Commits</div>"
+                    "</div>", unsafe_allow_html=True)
+
+    with col3:
+        st.markdown("<div class='metric-card'>"
+                    f"<div class='metric-value'>{velocity_metrics['active_contributors']}</div>"
+                    "<div class='metric-label'>Active Contributors</div>"
+                    "</div>", unsafe_allow_html=True)
+
+    with col4:
+        st.markdown("<div class='metric-card'>"
+                    f"<div class='metric-value'>{velocity_metrics['prs_merged']}/{velocity_metrics['prs_open']}</div>"
+                    "<div class='metric-label'>PRs Merged/Open</div>"
+                    "</div>", unsafe_allow_html=True)
+
+@st.fragment
+def activity_section(start_date, end_date):
+    # Imported here so the page shell renders before pandas and plotly load
+    from app.utils.timeseries import build_activity_figure
+
+    st.markdown("### Activity Over Time")
+
+    series = ['commits', 'prs_created', 'prs_merged']
+    selected_series = st.multiselect("Metrics", series, default=series, key="activity_metrics")
+    if not selected_series:
+        st.info("Select at least one metric to plot.")
+        return
+
+    # Plot, resampled to stay under the chart point budget
+    fig = build_activity_figure(
+        get_mock_activity(start_date, end_date), 'date', selected_series,
+        title='Development Activity',
+        labels={'value': 'Count', 'variable': 'Metric', 'date': 'Date'},
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment
+def coverage_section(start_date, team):
+    import plotly.express as px
+
+    st.markdown("### Test & Prompt Coverage")
+
+    coverage_metrics = (
+        get_coverage_metrics(start_date, team)
+        or get_mock_coverage_metrics()
+    )
+    completeness_note(coverage_metrics, "LangSmith projects")
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        fig = px.pie(
+            names=['Covered', 'Not Covered'],
+            values=[coverage_metrics['prompt_coverage'], 100 - coverage_metrics['prompt_coverage']],
+            title='Prompt Coverage',
+            hole=0.6
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    with col2:
+        fig = px.bar(
+            x=['Success', 'Failures'],
+            y=[coverage_metrics['test_success_rate'], 100 - coverage_metrics['test_success_rate']],
+            title='Test Success Rate',
+            labels={'x': 'Status', 'y': 'Percentage'}
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    with col3:
+        st.markdown("<div class='metric-card' style='height: 300px;'>"
+                    f"<h4>Prompt Coverage Details</h4>"
+                    f"<p>Total Prompts: {coverage_metrics['prompts_tracked']}</p>"
+                    f"<p>Regression Failures: {coverage_metrics['regression_failures']}</p>"
+                    "</div>", unsafe_allow_html=True)
+
+def export_panel(start_date):
+    """Links to the API's export endpoint.
+
+    The API streams the file in chunks; a download button would have to hold
+    the whole export in this process first.
+    """
+    sources = {
+        'github_prs': "Pull requests",
+        'github_commits': "Commits",
+        'langsmith_runs': "LangSmith runs",
+    }
+    with st.expander("Export data"):
+        source = st.selectbox("Records", list(sources), format_func=sources.get, key="export_source")
+        fmt = st.selectbox("Format", ["csv", "ndjson", "parquet"], key="export_format")
+        archive = st.checkbox("From archive", key="export_archive")
+        daily = st.checkbox("Daily totals", key="export_daily")
+        query = {
+            'format': fmt,
+            'days': (datetime.today().date() - start_date).days + 1,
+            'archive': str(archive).lower(),
+            'daily': str(daily).lower(),
+        }
+        st.link_button(
+            "⬇️ Download",
+            f"{settings.API_PUBLIC_URL.rstrip('/')}{settings.API_V1_STR}/export/{source}?{urlencode(query)}",
+        )
+        st.caption(f"Records since {start_date}, streamed by the metrics API.")
+
+def debug_panel():
+    from dataclasses import asdict
+
+    from app.utils.http import transport_stats
+    from app.utils.metrics import REGISTRY, service_summary
+
+    with st.expander("Debug: upstream and service metrics"):
+        st.markdown("**Service calls** (upstream vs. aggregation time)")
+        st.dataframe(service_summary(), hide_index=True)
+        st.markdown("**HTTP transport**")
+        st.json(transport_stats())
+        st.markdown("**Slowest recent profiles**")
+        st.dataframe([asdict(record) for record in get_profile_store().records()], hide_index=True)
+        st.markdown("**All metrics**")
+        st.dataframe(REGISTRY.rows(), hide_index=True)
+
 # Sidebar with filters
 with st.sidebar:
     st.title("Filters")
     
-    # Date range filter
+    # Date filter. Metrics always run up to today, so only the start is chosen.
     today = datetime.today()
     last_month = today - timedelta(days=30)
-    date_range = st.date_input(
-        "Date Range",
-        value=(last_month, today),
+    start_date = st.date_input(
+        "Since",
+        value=last_month,
         min_value=today - timedelta(days=365),
         max_value=today
     )
+    if not isinstance(start_date, date):
+        start_date = last_month.date()
+    end_date = today.date()
     
     # Team/Project filter
-    teams = ["All Teams", "AI Core", "NLP Team", "Platform", "DevOps"]
-    selected_team = st.selectbox("Team", teams)
+    selected_team = st.selectbox("Team", get_team_names())
     
     # Refresh button
     if st.button("🔄 Refresh Data"):
-        st.experimental_rerun()
+        clear_dashboard_cache()
+        revalidate_snapshots()
+        st.rerun()
+    
+    export_panel(start_date)
 
 # Main content
 st.title("📊 AI Velocity Dashboard")
 st.markdown("Monitor your AI development team's productivity, test coverage, and infrastructure health.")
 
-# Metrics Section
-st.markdown("### Team Velocity")
-col1, col2, col3, col4 = st.columns(4)
-
-velocity_metrics = get_mock_velocity_metrics()
-
-with col1:
-    st.markdown("<div class='metric-card'>"
-                f"<div class='metric-value'>{velocity_metrics['pr_cycle_time_days']} days</div>"
-                "<div class='metric-label'>Avg PR Cycle Time</div>"
-                "</div>", unsafe_allow_html=True)
-
-with col2:
-    st.markdown("<div class='metric-card'>"
-                f"<div class='metric-value'>{velocity_metrics['daily_commits']}</div>"
-                "<div class='metric-label'>Daily Commits</div>"
-                "</div>", unsafe_allow_html=True)
-
-with col3:
-    st.markdown("<div class='metric-card'>"
-                f"<div class='metric-value'>{velocity_metrics['active_contributors']}</div>"
-                "<div class='metric-label'>Active Contributors</div>"
-                "</div>", unsafe_allow_html=True)
-
-with col4:
-    st.markdown("<div class='metric-card'>"
-                f"<div class='metric-value'>{velocity_metrics['prs_merged']}/{velocity_metrics['prs_open']}</div>"
-                "<div class='metric-label'>PRs Merged/Open</div>"
-                "</div>", unsafe_allow_html=True)
-
-# Charts Section
-st.markdown("### Activity Over Time")
-
-# Sample time series data
-if 'date_range' in locals() and len(date_range) == 2:
-    start_date, end_date = date_range
-    date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-    
-    # Generate mock data
-    df = pd.DataFrame({
-        'date': date_range,
-        'commits': [max(0, int(10 + 10 * (i % 7) / 7 + (i % 30) / 30)) for i in range(len(date_range))],
-        'prs_created': [max(1, int(2 + 3 * (i % 7) / 7 + (i % 14) / 14)) for i in range(len(date_range))],
-        'prs_merged': [max(0, int(1 + 2 * (i % 7) / 7 + (i % 21) / 21)) for i in range(len(date_range))]
-    })
-    
-    # Plot
-    fig = px.line(df, x='date', y=['commits', 'prs_created', 'prs_merged'],
-                 title='Development Activity',
-                 labels={'value': 'Count', 'variable': 'Metric', 'date': 'Date'},
-                 template='plotly_white')
-    
-    st.plotly_chart(fig, use_container_width=True)
-
-# Test Coverage Section
-st.markdown("### Test & Prompt Coverage")
+# One placeholder per section, in page order. Sections are filled in as their
+# data arrives, so a slow GitHub fetch does not hold back the coverage charts.
+velocity_placeholder = st.empty()
+activity_placeholder = st.empty()
+coverage_placeholder = st.empty()
 
-coverage_metrics = get_mock_coverage_metrics()
+# The activity chart needs no remote data, so it renders straight away
+with activity_placeholder.container():
+    activity_section(start_date, end_date)
 
-col1, col2, col3 = st.columns(3)
+sections = {
+    'velocity': (
+        velocity_placeholder,
+        lambda: get_velocity_metrics(start_date, selected_team),
+        lambda: velocity_section(start_date, selected_team),
+    ),
+    'coverage': (
+        coverage_placeholder,
+        lambda: get_coverage_metrics(start_date, selected_team),
+        lambda: coverage_section(start_date, selected_team),
+    ),
+}
+for placeholder, _, _ in sections.values():
+    placeholder.caption("Loading…")
 
-with col1:
-    fig = px.pie(
-        names=['Covered', 'Not Covered'],
-        values=[coverage_metrics['prompt_coverage'], 100 - coverage_metrics['prompt_coverage']],
-        title='Prompt Coverage',
-        hole=0.6
-    )
-    st.plotly_chart(fig, use_container_width=True)
-
-with col2:
-    fig = px.bar(
-        x=['Success', 'Failures'],
-        y=[coverage_metrics['test_success_rate'], 100 - coverage_metrics['test_success_rate']],
-        title='Test Success Rate',
-        labels={'x': 'Status', 'y': 'Percentage'}
-    )
-    st.plotly_chart(fig, use_container_width=True)
-
-with col3:
-    st.markdown("<div class='metric-card' style='height: 300px;'>"
-                f"<h4>Prompt Coverage Details</h4>"
-                f"<p>Total Prompts: {coverage_metrics['prompts_tracked']}</p>"
-                f"<p>Regression Failures: {coverage_metrics['regression_failures']}</p>"
-                "</div>", unsafe_allow_html=True)
+for name, future in load_concurrently({name: load for name, (_, load, _) in sections.items()}):
+    placeholder, _, render = sections[name]
+    if future.exception() is not None:
+        placeholder.error(f"Could not load {name} data: {future.exception()}")
+        continue
+    with placeholder.container():
+        render()
 
 # Footer
 st.markdown("---")
 st.markdown("*AI Velocity Dashboard v0.1.0*")
 
+if rerun_profiler is not None:
+    del st.session_state["rerun_profiler"]
+    record = get_profile_store().save("dashboard_rerun", rerun_profiler.stop(), {
+        'start_date': start_date,
+        'team': selected_team,
+    })
+    if record is not None:
+        st.caption(f"Rerun profiled in {record.duration_seconds:.2f}s: {record.path}")
+
+# Metrics for this process, shown with DEBUG=true or ?debug=1
+if settings.DEBUG or st.query_params.get("debug") == "1":
+    debug_panel()
+
 if __name__ == "__main__":
     # This is needed for Streamlit Cloud
     pass
@@ -0,0 +1,11 @@
+"""Data models for the AI Velocity Dashboard."""
+
+from .records import ChurnRecord, CommitRecord, PRRecord, ReviewTimeline, RunRecord
+
+__all__ = [
+    'ChurnRecord',
+    'CommitRecord',
+    'PRRecord',
+    'ReviewTimeline',
+    'RunRecord',
+]
@@ -0,0 +1,206 @@
+"""Compact records of the PRs, reviews, commits, churn and runs that metrics are built from.
+
+A PyGithub ``PullRequest`` or ``Commit`` keeps its raw JSON payload and a
+requester for lazy completion, and a LangSmith run carries its full inputs and
+outputs. On a long scan this adds up to several kilobytes per item. Services
+convert every upstream object into one of these frozen, slotted records as
+soon as it is fetched. A record keeps only the fields the metrics use, and
+its repository, author and state strings are interned so that repeated values
+share memory.
+
+``benchmarks/bench_records.py`` measures the memory per record.
+"""
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Tuple
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(frozen=True, slots=True)
+class PRRecord:
+    """A pull request."""
+
+    repo: str
+    number: int
+    author: str
+    state: str
+    merged: bool
+    created_at: Optional[datetime]
+    merged_at: Optional[datetime]
+    closed_at: Optional[datetime]
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_github(cls, repo: str, pr: Any, author: Optional[str] = None) -> "PRRecord":
+        """Convert a PyGithub ``PullRequest`` from a list response.
+
+        ``merged`` is derived from ``merged_at``. Reading ``pr.merged`` would
+        make PyGithub fetch the full PR. ``author`` replaces the PR author's
+        login, e.g. with its canonical login.
+        """
+        return cls(
+            repo=_intern(repo),
+            number=pr.number,
+            author=_intern(author or pr.user.login),
+            state=_intern(pr.state),
+            merged=pr.merged_at is not None,
+            created_at=pr.created_at,
+            merged_at=pr.merged_at,
+            closed_at=pr.closed_at,
+            updated_at=pr.updated_at,
+        )
+
+    @property
+    def cycle_time_hours(self) -> Optional[float]:
+        """Created-to-merged time in hours, for merged PRs."""
+        if not (self.merged and self.created_at and self.merged_at):
+            return None
+        return (self.merged_at - self.created_at).total_seconds() / 3600
+
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+
+
+def _hours(start: Optional[datetime], end: Optional[datetime]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return (end - start).total_seconds() / 3600
+
+
+@dataclass(frozen=True, slots=True)
+class ReviewTimeline:
+    """The reviews of a pull request, as of its ``updated_at``.
+
+    Reviews by the PR's own author, i.e. replies to review comments, and
+    pending reviews do not count. Every review that requested changes ends a
+    review round, and any reviews after the last of them make the final round.
+    """
+
+    repo: str
+    number: int
+    updated_at: Optional[datetime]
+    created_at: Optional[datetime]
+    merged_at: Optional[datetime]
+    first_review_at: Optional[datetime]
+    # Last approval before the merge, or before now for unmerged PRs
+    approved_at: Optional[datetime]
+    rounds: int
+
+    @classmethod
+    def from_graphql(cls, pr: PRRecord, node: Dict[str, Any]) -> "ReviewTimeline":
+        """Build the timeline of ``pr`` from a GraphQL ``PullRequest`` with its ``reviews``."""
+        author = (node.get('author') or {}).get('login')
+        reviews = sorted(
+            (_timestamp(review['submittedAt']), review['state'])
+            for review in node['reviews']['nodes']
+            if review['submittedAt'] and (review.get('author') or {}).get('login') != author
+        )
+        approvals = [
+            submitted for submitted, state in reviews
+            if state == 'APPROVED' and (pr.merged_at is None or submitted <= pr.merged_at)
+        ]
+        changes_requested = [i for i, (_, state) in enumerate(reviews) if state == 'CHANGES_REQUESTED']
+        final_round = bool(reviews) and (not changes_requested or changes_requested[-1] < len(reviews) - 1)
+        return cls(
+            repo=pr.repo,
+            number=pr.number,
+            updated_at=pr.updated_at,
+            created_at=pr.created_at,
+            merged_at=pr.merged_at,
+            first_review_at=reviews[0][0] if reviews else None,
+            approved_at=approvals[-1] if approvals else None,
+            rounds=len(changes_requested) + final_round,
+        )
+
+    @property
+    def time_to_first_review_hours(self) -> Optional[float]:
+        return _hours(self.created_at, self.first_review_at)
+
+    @property
+    def approval_to_merge_hours(self) -> Optional[float]:
+        """Time from the last approval to the merge, for merged, approved PRs."""
+        return _hours(self.approved_at, self.merged_at)
+
+
+@dataclass(frozen=True, slots=True)
+class ChurnRecord:
+    """Lines added and deleted in a repository in one week.
+
+    ``author`` is None for the repository's totals, which also count
+    commits without a GitHub account.
+    """
+
+    repo: str
+    author: Optional[str]
+    week: date
+    additions: int
+    deletions: int
+    commits: int
+
+
+@dataclass(frozen=True, slots=True)
+class CommitRecord:
+    """A commit whose author resolved to a GitHub login."""
+
+    repo: str
+    sha: str
+    author: str
+    committed_at: datetime
+
+    @classmethod
+    def from_github(cls, repo: str, commit: Any, author: Optional[str] = None) -> "CommitRecord":
+        """Convert a PyGithub ``Commit`` that has a GitHub author, or whose ``author`` login is known."""
+        return cls(
+            repo=_intern(repo),
+            sha=commit.sha,
+            author=_intern(author or commit.author.login),
+            committed_at=commit.commit.author.date,
+        )
+
+    @property
+    def day(self) -> date:
+        return self.committed_at.date()
+
+
+@dataclass(frozen=True, slots=True)
+class RunRecord:
+    """A LangSmith run."""
+
+    run_id: str
+    name: Optional[str]
+    run_type: Optional[str]
+    error: bool
+    tags: Tuple[str, ...]
+    start_time: Optional[datetime]
+    end_time: Optional[datetime]
+    prompt: Optional[str] = None
+    score: Optional[float] = None
+
+    @classmethod
+    def from_langsmith(cls, run: Any) -> "RunRecord":
+        """Convert a LangSmith run, keeping only its evaluation score from the outputs."""
+        outputs = getattr(run, 'outputs', None)
+        evaluation = outputs.get('evaluation') if isinstance(outputs, dict) else None
+        score = evaluation.get('score') if isinstance(evaluation, dict) else None
+        return cls(
+            run_id=str(run.id),
+            name=_intern(run.name),
+            run_type=_intern(getattr(run, 'run_type', None)),
+            error=bool(run.error),
+            tags=tuple(_intern(tag) for tag in (getattr(run, 'tags', None) or ())),
+            start_time=getattr(run, 'start_time', None),
+            end_time=getattr(run, 'end_time', None),
+            prompt=getattr(run, 'prompt', None) or None,
+            score=score,
+        )
+
+    @property
+    def latency_seconds(self) -> Optional[float]:
+        if self.start_time is None or self.end_time is None:
+            return None
+        return (self.end_time - self.start_time).total_seconds()
@@ -0,0 +1,97 @@
+"""Incremental velocity aggregates.
+
+A :class:`VelocityRollup` is fed pull requests and commits one at a time
+during a collection pass and can produce the same dictionary as
+``GitHubService.get_team_velocity`` at any point. Several rollups can be
+maintained side by side in a single pass, for example one per team.
+"""
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, Optional
+
+
+class VelocityRollup:
+    """Running PR and commit totals for one slice of the organization."""
+
+    def __init__(self) -> None:
+        self.total_prs = 0
+        self.merged_prs = 0
+        self.open_prs = 0
+        self.cycle_time_hours_sum = 0.0
+        self.cycle_time_count = 0
+        self.prs_by_author: Counter = Counter()
+        self.prs_by_repo: Counter = Counter()
+
+        self.total_commits = 0
+        self.commits_by_author: Counter = Counter()
+        self.commits_by_repo: Counter = Counter()
+        self.daily_commits: Counter = Counter()
+
+    def add_pr(
+        self,
+        repo: str,
+        author: str,
+        state: str,
+        merged: bool,
+        created_at: Optional[datetime],
+        merged_at: Optional[datetime],
+    ) -> None:
+        """Count one pull request."""
+        self.total_prs += 1
+        if state == 'open':
+            self.open_prs += 1
+        elif state == 'closed' and merged:
+            self.merged_prs += 1
+            if created_at and merged_at:
+                self.cycle_time_hours_sum += (merged_at - created_at).total_seconds() / 3600
+                self.cycle_time_count += 1
+
+        self.prs_by_author[author] += 1
+        self.prs_by_repo[repo] += 1
+
+    def add_commit(self, repo: str, author: str, day: date) -> None:
+        """Count one commit."""
+        self.total_commits += 1
+        self.commits_by_author[author] += 1
+        self.commits_by_repo[repo] += 1
+        self.daily_commits[day] += 1
+
+    def merge(self, other: "VelocityRollup") -> "VelocityRollup":
+        """Add another rollup's totals into this one and return self."""
+        self.total_prs += other.total_prs
+        self.merged_prs += other.merged_prs
+        self.open_prs += other.open_prs
+        self.cycle_time_hours_sum += other.cycle_time_hours_sum
+        self.cycle_time_count += other.cycle_time_count
+        self.prs_by_author.update(other.prs_by_author)
+        self.prs_by_repo.update(other.prs_by_repo)
+
+        self.total_commits += other.total_commits
+        self.commits_by_author.update(other.commits_by_author)
+        self.commits_by_repo.update(other.commits_by_repo)
+        self.daily_commits.update(other.daily_commits)
+        return self
+
+    @property
+    def avg_pr_cycle_time_hours(self) -> float:
+        """Mean created-to-merged time of merged PRs, in hours."""
+        return self.cycle_time_hours_sum / self.cycle_time_count if self.cycle_time_count else 0
+
+    def to_velocity(self, days: int) -> Dict:
+        """Build the team velocity dictionary returned by ``get_team_velocity``.
+
+        Args:
+            days: Length of the look-back window, used for daily averages
+        """
+        contributors = set(self.prs_by_author) | set(self.commits_by_author)
+        return {
+            'pr_cycle_time_days': self.avg_pr_cycle_time_hours / 24,
+            'daily_commits': self.total_commits / days if days > 0 else 0,
+            'active_contributors': len(contributors),
+            'prs_merged': self.merged_prs,
+            'prs_open': self.open_prs,
+            'total_commits': self.total_commits,
+            'prs_by_author': dict(self.prs_by_author),
+            'commits_by_author': dict(self.commits_by_author),
+            'daily_commits_data': sorted(self.daily_commits.items()),
+        }
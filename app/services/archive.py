@@ -0,0 +1,235 @@
+"""Columnar archive of collected GitHub and LangSmith records.
+
+The services only see the last ``days`` days, so historical comparisons would
+otherwise refetch everything from upstream. :class:`MetricsArchive` keeps the
+raw PR, commit and run records as Parquet files partitioned Hive-style by
+source, day and repository::
+
+    <ARCHIVE_DIR>/source=github_commits/date=2024-05-01/repo=web/part-0.parquet
+
+Queries filter on the ``date`` and ``repo`` partition columns, so pyarrow only
+opens the files of the requested days and repositories. Rows inside each file
+are sorted by their timestamp and written in bounded row groups, so extra
+predicates on the timestamp or other columns are checked against row-group
+statistics before any data is read.
+
+LangSmith runs use the project name as their ``repo`` partition.
+"""
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from app.utils.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Archive sources
+PRS = "github_prs"
+COMMITS = "github_commits"
+RUNS = "langsmith_runs"
+
+_TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+SCHEMAS: Dict[str, pa.Schema] = {
+    PRS: pa.schema([
+        ("repo", pa.string()),
+        ("number", pa.int64()),
+        ("author", pa.string()),
+        ("state", pa.string()),
+        ("merged", pa.bool_()),
+        ("created_at", _TIMESTAMP),
+        ("merged_at", _TIMESTAMP),
+        ("closed_at", _TIMESTAMP),
+    ]),
+    COMMITS: pa.schema([
+        ("repo", pa.string()),
+        ("sha", pa.string()),
+        ("author", pa.string()),
+        ("committed_at", _TIMESTAMP),
+    ]),
+    RUNS: pa.schema([
+        ("repo", pa.string()),
+        ("run_id", pa.string()),
+        ("name", pa.string()),
+        ("run_type", pa.string()),
+        ("status", pa.string()),
+        ("tags", pa.list_(pa.string())),
+        ("start_time", _TIMESTAMP),
+        ("end_time", _TIMESTAMP),
+        ("latency_seconds", pa.float64()),
+    ]),
+}
+
+# Timestamp column that decides each record's day partition
+TIME_COLUMNS = {PRS: "created_at", COMMITS: "committed_at", RUNS: "start_time"}
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("date", pa.date32()), ("repo", pa.string())]), flavor="hive"
+)
+
+ROW_GROUP_SIZE = 64 * 1024
+
+
+class MetricsArchive:
+    """Partitioned Parquet store for PR, commit and run records."""
+
+    def __init__(self, directory: Optional[str] = None):
+        """Initialize the archive.
+
+        Args:
+            directory: Root directory of the archive. If not provided, uses ARCHIVE_DIR.
+        """
+        self.directory = Path(directory or settings.ARCHIVE_DIR)
+
+    def _path(self, source: str) -> Path:
+        if source not in SCHEMAS:
+            raise ValueError(f"Unknown archive source: {source}")
+        return self.directory / f"source={source}"
+
+    def write(self, source: str, records: Iterable[Mapping]) -> int:
+        """Archive records, replacing the day/repository partitions they cover.
+
+        Re-archiving a day therefore overwrites it instead of adding duplicate
+        rows, as long as each write holds every record of the days it touches.
+
+        Args:
+            source: One of PRS, COMMITS or RUNS
+            records: Dictionaries with the fields of ``SCHEMAS[source]``
+
+        Returns:
+            Number of rows written
+        """
+        path = self._path(source)
+        table = pa.Table.from_pylist(list(records), schema=SCHEMAS[source])
+        if table.num_rows == 0:
+            return 0
+
+        time_column = TIME_COLUMNS[source]
+        table = table.append_column("date", pc.cast(table[time_column], pa.date32()))
+        table = table.sort_by([("date", "ascending"), ("repo", "ascending"), (time_column, "ascending")])
+
+        ds.write_dataset(
+            table,
+            path,
+            format="parquet",
+            partitioning=PARTITIONING,
+            basename_template="part-{i}.parquet",
+            existing_data_behavior="delete_matching",
+            max_rows_per_group=ROW_GROUP_SIZE,
+            min_rows_per_group=min(ROW_GROUP_SIZE, table.num_rows),
+        )
+        logger.info(f"Archived {table.num_rows} {source} records to {path}")
+        return table.num_rows
+
+    def dataset(self, source: str) -> Optional[ds.Dataset]:
+        """Open the archived records of one source, or None if there are none yet."""
+        path = self._path(source)
+        if not path.exists():
+            return None
+        return ds.dataset(path, format="parquet", partitioning=PARTITIONING)
+
+    @staticmethod
+    def _predicate(
+        start: Optional[date],
+        end: Optional[date],
+        repos: Optional[Iterable[str]],
+    ) -> Optional[ds.Expression]:
+        """Build the partition filter for a date range and repository set."""
+        conditions = []
+        if start is not None:
+            conditions.append(ds.field("date") >= start)
+        if end is not None:
+            conditions.append(ds.field("date") <= end)
+        if repos is not None:
+            conditions.append(ds.field("repo").isin(sorted(set(repos))))
+
+        predicate = None
+        for condition in conditions:
+            predicate = condition if predicate is None else predicate & condition
+        return predicate
+
+    def scan(
+        self,
+        source: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        repos: Optional[Iterable[str]] = None,
+        columns: Optional[List[str]] = None,
+        where: Optional[ds.Expression] = None,
+    ) -> pa.Table:
+        """Read archived records.
+
+        Args:
+            source: One of PRS, COMMITS or RUNS
+            start: First day to include. If None, starts at the oldest record.
+            end: Last day to include. If None, ends at the newest record.
+            repos: Repositories (or LangSmith projects) to include. If None, includes all.
+            columns: Columns to read. If None, reads every column.
+            where: Additional pyarrow expression, checked against row-group
+                statistics before rows are read
+
+        Returns:
+            Matching records, empty if nothing has been archived
+        """
+        dataset = self.dataset(source)
+        if dataset is None:
+            schema = SCHEMAS[source].append(pa.field("date", pa.date32()))
+            return schema.empty_table() if columns is None else schema.empty_table().select(columns)
+
+        predicate = self._predicate(start, end, repos)
+        if where is not None:
+            predicate = where if predicate is None else predicate & where
+        return dataset.to_table(columns=columns, filter=predicate)
+
+    def batches(
+        self,
+        source: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        repos: Optional[Iterable[str]] = None,
+        batch_size: int = ROW_GROUP_SIZE,
+    ) -> Iterator[pa.RecordBatch]:
+        """Stream archived records with the columns of ``SCHEMAS[source]``, in batches.
+
+        Unlike :meth:`scan`, only a few batches are held at a time however
+        many records match, so this suits exports of the whole archive.
+
+        Args:
+            source: One of PRS, COMMITS or RUNS
+            start: First day to include. If None, starts at the oldest record.
+            end: Last day to include. If None, ends at the newest record.
+            repos: Repositories (or LangSmith projects) to include. If None, includes all.
+            batch_size: Most rows per batch
+        """
+        dataset = self.dataset(source)
+        if dataset is None:
+            return
+        scanned = dataset.to_batches(
+            columns=SCHEMAS[source].names,
+            filter=self._predicate(start, end, repos),
+            batch_size=batch_size,
+        )
+        for batch in scanned:
+            if batch.num_rows:
+                yield batch
+
+    def daily_counts(
+        self,
+        source: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        repos: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[date, int]]:
+        """Count archived records per day, like ``daily_commits_data``.
+
+        Only the ``date`` partition column is requested, so the counts come
+        from file metadata and directory names.
+        """
+        table = self.scan(source, start, end, repos, columns=["date"])
+        counts = table.group_by("date").aggregate([("date", "count")])
+        return sorted(zip(counts["date"].to_pylist(), counts["date_count"].to_pylist()))
@@ -0,0 +1,293 @@
+"""Deadline-bounded fetching for the service collectors.
+
+The collectors list records from several sources: repositories, or a
+LangSmith project. Listed one after another, one slow or failing source
+stalls the whole call. :func:`collect` instead lists every source on a
+shared thread pool of ``FETCH_CONCURRENCY`` threads and hands their records
+to the calling thread as they arrive, so the caller aggregates exactly as
+before. Once the time budget has run out it stops waiting. Sources still
+being listed are abandoned and the caller aggregates what has arrived so far.
+An abandoned listing stops before its next record, so it requests at most
+the page it was waiting for and frees its thread for the next call.
+
+Some upstream endpoints answer "not ready yet" instead, e.g. GitHub's
+repository statistics with 202 Accepted while they are computed.
+:func:`poll` requests every source at once and re-requests those that are
+not ready after a doubling delay, until all are ready or the budget has run
+out.
+
+Along the way :func:`collect` and :func:`poll` fill in a :class:`Completeness`: which sources
+were listed completely, which were still pending and which failed, and how
+many list pages were fetched. Collectors return it with their result under
+``'completeness'``, and :func:`is_partial` tells callers, e.g. caches, that
+the numbers are missing data.
+"""
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from app.utils.config import settings
+from app.utils.logger import get_logger
+from app.utils.metrics import PageCounter, add_upstream_time
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Key of the completeness metadata in collector results
+COMPLETENESS = 'completeness'
+
+# A source (repository or project) and what is listed from it, e.g. ("web", "pulls")
+Part = Tuple[str, str]
+
+# Records are handed over in batches of about a list page
+_BATCH_SIZE = 100
+_QUEUE_BATCHES = 64
+_FINISHED = object()
+
+# Longest delay between polls of a source that is not ready
+_MAX_POLL_INTERVAL = 16.0
+
+
+@dataclass
+class Completeness:
+    """Which sources a collector result covers."""
+
+    done: List[str] = field(default_factory=list)
+    pending: List[str] = field(default_factory=list)
+    # Source -> error message
+    failed: Dict[str, str] = field(default_factory=dict)
+    pages: int = 0
+    timeout: Optional[float] = None
+    timed_out: bool = False
+
+    @property
+    def complete(self) -> bool:
+        return not self.pending and not self.failed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'complete': self.complete}
+
+
+def merge_completeness(*parts: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine the completeness of results collected one after another from the same sources."""
+    failed: Dict[str, str] = {}
+    pending: Dict[str, None] = {}
+    sources: Dict[str, None] = {}
+    for part in parts:
+        failed.update(part['failed'])
+        pending.update(dict.fromkeys(part['pending']))
+        sources.update(dict.fromkeys([*part['done'], *part['pending'], *part['failed']]))
+    merged = Completeness(
+        done=[source for source in sources if source not in failed and source not in pending],
+        pending=[source for source in pending if source not in failed],
+        failed=failed,
+        pages=sum(part['pages'] for part in parts),
+        timeout=parts[0]['timeout'] if parts else None,
+        timed_out=any(part['timed_out'] for part in parts),
+    )
+    return merged.to_dict()
+
+
+def is_partial(result: Any) -> bool:
+    """Whether a collector result, or a dict of results keyed by team, is missing data."""
+    if not isinstance(result, dict):
+        return False
+    completeness = result.get(COMPLETENESS)
+    if completeness is not None:
+        return not completeness['complete']
+    return any(isinstance(value, dict) and not value.get(COMPLETENESS, {'complete': True})['complete']
+               for value in result.values())
+
+
+def partial_ttl(result: Any, ttl: Optional[float] = None) -> Optional[float]:
+    """Cache lifetime of a result: PARTIAL_RESULT_TTL if it is partial, else ``ttl``."""
+    return settings.PARTIAL_RESULT_TTL if is_partial(result) else ttl
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.FETCH_CONCURRENCY, thread_name_prefix="collect"
+            )
+        return _executor
+
+
+def collect(
+    listers: Dict[Part, Callable[[], Iterable[T]]],
+    timeout: Optional[float],
+    completeness: Completeness,
+) -> Iterator[T]:
+    """List every part concurrently and yield the records as they arrive.
+
+    ``completeness`` is filled in when the iteration ends, either because
+    every part has been listed or because ``timeout`` has passed.
+
+    Args:
+        listers: Function listing the records of each part
+        timeout: Seconds to wait for records. If None, waits for every part.
+        completeness: Updated with the outcome per source
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    completeness.timeout = timeout
+    stop = threading.Event()
+    arrivals: queue.Queue = queue.Queue(maxsize=_QUEUE_BATCHES)
+    counters = {part: PageCounter() for part in listers}
+    # Part -> None once listed, or the error that ended its listing
+    outcomes: Dict[Part, Optional[str]] = {}
+
+    def hand_over(part: Part, payload: Any) -> bool:
+        while not stop.is_set():
+            try:
+                arrivals.put((part, payload), timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(part: Part) -> None:
+        if stop.is_set():
+            return
+        with counters[part].track():
+            records = None
+            try:
+                records = iter(listers[part]())
+                batch = []
+                for record in records:
+                    batch.append(record)
+                    if len(batch) >= _BATCH_SIZE:
+                        if not hand_over(part, batch):
+                            return
+                        batch = []
+                    # Do not page on once the caller has stopped waiting
+                    if stop.is_set():
+                        return
+                if batch and not hand_over(part, batch):
+                    return
+            except Exception as e:
+                hand_over(part, e)
+                return
+            finally:
+                close = getattr(records, 'close', None)
+                if close is not None:
+                    close()
+        hand_over(part, _FINISHED)
+
+    futures = [_get_executor().submit(run, part) for part in listers]
+    try:
+        while len(outcomes) < len(listers):
+            wait = None if deadline is None else deadline - time.monotonic()
+            if wait is not None and wait <= 0:
+                completeness.timed_out = True
+                break
+            # Waiting here is waiting on upstream, not aggregation
+            blocked = time.perf_counter()
+            try:
+                part, payload = arrivals.get(timeout=wait)
+            except queue.Empty:
+                completeness.timed_out = True
+                break
+            finally:
+                add_upstream_time(time.perf_counter() - blocked)
+            if payload is _FINISHED:
+                outcomes[part] = None
+            elif isinstance(payload, Exception):
+                logger.warning(f"Listing {part[1]} of {part[0]} failed: {payload}")
+                outcomes[part] = str(payload) or type(payload).__name__
+            else:
+                yield from payload
+    finally:
+        stop.set()
+        for future in futures:
+            future.cancel()
+
+        sources: Dict[str, List[Part]] = {}
+        for part in listers:
+            sources.setdefault(part[0], []).append(part)
+        for source, parts in sources.items():
+            errors = [outcomes[part] for part in parts if outcomes.get(part)]
+            if errors:
+                completeness.failed[source] = errors[0]
+            elif all(part in outcomes for part in parts):
+                completeness.done.append(source)
+            else:
+                completeness.pending.append(source)
+        completeness.pages += sum(counter.pages for counter in counters.values())
+        if completeness.timed_out:
+            logger.warning(
+                f"Collection stopped after {timeout}s with {len(completeness.pending)} "
+                f"of {len(completeness.done) + len(completeness.pending) + len(completeness.failed)} sources pending"
+            )
+
+
+def poll(
+    fetchers: Dict[str, Callable[[], Optional[T]]],
+    timeout: Optional[float],
+    completeness: Completeness,
+    interval: Optional[float] = None,
+) -> Dict[str, T]:
+    """Fetch from every source concurrently, retrying those that are not ready yet.
+
+    A fetcher returns None while its source is still being prepared upstream.
+    All sources are requested in each round, so upstream prepares them in
+    parallel. Between rounds the delay starts at ``interval`` and doubles, up
+    to 16 seconds, with some jitter.
+
+    Args:
+        fetchers: Function fetching the result of each source
+        timeout: Seconds to wait for results. If None, waits up to STATS_POLL_MAX_WAIT.
+        completeness: Updated with the outcome per source
+        interval: Seconds before the first retry. If None, uses STATS_POLL_INTERVAL.
+
+    Returns:
+        Result of every source that was ready in time
+    """
+    deadline = time.monotonic() + (timeout if timeout is not None else settings.STATS_POLL_MAX_WAIT)
+    completeness.timeout = timeout
+    delay = settings.STATS_POLL_INTERVAL if interval is None else interval
+    results: Dict[str, T] = {}
+    pending = list(fetchers)
+    while True:
+        futures = {source: _get_executor().submit(fetchers[source]) for source in pending}
+        # Waiting here is waiting on upstream, not aggregation
+        blocked = time.perf_counter()
+        wait(futures.values(), timeout=max(0.0, deadline - time.monotonic()))
+        add_upstream_time(time.perf_counter() - blocked)
+
+        pending = []
+        for source, future in futures.items():
+            if not future.done():
+                future.cancel()
+                pending.append(source)
+            elif future.exception() is not None:
+                logger.warning(f"Fetching {source} failed: {future.exception()}")
+                completeness.failed[source] = str(future.exception()) or type(future.exception()).__name__
+            elif future.result() is None:
+                pending.append(source)
+            else:
+                results[source] = future.result()
+                completeness.done.append(source)
+
+        pause = delay * (1 + random.random() / 2)
+        if not pending or time.monotonic() + pause >= deadline:
+            break
+        blocked = time.perf_counter()
+        time.sleep(pause)
+        add_upstream_time(time.perf_counter() - blocked)
+        delay = min(2 * delay, _MAX_POLL_INTERVAL)
+
+    if pending:
+        completeness.pending.extend(pending)
+        completeness.timed_out = True
+        logger.warning(f"Polling stopped with {len(pending)} of {len(fetchers)} sources not ready")
+    return results
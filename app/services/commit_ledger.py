@@ -0,0 +1,215 @@
+"""Commits of every branch of a repository, deduplicated by SHA.
+
+``repo.get_commits()`` only walks the default branch, so work on long-lived
+feature branches never shows up in the commit metrics. With
+``GITHUB_ALL_BRANCHES`` set, :class:`~app.services.github_service.GitHubService`
+keeps a :class:`CommitLedger` per repository instead. Each sync lists the
+branches, skips those whose head SHA is unchanged since the last sync, and
+adds the new commits of the others. A commit reachable from many branches is
+stored once.
+
+A ledger holds each commit as a 20-byte binary SHA, a timestamp and an author
+id in three numpy arrays kept sorted by SHA, about 32 bytes per commit, so
+membership is a binary search and memory grows with the number of commits,
+not with the number of branches. Commits older than
+``BRANCH_LEDGER_RETENTION_DAYS`` are dropped. Ledgers are saved as ``.npz``
+files under ``BRANCH_LEDGER_DIR``, one per repository.
+"""
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import orjson
+
+from app.models.records import CommitRecord
+from app.utils.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SHA_BYTES = 20
+_SHA_DTYPE = f"S{SHA_BYTES}"
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _micros(ts: datetime) -> int:
+    ts = ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+    return (ts - _EPOCH) // _MICROSECOND
+
+
+class CommitLedger:
+    """Commits of one repository and the head SHA of each branch at its last sync."""
+
+    def __init__(self, repo: str):
+        self.repo = repo
+        # Branch name -> head SHA when the branch was last synced
+        self.heads: Dict[str, str] = {}
+        # Commits since this time are complete for every branch in ``heads``
+        self.covered_since: Optional[datetime] = None
+        self._shas = np.empty(0, dtype=_SHA_DTYPE)
+        self._times = np.empty(0, dtype=np.int64)
+        self._author_ids = np.empty(0, dtype=np.int32)
+        self._authors: List[str] = []
+        self._author_index: Dict[str, int] = {}
+        # Commits added since the arrays were last merged, keyed by binary SHA
+        self._pending: Dict[bytes, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._shas) + len(self._pending)
+
+    def __contains__(self, sha: str) -> bool:
+        return self._contains(bytes.fromhex(sha))
+
+    def _contains(self, key: bytes) -> bool:
+        if key in self._pending:
+            return True
+        i = int(np.searchsorted(self._shas, key))
+        # numpy drops trailing NUL bytes from the elements it returns
+        return i < len(self._shas) and self._shas[i] == key.rstrip(b"\0")
+
+    def add(self, sha: str, author: str, committed_at: datetime) -> bool:
+        """Add a commit unless it is already in the ledger.
+
+        Returns:
+            True if the commit was new
+        """
+        key = bytes.fromhex(sha)
+        if self._contains(key):
+            return False
+        author_id = self._author_index.get(author)
+        if author_id is None:
+            author_id = self._author_index[author] = len(self._authors)
+            self._authors.append(author)
+        self._pending[key] = (_micros(committed_at), author_id)
+        return True
+
+    def _merge(self) -> None:
+        """Merge pending commits into the sorted arrays."""
+        if not self._pending:
+            return
+        shas = np.concatenate([self._shas, np.array(list(self._pending), dtype=_SHA_DTYPE)])
+        values = np.array(list(self._pending.values()), dtype=np.int64).reshape(-1, 2)
+        times = np.concatenate([self._times, values[:, 0]])
+        author_ids = np.concatenate([self._author_ids, values[:, 1].astype(np.int32)])
+        order = np.argsort(shas, kind="stable")
+        self._shas, self._times, self._author_ids = shas[order], times[order], author_ids[order]
+        self._pending.clear()
+
+    def prune(self, before: datetime) -> int:
+        """Drop commits made before ``before``.
+
+        Returns:
+            Number of commits dropped
+        """
+        self._merge()
+        keep = self._times >= _micros(before)
+        dropped = int(len(keep) - keep.sum())
+        if dropped:
+            self._shas, self._times, self._author_ids = self._shas[keep], self._times[keep], self._author_ids[keep]
+        if self.covered_since is not None and self.covered_since < before:
+            self.covered_since = before
+        return dropped
+
+    def records(self, since: Optional[datetime] = None) -> Iterator[CommitRecord]:
+        """Yield a record for every commit made since ``since``, oldest first."""
+        self._merge()
+        # A sync may replace the arrays while the caller is still iterating
+        shas, times, author_ids, authors = self._shas, self._times, self._author_ids, self._authors
+        selected = np.flatnonzero(times >= _micros(since)) if since is not None else np.arange(len(times))
+        for i in selected[np.argsort(times[selected], kind="stable")]:
+            yield CommitRecord(
+                repo=self.repo,
+                sha=shas[i].ljust(SHA_BYTES, b"\0").hex(),
+                author=authors[author_ids[i]],
+                committed_at=_EPOCH + int(times[i]) * _MICROSECOND,
+            )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        self._merge()
+        meta = {
+            'repo': self.repo,
+            'heads': self.heads,
+            'covered_since': self.covered_since.isoformat() if self.covered_since else None,
+            'authors': self._authors,
+        }
+        return {
+            'shas': self._shas,
+            'times': self._times,
+            'author_ids': self._author_ids,
+            'meta': np.frombuffer(orjson.dumps(meta), dtype=np.uint8),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "CommitLedger":
+        meta = orjson.loads(arrays['meta'].tobytes())
+        ledger = cls(meta['repo'])
+        ledger.heads = meta['heads']
+        ledger.covered_since = datetime.fromisoformat(meta['covered_since']) if meta['covered_since'] else None
+        ledger._authors = meta['authors']
+        ledger._author_index = {author: i for i, author in enumerate(ledger._authors)}
+        ledger._shas = arrays['shas'].astype(_SHA_DTYPE)
+        ledger._times = arrays['times'].astype(np.int64)
+        ledger._author_ids = arrays['author_ids'].astype(np.int32)
+        return ledger
+
+
+class LedgerStore:
+    """Directory of commit ledgers, one ``.npz`` file per organization and repository.
+
+    Loaded ledgers stay in memory, and :meth:`lock` serializes syncs of the
+    same repository between threads.
+    """
+
+    def __init__(self, directory: Optional[Union[str, Path]] = None):
+        """Initialize the store.
+
+        Args:
+            directory: Where ledgers are kept. If not provided, uses BRANCH_LEDGER_DIR.
+        """
+        self.directory = Path(directory or settings.BRANCH_LEDGER_DIR)
+        self._ledgers: Dict[Tuple[str, str], CommitLedger] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = defaultdict(threading.Lock)
+        self._locks_lock = threading.Lock()
+
+    def _path(self, org: str, repo: str) -> Path:
+        return self.directory / org / f"{repo}.npz"
+
+    def lock(self, org: str, repo: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks[(org, repo)]
+
+    def load(self, org: str, repo: str) -> CommitLedger:
+        """Get a repository's ledger, empty if it has never been synced or cannot be read."""
+        key = (org, repo)
+        ledger = self._ledgers.get(key)
+        if ledger is None:
+            try:
+                with np.load(self._path(org, repo), allow_pickle=False) as arrays:
+                    ledger = CommitLedger.from_arrays(dict(arrays))
+            except FileNotFoundError:
+                ledger = CommitLedger(repo)
+            except Exception as e:
+                logger.warning(f"Discarding unreadable commit ledger for {org}/{repo}: {e}")
+                ledger = CommitLedger(repo)
+            self._ledgers[key] = ledger
+        return ledger
+
+    def save(self, org: str, ledger: CommitLedger) -> None:
+        """Atomically replace a repository's ledger file."""
+        path = self._path(org, ledger.repo)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **ledger.to_arrays())
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self._ledgers[(org, ledger.repo)] = ledger
@@ -0,0 +1,309 @@
+"""Cached data access for the Streamlit dashboard.
+
+Streamlit re-executes ``app/main.py`` on every widget interaction, so the
+dashboard reads GitHub and LangSmith data through this module instead of
+calling the services directly. Service clients are created once per process
+and reused across reruns, and results are memoized by the active filters
+(look-back window and repository set) for ``DASHBOARD_CACHE_TTL`` seconds or
+until :func:`clear_dashboard_cache` is called. The memo is the process-wide
+:class:`~app.utils.cache.SharedCache`, so concurrent sessions asking for the
+same filters share one fetch.
+
+Velocity is fetched for every team in one pass (see
+:meth:`~app.services.github_service.GitHubService.get_team_rollups`) and
+memoized without the team, so switching teams is served from the same entry.
+
+Upstream fetches wait at most ``FETCH_TIME_BUDGET`` seconds. Numbers fetched
+within the budget are shown, marked partial by their ``'completeness'``, and
+memoized for ``PARTIAL_RESULT_TTL`` seconds only, so a later rerun tries again.
+
+When the snapshot worker is running, requests that match one of its
+precomputed windows are answered from the latest snapshot without touching
+either service. Stale snapshots are still served, and a background refresh is
+started so the next rerun picks up fresh numbers (stale-while-revalidate).
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import date
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import streamlit as st
+
+from app.services.collection import partial_ttl
+from app.services.shards import ShardedGitHub, get_sharded_github
+from app.services.snapshot_store import (
+    PROMPT_COVERAGE,
+    SNAPSHOT_KINDS,
+    TEST_RESULTS,
+    VELOCITY,
+    SnapshotStore,
+)
+from app.services.team_index import ALL_TEAMS, TeamIndex, load_team_index
+from app.utils.cache import get_shared_cache
+from app.utils.cache_backends import DASHBOARD_SCOPE, get_result_cache
+from app.utils.config import settings
+from app.utils.logger import get_logger
+from app.worker import refresh_snapshot
+
+if TYPE_CHECKING:
+    from app.services.github_service import GitHubService
+    from app.services.langsmith_service import LangSmithService
+
+logger = get_logger(__name__)
+
+RepoKey = Optional[Tuple[str, ...]]
+
+TEAM_INDEX = "team_index"
+
+# First element of every shared-cache key written by this module
+_DASHBOARD_KINDS = (VELOCITY, PROMPT_COVERAGE, TEST_RESULTS, TEAM_INDEX)
+
+
+@st.cache_resource(show_spinner=False)
+def get_github_service() -> Optional["GitHubService"]:
+    """Get the shared GitHub client, or None if it cannot be configured."""
+    from app.services.github_service import GitHubService
+
+    try:
+        return GitHubService(cache=get_result_cache(), results_cache=get_result_cache().scoped(DASHBOARD_SCOPE))
+    except Exception as e:
+        logger.warning(f"GitHub service unavailable: {e}")
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def get_langsmith_service() -> Optional["LangSmithService"]:
+    """Get the shared LangSmith client, or None if it cannot be configured."""
+    from app.services.langsmith_service import LangSmithService
+
+    try:
+        return LangSmithService(cache=get_result_cache().scoped(DASHBOARD_SCOPE))
+    except Exception as e:
+        logger.warning(f"LangSmith service unavailable: {e}")
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def get_load_executor() -> ThreadPoolExecutor:
+    """Get the shared thread pool that loads dashboard sections concurrently."""
+    return ThreadPoolExecutor(
+        max_workers=settings.DASHBOARD_LOAD_WORKERS,
+        thread_name_prefix="dashboard-load",
+    )
+
+
+def load_concurrently(loaders: Dict[str, Callable[[], Any]]) -> Iterator[Tuple[str, Future]]:
+    """Run independent loaders in parallel and yield each one as it finishes.
+
+    Args:
+        loaders: Zero-argument callables keyed by section name
+
+    Yields:
+        Tuples of (section name, completed future), in completion order
+    """
+    executor = get_load_executor()
+    futures = {executor.submit(loader): name for name, loader in loaders.items()}
+    for future in as_completed(futures):
+        yield futures[future], future
+
+
+@st.cache_resource(show_spinner=False)
+def get_snapshot_store() -> SnapshotStore:
+    """Get the shared snapshot store."""
+    return SnapshotStore()
+
+
+# Snapshots with a background refresh in progress, so each is refreshed once
+_refreshing: Set[Tuple[str, int]] = set()
+_refreshing_lock = threading.Lock()
+
+
+def _refresh_in_background(kind: str, days: int) -> None:
+    """Start a background refresh of one snapshot unless one is already running."""
+    key = (kind, days)
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run() -> None:
+        try:
+            refresh_snapshot(
+                get_snapshot_store(), kind, days, get_github_service(), get_langsmith_service()
+            )
+        except Exception as e:
+            logger.error(f"Background refresh of {kind} snapshot for {days}d failed: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, name=f"snapshot-{kind}-{days}d", daemon=True).start()
+
+
+def _read_snapshot(kind: str, start_date: date, repo_names: RepoKey = None) -> Optional[Dict]:
+    """Serve a request from the snapshot store if it matches a precomputed window."""
+    days = _lookback_days(start_date)
+    if repo_names or days not in settings.SNAPSHOT_WINDOWS:
+        return None
+
+    snapshot = get_snapshot_store().read(kind, days)
+    if snapshot is None:
+        return None
+    if snapshot.is_stale():
+        _refresh_in_background(kind, days)
+    return snapshot.data
+
+
+def revalidate_snapshots() -> None:
+    """Refresh every existing snapshot in the background."""
+    store = get_snapshot_store()
+    for days in settings.SNAPSHOT_WINDOWS:
+        for kind in SNAPSHOT_KINDS:
+            if store.read(kind, days) is not None:
+                _refresh_in_background(kind, days)
+
+
+def _repo_key(repo_names: Optional[Iterable[str]]) -> RepoKey:
+    """Normalize a repository selection so equal sets share a cache entry."""
+    if not repo_names:
+        return None
+    return tuple(sorted(set(repo_names)))
+
+
+def _lookback_days(start_date: date) -> int:
+    """Convert the start of the selected date range into a look-back window."""
+    return max((date.today() - start_date).days, 1)
+
+
+def get_velocity_service() -> Optional[Union["GitHubService", ShardedGitHub]]:
+    """Get the client velocity is collected with: every organization in ``GITHUB_ORGS``, or else ``GITHUB_ORG``."""
+    return get_sharded_github() or get_github_service()
+
+
+def get_team_index() -> TeamIndex:
+    """Get the team index, rebuilt every ``TEAM_INDEX_TTL`` seconds."""
+    return get_shared_cache().get_or_compute(
+        (TEAM_INDEX,), lambda: load_team_index(get_velocity_service()), settings.TEAM_INDEX_TTL
+    )
+
+
+def get_team_names() -> List[str]:
+    """Get the choices for the team selector: ``ALL_TEAMS``, each organization with ``GITHUB_ORGS`` set, then the teams."""
+    sharded = get_sharded_github()
+    return [ALL_TEAMS, *(sharded.view_names() if sharded else []), *get_team_index().team_names()]
+
+
+def _load_velocity_rollups(days: int, repo_names: RepoKey) -> Optional[Dict[str, Dict]]:
+    index = get_team_index()
+
+    def compute() -> Optional[Dict[str, Dict]]:
+        service = get_velocity_service()
+        if service is None:
+            return None
+        return service.get_team_rollups(
+            index,
+            days=days,
+            repo_names=list(repo_names) if repo_names else None,
+            timeout=settings.FETCH_TIME_BUDGET,
+        )
+
+    return get_shared_cache().get_or_compute(
+        (VELOCITY, days, repo_names, index.version), compute, partial_ttl
+    )
+
+
+def _load_coverage_metrics(days: int) -> Optional[Dict]:
+    def compute() -> Optional[Dict]:
+        service = get_langsmith_service()
+        if service is None:
+            return None
+        return service.get_prompt_coverage(days=days, timeout=settings.FETCH_TIME_BUDGET)
+
+    return get_shared_cache().get_or_compute((PROMPT_COVERAGE, days), compute, partial_ttl)
+
+
+def _load_test_results(days: int) -> Optional[Dict]:
+    def compute() -> Optional[Dict]:
+        service = get_langsmith_service()
+        if service is None:
+            return None
+        return service.get_test_results(days=days, timeout=settings.FETCH_TIME_BUDGET)
+
+    return get_shared_cache().get_or_compute((TEST_RESULTS, days), compute, partial_ttl)
+
+
+def get_velocity_metrics(
+    start_date: date,
+    team: str,
+    repo_names: Optional[Iterable[str]] = None,
+) -> Optional[Dict]:
+    """Get team velocity metrics from ``start_date`` up to today.
+
+    Args:
+        start_date: First day of the selected date range
+        team: Selected team name
+        repo_names: Repositories to include. If None, includes all repos in the org.
+
+    Returns:
+        Team velocity metrics, or None if GitHub is not configured or the team
+        is unknown
+    """
+    repo_key = _repo_key(repo_names)
+    rollups = _read_snapshot(VELOCITY, start_date, repo_key)
+    if rollups is None or team not in rollups:
+        rollups = _load_velocity_rollups(_lookback_days(start_date), repo_key)
+    return rollups.get(team) if rollups else None
+
+
+def get_coverage_metrics(start_date: date, team: str) -> Optional[Dict]:
+    """Get prompt coverage metrics from ``start_date`` up to today.
+
+    Coverage is not broken down by team, so every team shares one entry.
+
+    Args:
+        start_date: First day of the selected date range
+        team: Selected team name
+
+    Returns:
+        Prompt coverage metrics, or None if LangSmith is not configured
+    """
+    return _read_snapshot(PROMPT_COVERAGE, start_date) or _load_coverage_metrics(_lookback_days(start_date))
+
+
+def get_test_results(start_date: date, team: str) -> Optional[Dict]:
+    """Get test execution results from ``start_date`` up to today.
+
+    Args:
+        start_date: First day of the selected date range
+        team: Selected team name
+
+    Returns:
+        Test results and metrics, or None if LangSmith is not configured
+    """
+    return _read_snapshot(TEST_RESULTS, start_date) or _load_test_results(_lookback_days(start_date))
+
+
+def clear_dashboard_cache(clients: bool = False) -> None:
+    """Invalidate memoized dashboard data.
+
+    This also clears the dashboard's scope of the result cache, so with the
+    Redis backend a refresh refetches for every replica. Review timelines and
+    code churn statistics, which stay valid until their PR or repository
+    changes, and the API's results are kept.
+
+    Args:
+        clients: Also drop the cached service clients so they are rebuilt
+            (and re-read their credentials) on the next access.
+    """
+    get_shared_cache().invalidate(
+        lambda key: isinstance(key, tuple) and key[0] in _DASHBOARD_KINDS
+    )
+    get_result_cache().scoped(DASHBOARD_SCOPE).clear()
+
+    if clients:
+        get_github_service.clear()
+        get_langsmith_service.clear()
+        sharded = get_sharded_github()
+        if sharded is not None:
+            sharded.close()
+        get_sharded_github.cache_clear()
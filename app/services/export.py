@@ -0,0 +1,290 @@
+"""Streaming export of raw and aggregated records.
+
+The service methods return whole lists, which is fine for the dashboard's
+windows but not for exporting years of records. An export here is a chain of
+generators instead:
+
+* records come from a service's ``iter_*_records`` generator, which lists
+  them from upstream page by page, or from :meth:`MetricsArchive.batches`;
+* :func:`record_batches` groups the records into Arrow record batches of
+  ``EXPORT_CHUNK_ROWS`` rows, optionally rolled up per day by
+  :func:`daily_totals`;
+* :func:`encode` turns each batch into the bytes of the next part of a CSV,
+  NDJSON or Parquet file.
+
+Only one batch and its encoding are held at a time, so memory use does not
+grow with the number of rows. A Parquet export gets one row group per batch,
+and its footer is written after the last batch.
+"""
+import io
+from datetime import date, datetime
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import orjson
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from app.services.archive import COMMITS, PRS, RUNS, SCHEMAS, TIME_COLUMNS, MetricsArchive
+from app.utils.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SOURCES = (PRS, COMMITS, RUNS)
+
+# Export format -> media type
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Records per day and repository, the rollup written by --daily exports
+DAILY_SCHEMA = pa.schema([
+    ("date", pa.date32()),
+    ("repo", pa.string()),
+    ("records", pa.int64()),
+])
+
+
+class _Spool(io.RawIOBase):
+    """Write-only file that hands out what was written since the last :meth:`drain`.
+
+    ``tell()`` keeps counting from the start, as the Parquet writer needs the
+    real file offsets for its footer.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def record_batches(
+    records: Iterable[Mapping],
+    schema: pa.Schema,
+    rows: Optional[int] = None,
+) -> Iterator[pa.RecordBatch]:
+    """Group records into record batches, keeping only the fields of ``schema``.
+
+    Args:
+        records: Dictionaries, e.g. from a service's ``iter_*_records``
+        schema: Schema of the batches
+        rows: Most rows per batch. If not provided, uses EXPORT_CHUNK_ROWS.
+    """
+    rows = rows or settings.EXPORT_CHUNK_ROWS
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= rows:
+            yield pa.RecordBatch.from_pylist(chunk, schema=schema)
+            chunk = []
+    if chunk:
+        yield pa.RecordBatch.from_pylist(chunk, schema=schema)
+
+
+def daily_totals(batches: Iterable[pa.RecordBatch], source: str) -> Iterator[pa.RecordBatch]:
+    """Count records per day and repository.
+
+    Only the running counts are kept, one per day and repository, however
+    many records the batches hold.
+    """
+    time_column = TIME_COLUMNS[source]
+    totals: Dict[Tuple[date, str], int] = {}
+    for batch in batches:
+        table = pa.table({
+            "date": pc.cast(batch.column(time_column), pa.date32()),
+            "repo": batch.column("repo"),
+        })
+        counts = table.group_by(["date", "repo"]).aggregate([("repo", "count", pc.CountOptions(mode="all"))])
+        for day, repo, count in zip(counts["date"].to_pylist(), counts["repo"].to_pylist(),
+                                    counts["repo_count"].to_pylist()):
+            totals[(day, repo)] = totals.get((day, repo), 0) + count
+
+    keys = sorted(totals, key=lambda key: (key[0] or date.min, key[1] or ""))
+    if keys:
+        yield pa.RecordBatch.from_pydict({
+            "date": [day for day, _ in keys],
+            "repo": [repo for _, repo in keys],
+            "records": [totals[key] for key in keys],
+        }, schema=DAILY_SCHEMA)
+
+
+def _conform(batch: pa.RecordBatch, schema: pa.Schema) -> pa.RecordBatch:
+    if batch.schema.equals(schema):
+        return batch
+    return pa.RecordBatch.from_arrays([batch.column(name) for name in schema.names], schema=schema)
+
+
+def _csv_schema(schema: pa.Schema) -> pa.Schema:
+    """CSV has no list type: list columns are written as ``;``-joined strings."""
+    return pa.schema([
+        pa.field(field.name, pa.string()) if pa.types.is_list(field.type) else field
+        for field in schema
+    ])
+
+
+def _csv_batch(batch: pa.RecordBatch, schema: pa.Schema) -> pa.RecordBatch:
+    columns = [
+        pc.binary_join(column, ";") if pa.types.is_list(column.type) else column
+        for column in batch.columns
+    ]
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError
+
+
+def encode(batches: Iterable[pa.RecordBatch], schema: pa.Schema, fmt: str) -> Iterator[bytes]:
+    """Encode record batches as consecutive parts of one CSV, NDJSON or Parquet file.
+
+    An export without records is still a valid file: a CSV header, an empty
+    NDJSON file or a Parquet file without row groups.
+
+    Args:
+        batches: Record batches with the columns of ``schema``
+        schema: Schema of the export
+        fmt: One of FORMATS
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    if fmt == "ndjson":
+        for batch in batches:
+            yield b"".join(
+                orjson.dumps(row, default=_json_default, option=orjson.OPT_APPEND_NEWLINE)
+                for row in batch.to_pylist()
+            )
+        return
+
+    spool = _Spool()
+    if fmt == "csv":
+        csv_schema = _csv_schema(schema)
+        writer = pa_csv.CSVWriter(spool, csv_schema)
+
+        def prepare(batch: pa.RecordBatch) -> pa.RecordBatch:
+            return _csv_batch(_conform(batch, schema), csv_schema)
+    else:
+        writer = pq.ParquetWriter(spool, schema)
+
+        def prepare(batch: pa.RecordBatch) -> pa.RecordBatch:
+            return _conform(batch, schema)
+    try:
+        for batch in batches:
+            writer.write_batch(prepare(batch))
+            data = spool.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    data = spool.drain()
+    if data:
+        yield data
+
+
+def upstream_records(
+    source: str,
+    since: datetime,
+    until: Optional[datetime] = None,
+    repos: Optional[List[str]] = None,
+    github_service=None,
+    langsmith_service=None,
+) -> Iterator[Dict]:
+    """List the records of one source from upstream, as they arrive.
+
+    Args:
+        source: One of SOURCES
+        since: Earliest time to include
+        until: Time before which records are included. If None, includes records up to now.
+        repos: Repositories to include. If None, includes every repository in the org.
+            LangSmith runs are read from the service's project.
+        github_service: Client for PRS and COMMITS
+        langsmith_service: Client for RUNS
+    """
+    if source in (PRS, COMMITS):
+        if github_service is None:
+            raise ValueError("GitHub is not configured")
+        if source == PRS:
+            return github_service.iter_pr_records(since, repos, until)
+        return github_service.iter_commit_records(since, repos, until)
+    if source == RUNS:
+        if langsmith_service is None:
+            raise ValueError("LangSmith is not configured")
+        return langsmith_service.iter_run_records(since, until=until)
+    raise ValueError(f"Unknown export source: {source}")
+
+
+def export(
+    source: str,
+    fmt: str,
+    since: datetime,
+    until: Optional[datetime] = None,
+    repos: Optional[List[str]] = None,
+    archive: Optional[MetricsArchive] = None,
+    daily: bool = False,
+    github_service=None,
+    langsmith_service=None,
+    rows: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Stream the records of one source as an export file.
+
+    Args:
+        source: One of SOURCES
+        fmt: One of FORMATS
+        since: Earliest time to include; for the archive, the first day
+        until: Time before which records are included; for the archive, the
+            last day is the day of ``until``. If None, includes records up to now.
+        repos: Repositories to include. If None, includes all.
+        archive: Read the records from this archive instead of upstream
+        daily: Export the number of records per day and repository instead of the records
+        github_service: Client for PRS and COMMITS, when reading from upstream
+        langsmith_service: Client for RUNS, when reading from upstream
+        rows: Most rows per batch. If not provided, uses EXPORT_CHUNK_ROWS.
+    """
+    if source not in SCHEMAS:
+        raise ValueError(f"Unknown export source: {source}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    schema = SCHEMAS[source]
+    rows = rows or settings.EXPORT_CHUNK_ROWS
+    if archive is not None:
+        end = until.date() if until is not None else None
+        batches = archive.batches(source, since.date(), end, repos, batch_size=rows)
+    else:
+        records = upstream_records(source, since, until, repos, github_service, langsmith_service)
+        batches = record_batches(records, schema, rows)
+    if daily:
+        batches, schema = daily_totals(batches, source), DAILY_SCHEMA
+    return encode(batches, schema, fmt)
+
+
+def write_export(parts: Iterable[bytes], out: BinaryIO) -> int:
+    """Write an export to a binary file, returning the number of bytes written."""
+    written = 0
+    for part in parts:
+        out.write(part)
+        written += len(part)
+    out.flush()
+    return written
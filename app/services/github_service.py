@@ -1,27 +1,178 @@
 import os
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
-from github import Github, GithubIntegration, Auth
+import sys
+import threading
+import time
+from dataclasses import asdict
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple, TypeVar
+from datetime import date, datetime, timedelta, timezone
+from github import Github, GithubException
 from github.Repository import Repository
-from github.PullRequest import PullRequest
-import pandas as pd
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from app.services.aggregates import VelocityRollup
+from app.models.records import ChurnRecord, CommitRecord, PRRecord, ReviewTimeline
+from app.services.collection import (
+    COMPLETENESS,
+    Completeness,
+    collect,
+    is_partial,
+    merge_completeness,
+    partial_ttl,
+    poll,
+)
+from app.services.commit_ledger import CommitLedger, LedgerStore
+from app.services.identity_index import IdentityIndex, email_key
+from app.services.team_index import ALL_TEAMS, TeamIndex
+from app.utils.config import settings
+from app.utils.http import use_shared_session_for_github
+from app.utils.logger import get_logger
+from app.utils.metrics import instrumented
+from app.utils.profiling import profiled
+
+if TYPE_CHECKING:
+    from app.utils.cache_backends import ResultCache
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# PRs whose reviews are fetched with one GraphQL query, a list page's worth
+REVIEW_BATCH_SIZE = 100
+# Commits of unseen authors held back at most until their emails are looked up
+MAX_HELD_COMMITS = 1000
+
+_REVIEWS_FRAGMENT = """
+fragment Reviews on PullRequest {
+  author { login }
+  reviews(first: 100) { nodes { state submittedAt author { login } } }
+}
+"""
+
+def _reviews_query(numbers: Iterable[int]) -> str:
+    """GraphQL query for the reviews of several PRs of one repository, aliased by number."""
+    prs = "\n".join(f"    pr{number}: pullRequest(number: {number}) {{ ...Reviews }}" for number in numbers)
+    return (
+        "query($owner: String!, $name: String!) {\n"
+        f"  repository(owner: $owner, name: $name) {{\n{prs}\n  }}\n"
+        "}\n" + _REVIEWS_FRAGMENT
+    )
+
+_MEMBERS_QUERY = """
+query($org: String!, $after: String) {
+  organization(login: $org) {
+    membersWithRole(first: 100, after: $after) {
+      pageInfo { hasNextPage endCursor }
+      nodes { login name email }
+    }
+  }
+}
+"""
+
+def _authors_query(shas: Iterable[str]) -> str:
+    """GraphQL query for the author of the PR that introduced each of several commits of one repository, aliased by position."""
+    commits = "\n".join(
+        f'    c{i}: object(oid: "{sha}") {{ ... on Commit {{ associatedPullRequests(first: 1) {{ nodes {{ author {{ login }} }} }} }} }}'
+        for i, sha in enumerate(shas)
+    )
+    return (
+        "query($owner: String!, $name: String!) {\n"
+        f"  repository(owner: $owner, name: $name) {{\n{commits}\n  }}\n"
+        "}\n"
+    )
+
+def _pr_author(node: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Login of the author of the first PR in an ``_authors_query`` commit node."""
+    prs = ((node or {}).get('associatedPullRequests') or {}).get('nodes') or []
+    author = prs[0].get('author') if prs else None
+    return author.get('login') if author else None
+
+def _repo_key(repo_names: Optional[List[str]]) -> Optional[Tuple[str, ...]]:
+    return tuple(sorted(set(repo_names))) if repo_names else None
+
+def _utc(ts: datetime) -> datetime:
+    """Treat naive timestamps as UTC so they compare with PyGithub's aware ones."""
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+def _drain(items: Iterable[T]) -> Iterator[T]:
+    """Iterate a PaginatedList without keeping the pages already consumed.
+    
+    PaginatedList caches every element it has fetched, which would keep a whole
+    repository's PyGithub objects alive until the listing ends.
+    """
+    clear = getattr(items, '_clear', None)
+    for item in items:
+        yield item
+        if clear is not None:
+            clear()
+
+def _week(timestamp: int) -> date:
+    return datetime.fromtimestamp(timestamp, timezone.utc).date()
+
+def _churn_records(repo: str, code_frequency: Optional[List], contributors: List[Dict[str, Any]]) -> Tuple[ChurnRecord, ...]:
+    """Convert a repository's ``/stats/code_frequency`` and ``/stats/contributors`` to churn records.
+    
+    Weeks without changes are left out. Without ``code_frequency``, e.g. for
+    repositories with 10,000 commits or more, the repository totals are the
+    sums over its contributors.
+    """
+    repo = sys.intern(repo)
+    records = []
+    commits: Dict[int, int] = {}
+    summed: Dict[int, List[int]] = {}
+    for contributor in contributors:
+        author = (contributor.get('author') or {}).get('login')
+        for week in contributor['weeks']:
+            if not (week['a'] or week['d'] or week['c']):
+                continue
+            commits[week['w']] = commits.get(week['w'], 0) + week['c']
+            totals = summed.setdefault(week['w'], [0, 0])
+            totals[0] += week['a']
+            totals[1] += week['d']
+            if author:
+                records.append(ChurnRecord(repo, sys.intern(author), _week(week['w']), week['a'], week['d'], week['c']))
+    
+    if code_frequency is not None:
+        # Deletions are reported as negative numbers
+        summed = {timestamp: [additions, -deletions] for timestamp, additions, deletions in code_frequency}
+    for timestamp, (additions, deletions) in summed.items():
+        if additions or deletions or commits.get(timestamp):
+            records.append(ChurnRecord(repo, None, _week(timestamp), additions, deletions, commits.get(timestamp, 0)))
+    return tuple(records)
 
 class GitHubService:
     """Service for interacting with GitHub API to fetch team velocity metrics."""
     
-    def __init__(self, token: Optional[str] = None, org_name: Optional[str] = None):
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        org_name: Optional[str] = None,
+        cache: Optional["ResultCache"] = None,
+        results_cache: Optional["ResultCache"] = None,
+        all_branches: Optional[bool] = None,
+        identities: Optional[IdentityIndex] = None
+    ):
         """Initialize GitHub service with authentication.
         
         Args:
             token: GitHub personal access token. If not provided, will use GITHUB_TOKEN from env.
             org_name: GitHub organization name. If not provided, will use GITHUB_ORG from env.
+            cache: Cache for review timelines and code churn statistics, which
+                are kept until their PR or repository changes, e.g. shared
+                between replicas. If None, every call fetches from GitHub.
+            results_cache: Cache for team velocity results. If not provided, uses ``cache``.
+            all_branches: Count commits on every branch rather than only the
+                default branch. If not provided, uses GITHUB_ALL_BRANCHES.
+            identities: Index resolving commit authors to canonical logins.
+                If not provided, uses the one saved at IDENTITY_INDEX_PATH.
         """
         self.token = token or os.getenv('GITHUB_TOKEN')
         self.org_name = org_name or os.getenv('GITHUB_ORG')
+        self.cache = cache
+        self.results_cache = cache if results_cache is None else results_cache
+        self.all_branches = settings.GITHUB_ALL_BRANCHES if all_branches is None else all_branches
+        self.ledgers = LedgerStore() if self.all_branches else None
+        self.identities = identities if identities is not None else IdentityIndex()
+        self._members_lock = threading.Lock()
         
         if not self.token:
             raise ValueError("GitHub token is required. Set GITHUB_TOKEN environment variable.")
@@ -29,25 +180,418 @@ class GitHubService:
         if not self.org_name:
             raise ValueError("GitHub organization name is required. Set GITHUB_ORG environment variable.")
         
-        # Initialize GitHub client
-        self.github = Github(self.token)
+        # Initialize GitHub client on the shared, pooled HTTP session. PyGithub's
+        # own throttle (0.25 s between requests, 1 s between writes, GraphQL
+        # queries included) would serialize the concurrent listers, so rate
+        # limits are left to GithubRetry and ``limit_rate``.
+        use_shared_session_for_github()
+        self.github = Github(
+            self.token,
+            per_page=100,
+            timeout=settings.HTTP_TIMEOUT,
+            seconds_between_requests=None,
+            seconds_between_writes=None,
+        )
         self.org = self.github.get_organization(self.org_name)
     
+    def _cached(self, key: Hashable, compute: Callable[[], T], timeout: Optional[float] = None) -> T:
+        """Serve ``compute()`` from the result cache, if one is configured.
+        
+        Partial results are only kept for PARTIAL_RESULT_TTL, and calls
+        without a time budget, which wait for every repository, recompute them.
+        """
+        if self.results_cache is None:
+            return compute()
+        key = ('github', self.org_name, self.all_branches, *key)
+        missing = object()
+        value = self.results_cache.get(key, missing)
+        if value is missing or (timeout is None and is_partial(value)):
+            value = compute()
+            self.results_cache.set(key, value, partial_ttl(value))
+        return value
+    
+    def _collect(
+        self,
+        repos: List[Repository],
+        listers: Dict[str, Callable[[Repository], Iterable[T]]],
+        timeout: Optional[float],
+        completeness: Completeness
+    ) -> Iterator[T]:
+        """List each kind of record from every repository concurrently, within ``timeout`` seconds."""
+        return collect(
+            {(repo.name, kind): partial(lister, repo) for repo in repos for kind, lister in listers.items()},
+            timeout,
+            completeness,
+        )
+    
+    def _list_prs(self, since: datetime, reviews: bool = False) -> Callable[[Repository], Iterator]:
+        if reviews:
+            return lambda repo: self._iter_reviewed_prs(repo, since)
+        return lambda repo: self._iter_prs([repo], since)
+    
+    def _list_commits(self, since: datetime) -> Callable[[Repository], Iterator[CommitRecord]]:
+        return lambda repo: self._iter_commits([repo], since)
+    
+    def _get_repos(self, repo_names: Optional[List[str]] = None, lazy: bool = False) -> List[Repository]:
+        """Resolve repository names, or list every repository in the org.
+        
+        With ``lazy``, named repositories are not fetched, which saves a request
+        per repository when only their PRs and commits are listed.
+        """
+        if not repo_names:
+            return list(self.org.get_repos())
+        if lazy:
+            client = self.github.withLazy(True)
+            return [client.get_repo(f"{self.org_name}/{repo_name}") for repo_name in repo_names]
+        
+        repos = []
+        for repo_name in repo_names:
+            try:
+                repos.append(self.org.get_repo(repo_name))
+            except Exception as e:
+                print(f"Error accessing repository {repo_name}: {e}")
+        return repos
+    
+    def _iter_prs(self, repos: List[Repository], since: datetime) -> Iterator[PRRecord]:
+        """Yield a record for every PR created since ``since``.
+        
+        PRs are listed newest first, so listing stops at the first older PR
+        instead of paging through the repository's whole history.
+        """
+        for repo in repos:
+            prs = repo.get_pulls(state='all', sort='created', direction='desc')
+            for pr in _drain(prs):
+                if _utc(pr.created_at) < since:
+                    break
+                yield PRRecord.from_github(repo.name, pr, self.identities.canonical(pr.user.login))
+    
+    def _iter_reviewed_prs(self, repo: Repository, since: datetime) -> Iterator:
+        """Yield a record for every PR created since ``since``, each batch followed by its review timelines.
+        
+        The repository's timelines are cached once, when the listing ends or
+        is stopped, and only if any were read.
+        """
+        cached = self.cache.get(self._reviews_key(repo.name), {}) if self.cache is not None else {}
+        known = dict(cached)
+        batch = []
+        try:
+            for pr in self._iter_prs([repo], since):
+                batch.append(pr)
+                if len(batch) == REVIEW_BATCH_SIZE:
+                    yield from batch
+                    yield from self._review_timelines(repo.name, batch, known)
+                    batch = []
+            if batch:
+                yield from batch
+                yield from self._review_timelines(repo.name, batch, known)
+        finally:
+            if self.cache is not None and known != cached:
+                retention = timedelta(days=settings.REVIEW_RETENTION_DAYS)
+                oldest = datetime.now(timezone.utc) - retention
+                known = {number: timeline for number, timeline in known.items() if _utc(timeline.created_at) >= oldest}
+                self.cache.set(self._reviews_key(repo.name), known, retention.total_seconds())
+    
+    def _review_timelines(
+        self,
+        repo_name: str,
+        prs: List[PRRecord],
+        known: Dict[int, ReviewTimeline]
+    ) -> List[ReviewTimeline]:
+        """Get the review timelines of PRs of one repository with at most one GraphQL query.
+        
+        Listing reviews through the REST API takes a request per PR. Instead,
+        the reviews of a whole batch are read in one query. ``known`` holds
+        the repository's cached timelines by PR number; a timeline is reused
+        while its PR's ``updated_at`` is unchanged, so only new and updated
+        PRs are queried. New timelines are added to ``known``.
+        If the query fails, the queried PRs are left without timelines.
+        """
+        missing = [pr for pr in prs if pr.number not in known or known[pr.number].updated_at != pr.updated_at]
+        if missing:
+            try:
+                _, data = self.github.requester.graphql_query(
+                    _reviews_query(pr.number for pr in missing), {'owner': self.org_name, 'name': repo_name}
+                )
+            except GithubException as e:
+                logger.warning(f"Cannot read the reviews of {len(missing)} PRs of {repo_name}: {e}")
+                stale = {pr.number for pr in missing}
+                return [known[pr.number] for pr in prs if pr.number in known and pr.number not in stale]
+            nodes = data['data']['repository']
+            for pr in missing:
+                if nodes.get(f"pr{pr.number}") is not None:
+                    known[pr.number] = ReviewTimeline.from_graphql(pr, nodes[f"pr{pr.number}"])
+        return [known[pr.number] for pr in prs if pr.number in known]
+    
+    def _reviews_key(self, repo_name: str) -> Tuple:
+        return ('github', self.org_name, 'review_timelines', repo_name)
+    
+    def _iter_pr_slice(self, repo: Repository, start: datetime, end: datetime) -> Iterator[PRRecord]:
+        """Yield a record for every PR created from ``start`` up to (not including) ``end``.
+        
+        Rather than paging through every newer PR, the first page with a PR
+        created before ``end`` is found by probing exponentially further
+        pages and then bisecting, so a slice deep in a repository's history
+        costs a few extra pages instead of all pages of newer PRs.
+        """
+        prs = repo.get_pulls(state='all', sort='created', direction='desc')
+        pages: Dict[int, list] = {}
+        
+        def page(i: int) -> list:
+            if i not in pages:
+                pages[i] = list(prs.get_page(i))
+            return pages[i]
+        
+        def reaches_end(i: int) -> bool:
+            # Past the last page, or its oldest PR was created before ``end``
+            return not page(i) or _utc(page(i)[-1].created_at) < end
+        
+        low, high = 0, 0
+        while not reaches_end(high):
+            low, high = high + 1, 2 * high + 1
+        while low < high:
+            middle = (low + high) // 2
+            if reaches_end(middle):
+                high = middle
+            else:
+                low = middle + 1
+        
+        i = low
+        while page(i):
+            for pr in pages.pop(i):
+                created_at = _utc(pr.created_at)
+                if created_at < start:
+                    return
+                if created_at < end:
+                    yield PRRecord.from_github(repo.name, pr, self.identities.canonical(pr.user.login))
+            i += 1
+    
+    def _iter_commits(
+        self,
+        repos: List[Repository],
+        since: datetime,
+        until: Optional[datetime] = None
+    ) -> Iterator[CommitRecord]:
+        """Yield a record for every commit since ``since`` (and before ``until``) whose author resolves to a login.
+        
+        Only the default branch is listed, unless ``all_branches`` is set.
+        Commits up to now are then read from the branch ledger. Slices that
+        end at ``until``, e.g. of the backfill, may reach back further than
+        the ledger keeps, so their branches are listed directly instead.
+        """
+        for repo in repos:
+            if self.all_branches and until is None:
+                yield from self._sync_branches(repo, since).records(since)
+                continue
+            if self.all_branches:
+                commits = self._iter_branch_commits(repo, since, until)
+            elif until is None:
+                commits = _drain(repo.get_commits(since=since))
+            else:
+                commits = _drain(repo.get_commits(since=since, until=until))
+            if until is not None:
+                # GitHub's ``until`` is inclusive; slices must not share a boundary commit
+                commits = (commit for commit in commits if _utc(commit.commit.author.date) < until)
+            for commit, login in self._resolve_authors(repo.name, commits):
+                yield CommitRecord.from_github(repo.name, commit, login)
+    
+    def _iter_branch_commits(self, repo: Repository, since: datetime, until: datetime) -> Iterator:
+        """Yield every commit from ``since`` up to ``until`` on any branch, once, without the branch ledger."""
+        seen: Set[str] = set()
+        for branch in _drain(repo.get_branches()):
+            for commit in _drain(repo.get_commits(sha=branch.commit.sha, since=since, until=until)):
+                if commit.sha not in seen:
+                    seen.add(commit.sha)
+                    yield commit
+    
+    def _resolve_authors(self, repo_name: str, commits: Iterable) -> Iterator[Tuple[Any, str]]:
+        """Yield each commit with the canonical login of its author, leaving out authors that stay unknown.
+        
+        A commit with a GitHub author teaches the identity index its email
+        and name. Any other commit is resolved by the index; the first such
+        commit also has the org's members read into it, at most once per
+        IDENTITY_REFRESH_DAYS. Commits whose email the index has never seen
+        are held back and looked up IDENTITY_LOOKUP_BATCH emails at a time.
+        """
+        identities = self.identities
+        held: Dict[str, List] = {}
+        held_commits = 0
+        for commit in commits:
+            signature = commit.commit.author
+            if commit.author:
+                yield commit, identities.learn(signature.email, signature.name, commit.author.login)
+                continue
+            login = identities.resolve(signature.email, signature.name)
+            if login is None and identities.members_stale(self.org_name):
+                self._index_members()
+                login = identities.resolve(signature.email, signature.name)
+            if login is not None:
+                yield commit, login
+            elif identities.needs_lookup(signature.email):
+                held.setdefault(email_key(signature.email), []).append(commit)
+                held_commits += 1
+                if len(held) == settings.IDENTITY_LOOKUP_BATCH or held_commits == MAX_HELD_COMMITS:
+                    yield from self._look_up_authors(repo_name, held)
+                    held, held_commits = {}, 0
+        if held:
+            yield from self._look_up_authors(repo_name, held)
+        identities.flush()
+    
+    def _look_up_authors(self, repo_name: str, held: Dict[str, List]) -> Iterator[Tuple[Any, str]]:
+        """Resolve held commits by email with one GraphQL query.
+        
+        An email is taken to belong to the author of the PR that introduced
+        one of its commits. Emails without such a PR are recorded as misses.
+        """
+        emails = list(held)
+        try:
+            _, data = self.github.requester.graphql_query(
+                _authors_query(held[email][0].sha for email in emails), {'owner': self.org_name, 'name': repo_name}
+            )
+            nodes = data['data']['repository'] or {}
+        except GithubException as e:
+            logger.warning(f"Cannot look up {len(emails)} commit authors of {repo_name}: {e}")
+            return
+        resolved = self.identities.record_lookups({email: _pr_author(nodes.get(f"c{i}")) for i, email in enumerate(emails)})
+        self.identities.flush(force=True)
+        for email, login in resolved.items():
+            for commit in held[email]:
+                yield commit, login
+    
+    def _index_members(self) -> None:
+        """Read the public email and profile name of every org member into the identity index.
+        
+        A failed listing keeps the members read so far, and the listing is
+        retried after IDENTITY_REFRESH_DAYS like a successful one.
+        """
+        with self._members_lock:
+            if not self.identities.members_stale(self.org_name):
+                return
+            members, after = [], None
+            try:
+                while True:
+                    _, data = self.github.requester.graphql_query(_MEMBERS_QUERY, {'org': self.org_name, 'after': after})
+                    page = data['data']['organization']['membersWithRole']
+                    members.extend(page['nodes'])
+                    if not page['pageInfo']['hasNextPage']:
+                        break
+                    after = page['pageInfo']['endCursor']
+            except GithubException as e:
+                logger.warning(f"Cannot list the members of {self.org_name}: {e}")
+            self.identities.add_members(self.org_name, members)
+    
+    def _sync_branches(self, repo: Repository, since: datetime) -> CommitLedger:
+        """Add the commits since ``since`` of every branch whose head moved to the repo's ledger.
+        
+        A moved branch is compared with its previous head, which lists only
+        the commits pushed since. New branches, branches whose previous head
+        is gone (e.g. after a force push) and every branch when ``since`` is
+        earlier than the ledger covers are listed back to ``since`` instead.
+        Commits already in the ledger, e.g. from another branch, are skipped.
+        """
+        with self.ledgers.lock(self.org_name, repo.name):
+            ledger = self.ledgers.load(self.org_name, repo.name)
+            full = ledger.covered_since is None or since < ledger.covered_since
+            heads = {branch.name: branch.commit.sha for branch in _drain(repo.get_branches())}
+            
+            for name, head in heads.items():
+                previous = None if full else ledger.heads.get(name)
+                if previous == head:
+                    continue
+                if previous is not None:
+                    try:
+                        self._add_commits(ledger, repo.name, repo.compare(previous, head).commits, since)
+                        continue
+                    except GithubException as e:
+                        logger.info(f"Relisting {repo.name}@{name}: cannot compare with {previous[:7]}: {e}")
+                self._add_commits(ledger, repo.name, repo.get_commits(sha=head, since=since), since)
+            
+            ledger.heads = heads
+            if full:
+                ledger.covered_since = since
+            ledger.prune(datetime.now(timezone.utc) - timedelta(days=settings.BRANCH_LEDGER_RETENTION_DAYS))
+            self.ledgers.save(self.org_name, ledger)
+        return ledger
+    
+    def _add_commits(self, ledger: CommitLedger, repo_name: str, commits: Iterable, since: datetime) -> None:
+        """Add the commits made since ``since`` whose author resolves to a login to a ledger."""
+        recent = (commit for commit in _drain(commits) if _utc(commit.commit.author.date) >= since)
+        for commit, login in self._resolve_authors(repo_name, recent):
+            ledger.add(commit.sha, login, commit.commit.author.date)
+    
+    def _repo_stats(self, repo: Repository, endpoint: str) -> Optional[List]:
+        """Request one of a repository's ``/stats`` endpoints, or None while GitHub computes it.
+        
+        GitHub answers 202 with an empty object until the statistics are
+        ready; an empty repository has none, which is an empty list here.
+        """
+        _, data = self.github.requester.requestJsonAndCheck("GET", f"{repo.url}/stats/{endpoint}")
+        if isinstance(data, dict):
+            return None
+        return data or []
+    
+    def _churn_fetcher(self, repo: Repository) -> Callable[[], Optional[Tuple[ChurnRecord, ...]]]:
+        """Make a function returning a repository's churn records, or None while GitHub computes them.
+        
+        The records are cached until the repository's ``pushed_at`` changes,
+        since nothing else changes the statistics.
+        """
+        key = ('github', self.org_name, 'code_churn', repo.name)
+        # Endpoint -> its statistics, once GitHub has computed them
+        ready: Dict[str, Optional[List]] = {}
+        
+        def fetch() -> Optional[Tuple[ChurnRecord, ...]]:
+            if not ready and self.cache is not None:
+                cached = self.cache.get(key)
+                if cached is not None and cached[0] == repo.pushed_at:
+                    return cached[1]
+            for endpoint in ('code_frequency', 'contributors'):
+                if endpoint in ready:
+                    continue
+                try:
+                    data = self._repo_stats(repo, endpoint)
+                except GithubException as e:
+                    # Code frequency is not available for repositories with 10,000 commits or more
+                    if endpoint != 'code_frequency' or e.status != 422:
+                        raise
+                    ready[endpoint] = None
+                    continue
+                if data is not None:
+                    ready[endpoint] = data
+            if len(ready) < 2:
+                return None
+            
+            records = _churn_records(repo.name, ready['code_frequency'], ready['contributors'])
+            if self.cache is not None:
+                self.cache.set(key, (repo.pushed_at, records), settings.STATS_CACHE_TTL)
+            return records
+        
+        return fetch
+    
+    @instrumented("github")
     def get_pr_metrics(
         self, 
         days: int = 30,
-        repo_names: Optional[List[str]] = None
+        repo_names: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        reviews: bool = False
     ) -> Dict:
         """Get PR metrics for the specified repositories.
         
+        With ``reviews``, the metrics also cover time to first review, review
+        rounds and time from approval to merge. These take one GraphQL query
+        per page of PRs that are new or were updated since they were cached.
+        
         Args:
             days: Number of days to look back for PRs
             repo_names: List of repository names to include. If None, includes all repos in the org.
+            timeout: Seconds to wait for GitHub. If None, waits for every repository.
+            reviews: Include the review metrics
             
         Returns:
-            Dictionary containing PR metrics
+            Dictionary containing PR metrics, with the repositories they cover
+            under 'completeness'
         """
-        since = datetime.now() - timedelta(days=days)
+        since = datetime.now(timezone.utc) - timedelta(days=days)
         pr_metrics = {
             'total_prs': 0,
             'merged_prs': 0,
@@ -57,73 +601,84 @@ class GitHubService:
             'prs_by_author': {},
             'prs_by_repo': {}
         }
-        
-        # Get repositories to analyze
-        repos = []
-        if repo_names:
-            for repo_name in repo_names:
-                try:
-                    repo = self.org.get_repo(repo_name)
-                    repos.append(repo)
-                except Exception as e:
-                    print(f"Error accessing repository {repo_name}: {e}")
-        else:
-            repos = list(self.org.get_repos())
+        if reviews:
+            pr_metrics.update({
+                'reviewed_prs': 0,
+                'avg_time_to_first_review_hours': 0,
+                'avg_review_rounds': 0,
+                'avg_approval_to_merge_hours': 0,
+            })
+        first_review_hours, review_rounds, approval_to_merge_hours = [], [], []
         
         # Process PRs for each repository
-        for repo in repos:
-            repo_name = repo.name
-            prs = repo.get_pulls(state='all', sort='created', direction='desc')
+        completeness = Completeness()
+        listers = {'pulls': self._list_prs(since, reviews=reviews)}
+        for pr in self._collect(self._get_repos(repo_names), listers, timeout, completeness):
+            if isinstance(pr, ReviewTimeline):
+                if pr.rounds:
+                    first_review_hours.append(pr.time_to_first_review_hours)
+                    review_rounds.append(pr.rounds)
+                if pr.approval_to_merge_hours is not None:
+                    approval_to_merge_hours.append(pr.approval_to_merge_hours)
+                continue
             
-            for pr in prs:
-                if pr.created_at < since:
-                    continue
-                    
-                pr_metrics['total_prs'] += 1
-                
-                # Track PR state
-                if pr.state == 'open':
-                    pr_metrics['open_prs'] += 1
-                elif pr.state == 'closed' and pr.merged:
-                    pr_metrics['merged_prs'] += 1
-                
-                # Calculate cycle time for merged PRs
-                if pr.state == 'closed' and pr.merged and pr.created_at and pr.merged_at:
-                    cycle_time = (pr.merged_at - pr.created_at).total_seconds() / 3600  # in hours
-                    pr_metrics['pr_cycle_times'].append(cycle_time)
-                
-                # Track PRs by author
-                author = pr.user.login
-                if author not in pr_metrics['prs_by_author']:
-                    pr_metrics['prs_by_author'][author] = 0
-                pr_metrics['prs_by_author'][author] += 1
-                
-                # Track PRs by repository
-                if repo_name not in pr_metrics['prs_by_repo']:
-                    pr_metrics['prs_by_repo'][repo_name] = 0
-                pr_metrics['prs_by_repo'][repo_name] += 1
+            pr_metrics['total_prs'] += 1
+            
+            # Track PR state
+            if pr.state == 'open':
+                pr_metrics['open_prs'] += 1
+            elif pr.state == 'closed' and pr.merged:
+                pr_metrics['merged_prs'] += 1
+            
+            # Calculate cycle time for merged PRs
+            if pr.state == 'closed' and pr.cycle_time_hours is not None:
+                pr_metrics['pr_cycle_times'].append(pr.cycle_time_hours)
+            
+            # Track PRs by author
+            author = pr.author
+            if author not in pr_metrics['prs_by_author']:
+                pr_metrics['prs_by_author'][author] = 0
+            pr_metrics['prs_by_author'][author] += 1
+            
+            # Track PRs by repository
+            if pr.repo not in pr_metrics['prs_by_repo']:
+                pr_metrics['prs_by_repo'][pr.repo] = 0
+            pr_metrics['prs_by_repo'][pr.repo] += 1
         
         # Calculate average PR cycle time
         if pr_metrics['pr_cycle_times']:
             pr_metrics['avg_pr_cycle_time_hours'] = sum(pr_metrics['pr_cycle_times']) / len(pr_metrics['pr_cycle_times'])
         
+        # Calculate review metrics, over the PRs that were reviewed
+        if review_rounds:
+            pr_metrics['reviewed_prs'] = len(review_rounds)
+            pr_metrics['avg_time_to_first_review_hours'] = sum(first_review_hours) / len(first_review_hours)
+            pr_metrics['avg_review_rounds'] = sum(review_rounds) / len(review_rounds)
+        if approval_to_merge_hours:
+            pr_metrics['avg_approval_to_merge_hours'] = sum(approval_to_merge_hours) / len(approval_to_merge_hours)
+        
+        pr_metrics[COMPLETENESS] = completeness.to_dict()
         return pr_metrics
     
+    @instrumented("github")
     def get_commit_activity(
         self,
         days: int = 30,
-        repo_names: Optional[List[str]] = None
+        repo_names: Optional[List[str]] = None,
+        timeout: Optional[float] = None
     ) -> Dict:
         """Get commit activity metrics.
         
         Args:
             days: Number of days to look back for commits
             repo_names: List of repository names to include. If None, includes all repos in the org.
+            timeout: Seconds to wait for GitHub. If None, waits for every repository.
             
         Returns:
-            Dictionary containing commit metrics
+            Dictionary containing commit metrics, with the repositories they
+            cover under 'completeness'
         """
-        since = datetime.now() - timedelta(days=days)
+        since = datetime.now(timezone.utc) - timedelta(days=days)
         commit_metrics = {
             'total_commits': 0,
             'commits_by_author': {},
@@ -131,81 +686,308 @@ class GitHubService:
             'daily_commits': {},
         }
         
-        # Get repositories to analyze
-        repos = []
-        if repo_names:
-            for repo_name in repo_names:
-                try:
-                    repo = self.org.get_repo(repo_name)
-                    repos.append(repo)
-                except Exception as e:
-                    print(f"Error accessing repository {repo_name}: {e}")
-        else:
-            repos = list(self.org.get_repos())
-        
         # Process commits for each repository
-        for repo in repos:
-            repo_name = repo.name
-            commits = repo.get_commits(since=since)
+        completeness = Completeness()
+        commits = self._collect(
+            self._get_repos(repo_names), {'commits': self._list_commits(since)}, timeout, completeness
+        )
+        for commit in commits:
+            commit_metrics['total_commits'] += 1
             
-            for commit in commits:
-                if not commit.author:
-                    continue
-                    
-                commit_metrics['total_commits'] += 1
-                
-                # Track commits by author
-                author = commit.author.login if commit.author else 'unknown'
-                if author not in commit_metrics['commits_by_author']:
-                    commit_metrics['commits_by_author'][author] = 0
-                commit_metrics['commits_by_author'][author] += 1
-                
-                # Track commits by repository
-                if repo_name not in commit_metrics['commits_by_repo']:
-                    commit_metrics['commits_by_repo'][repo_name] = 0
-                commit_metrics['commits_by_repo'][repo_name] += 1
-                
-                # Track daily commits
-                commit_date = commit.commit.author.date.date()
-                if commit_date not in commit_metrics['daily_commits']:
-                    commit_metrics['daily_commits'][commit_date] = 0
-                commit_metrics['daily_commits'][commit_date] += 1
+            # Track commits by author
+            author = commit.author
+            if author not in commit_metrics['commits_by_author']:
+                commit_metrics['commits_by_author'][author] = 0
+            commit_metrics['commits_by_author'][author] += 1
+            
+            # Track commits by repository
+            if commit.repo not in commit_metrics['commits_by_repo']:
+                commit_metrics['commits_by_repo'][commit.repo] = 0
+            commit_metrics['commits_by_repo'][commit.repo] += 1
+            
+            # Track daily commits
+            commit_date = commit.day
+            if commit_date not in commit_metrics['daily_commits']:
+                commit_metrics['daily_commits'][commit_date] = 0
+            commit_metrics['daily_commits'][commit_date] += 1
         
         # Convert daily_commits to a sorted list of tuples
         commit_metrics['daily_commits'] = sorted(commit_metrics['daily_commits'].items())
         
+        commit_metrics[COMPLETENESS] = completeness.to_dict()
         return commit_metrics
     
+    @instrumented("github")
+    def get_code_churn(
+        self,
+        days: int = 30,
+        repo_names: Optional[List[str]] = None,
+        timeout: Optional[float] = None
+    ) -> Dict:
+        """Get lines added and deleted per repository and author.
+        
+        Counting lines per commit would take a request for every commit.
+        Instead, this reads GitHub's precomputed weekly repository statistics,
+        two requests per repository. GitHub computes them on the first
+        request after a push and answers 202 meanwhile, so repositories are
+        polled until their statistics are ready. Statistics are weekly, so
+        the window is rounded out to whole weeks.
+        
+        Args:
+            days: Number of days to look back
+            repo_names: List of repository names to include. If None, includes all repos in the org.
+            timeout: Seconds to wait for GitHub. If None, waits up to STATS_POLL_MAX_WAIT.
+            
+        Returns:
+            Dictionary containing churn metrics, with the repositories they
+            cover under 'completeness'
+        """
+        since = (datetime.now(timezone.utc) - timedelta(days=days)).date()
+        churn_metrics = {
+            'lines_added': 0,
+            'lines_deleted': 0,
+            'churn_by_repo': {},
+            'churn_by_author': {},
+            'weekly_churn': {},
+        }
+        
+        completeness = Completeness()
+        repos = self._get_repos(repo_names)
+        stats = poll({repo.name: self._churn_fetcher(repo) for repo in repos}, timeout, completeness)
+        for records in stats.values():
+            for record in records:
+                # Skip weeks that ended before the window
+                if record.week + timedelta(days=7) <= since:
+                    continue
+                
+                if record.author is not None:
+                    author = churn_metrics['churn_by_author'].setdefault(
+                        record.author, {'additions': 0, 'deletions': 0, 'commits': 0}
+                    )
+                    author['additions'] += record.additions
+                    author['deletions'] += record.deletions
+                    author['commits'] += record.commits
+                    continue
+                
+                # Repository totals
+                churn_metrics['lines_added'] += record.additions
+                churn_metrics['lines_deleted'] += record.deletions
+                repo = churn_metrics['churn_by_repo'].setdefault(
+                    record.repo, {'additions': 0, 'deletions': 0, 'commits': 0}
+                )
+                repo['additions'] += record.additions
+                repo['deletions'] += record.deletions
+                repo['commits'] += record.commits
+                week = churn_metrics['weekly_churn'].setdefault(record.week, [0, 0])
+                week[0] += record.additions
+                week[1] += record.deletions
+        
+        # Convert weekly_churn to a sorted list of (week, additions, deletions)
+        churn_metrics['weekly_churn'] = [
+            (week, additions, deletions) for week, (additions, deletions) in sorted(churn_metrics['weekly_churn'].items())
+        ]
+        
+        churn_metrics[COMPLETENESS] = completeness.to_dict()
+        return churn_metrics
+    
+    @instrumented("github")
+    @profiled("github.get_team_velocity")
     def get_team_velocity(
         self,
         days: int = 30,
-        repo_names: Optional[List[str]] = None
+        repo_names: Optional[List[str]] = None,
+        timeout: Optional[float] = None
     ) -> Dict:
         """Get team velocity metrics.
         
         Args:
             days: Number of days to look back
             repo_names: List of repository names to include. If None, includes all repos in the org.
+            timeout: Seconds to wait for GitHub, shared by the PR and commit
+                listings. If None, waits for every repository.
             
         Returns:
-            Dictionary containing team velocity metrics
+            Dictionary containing team velocity metrics, with the repositories
+            they cover under 'completeness'
         """
-        pr_metrics = self.get_pr_metrics(days=days, repo_names=repo_names)
-        commit_metrics = self.get_commit_activity(days=days, repo_names=repo_names)
+        def compute() -> Dict:
+            deadline = time.monotonic() + timeout if timeout is not None else None
+            pr_metrics = self.get_pr_metrics(days=days, repo_names=repo_names, timeout=timeout)
+            remaining = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+            commit_metrics = self.get_commit_activity(days=days, repo_names=repo_names, timeout=remaining)
+            
+            # Calculate active contributors (those with commits or PRs)
+            contributors = set()
+            contributors.update(pr_metrics['prs_by_author'].keys())
+            contributors.update(commit_metrics['commits_by_author'].keys())
+            
+            return {
+                'pr_cycle_time_days': pr_metrics.get('avg_pr_cycle_time_hours', 0) / 24,  # Convert to days
+                'daily_commits': commit_metrics.get('total_commits', 0) / days if days > 0 else 0,
+                'active_contributors': len(contributors),
+                'prs_merged': pr_metrics.get('merged_prs', 0),
+                'prs_open': pr_metrics.get('open_prs', 0),
+                'total_commits': commit_metrics.get('total_commits', 0),
+                'prs_by_author': pr_metrics.get('prs_by_author', {}),
+                'commits_by_author': commit_metrics.get('commits_by_author', {}),
+                'daily_commits_data': commit_metrics.get('daily_commits', []),
+                COMPLETENESS: merge_completeness(pr_metrics[COMPLETENESS], commit_metrics[COMPLETENESS]),
+            }
         
-        # Calculate active contributors (those with commits or PRs)
-        contributors = set()
-        contributors.update(pr_metrics['prs_by_author'].keys())
-        contributors.update(commit_metrics['commits_by_author'].keys())
+        return self._cached(('team_velocity', days, _repo_key(repo_names)), compute, timeout)
+    
+    def iter_pr_records(
+        self,
+        since: datetime,
+        repo_names: Optional[List[str]] = None,
+        until: Optional[datetime] = None
+    ) -> Iterator[Dict]:
+        """Yield one flat record per PR created since ``since``, as the PRs are listed.
         
+        Args:
+            since: Earliest creation time to include
+            repo_names: List of repository names to include. If None, includes all repos in the org.
+            until: Creation time before which PRs are included. If None, includes PRs up to now.
+        """
+        repos = self._get_repos(repo_names)
+        if until is None:
+            prs = self._iter_prs(repos, _utc(since))
+        else:
+            prs = (pr for repo in repos for pr in self._iter_pr_slice(repo, _utc(since), _utc(until)))
+        return map(asdict, prs)
+    
+    def iter_commit_records(
+        self,
+        since: datetime,
+        repo_names: Optional[List[str]] = None,
+        until: Optional[datetime] = None
+    ) -> Iterator[Dict]:
+        """Yield one flat record per commit since ``since``, as the commits are listed.
+        
+        Args:
+            since: Earliest commit time to include
+            repo_names: List of repository names to include. If None, includes all repos in the org.
+            until: Commit time before which commits are included. If None, includes commits up to now.
+        """
+        until = _utc(until) if until is not None else None
+        return map(asdict, self._iter_commits(self._get_repos(repo_names), _utc(since), until))
+    
+    @instrumented("github")
+    def get_pr_records(
+        self,
+        since: datetime,
+        repo_names: Optional[List[str]] = None,
+        until: Optional[datetime] = None
+    ) -> List[Dict]:
+        """Get one flat record per PR created since ``since``, for archiving.
+        
+        Args:
+            since: Earliest creation time to include
+            repo_names: List of repository names to include. If None, includes all repos in the org.
+            until: Creation time before which PRs are included. If None, includes PRs up to now.
+        """
+        return list(self.iter_pr_records(since, repo_names, until))
+    
+    @instrumented("github")
+    def get_commit_records(
+        self,
+        since: datetime,
+        repo_names: Optional[List[str]] = None,
+        until: Optional[datetime] = None
+    ) -> List[Dict]:
+        """Get one flat record per commit since ``since``, for archiving.
+        
+        Args:
+            since: Earliest commit time to include
+            repo_names: List of repository names to include. If None, includes all repos in the org.
+            until: Commit time before which commits are included. If None, includes commits up to now.
+        """
+        return list(self.iter_commit_records(since, repo_names, until))
+    
+    @instrumented("github")
+    def get_org_teams(self) -> Dict[str, Dict[str, List[str]]]:
+        """Get the organization's teams with their repositories and members.
+        
+        Returns:
+            Dictionary mapping team name to its 'repos' and 'authors' (member logins)
+        """
         return {
-            'pr_cycle_time_days': pr_metrics.get('avg_pr_cycle_time_hours', 0) / 24,  # Convert to days
-            'daily_commits': commit_metrics.get('total_commits', 0) / days if days > 0 else 0,
-            'active_contributors': len(contributors),
-            'prs_merged': pr_metrics.get('merged_prs', 0),
-            'prs_open': pr_metrics.get('open_prs', 0),
-            'total_commits': commit_metrics.get('total_commits', 0),
-            'prs_by_author': pr_metrics.get('prs_by_author', {}),
-            'commits_by_author': commit_metrics.get('commits_by_author', {}),
-            'daily_commits_data': commit_metrics.get('daily_commits', [])
+            team.name: {
+                'repos': [repo.name for repo in team.get_repos()],
+                'authors': [member.login for member in team.get_members()],
+            }
+            for team in self.org.get_teams()
         }
+    
+    def collect_rollups(
+        self,
+        team_index: TeamIndex,
+        since: datetime,
+        repos: List[Repository],
+        timeout: Optional[float] = None
+    ) -> Tuple[Dict[str, VelocityRollup], Completeness]:
+        """Count the PRs and commits of some repositories for the whole org and every team.
+        
+        The rollups can be merged with those of other repositories, e.g.
+        collected by another process.
+        
+        Args:
+            team_index: Team to repository/author mapping
+            since: Earliest PR creation and commit time to count
+            repos: Repositories to list
+            timeout: Seconds to wait for GitHub. If None, waits for every repository.
+            
+        Returns:
+            Rollup per team name (and ALL_TEAMS), and the repositories they cover
+        """
+        rollups = {name: VelocityRollup() for name in [ALL_TEAMS, *team_index.team_names()]}
+        
+        # PRs and commits arrive interleaved, as each repository's listings progress
+        completeness = Completeness()
+        listers = {'pulls': self._list_prs(since), 'commits': self._list_commits(since)}
+        for record in self._collect(repos, listers, timeout, completeness):
+            if isinstance(record, PRRecord):
+                for name in [ALL_TEAMS, *team_index.teams_for(record.repo, record.author)]:
+                    rollups[name].add_pr(
+                        record.repo, record.author, record.state, record.merged, record.created_at, record.merged_at
+                    )
+                continue
+            day = record.day
+            for name in [ALL_TEAMS, *team_index.teams_for(record.repo, record.author)]:
+                rollups[name].add_commit(record.repo, record.author, day)
+        return rollups, completeness
+    
+    @instrumented("github")
+    @profiled("github.get_team_rollups")
+    def get_team_rollups(
+        self,
+        team_index: TeamIndex,
+        days: int = 30,
+        repo_names: Optional[List[str]] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Dict]:
+        """Get team velocity for the whole org and every team in one pass.
+        
+        Each PR and commit is fetched once and counted towards ``ALL_TEAMS``
+        and towards every team that owns its repository or its author, so
+        switching between teams needs no further API calls.
+        
+        Args:
+            team_index: Team to repository/author mapping
+            days: Number of days to look back
+            repo_names: List of repository names to include. If None, includes all repos in the org.
+            timeout: Seconds to wait for GitHub. If None, waits for every repository.
+            
+        Returns:
+            Dictionary mapping team name (and ALL_TEAMS) to team velocity
+            metrics, each with the repositories they cover under 'completeness'
+        """
+        def compute() -> Dict[str, Dict]:
+            since = datetime.now(timezone.utc) - timedelta(days=days)
+            rollups, completeness = self.collect_rollups(team_index, since, self._get_repos(repo_names), timeout)
+            coverage = completeness.to_dict()
+            return {name: {**rollup.to_velocity(days), COMPLETENESS: coverage} for name, rollup in rollups.items()}
+        
+        return self._cached(
+            ('team_rollups', days, _repo_key(repo_names), team_index.version), compute, timeout
+        )
@@ -0,0 +1,233 @@
+"""Commit author emails and names mapped to canonical GitHub logins.
+
+GitHub only links a commit to an account when its author email is verified
+on that account, so ``commit.author`` is None for commits made with any other
+address, and one person can show up under several logins. Resolving every
+such commit upstream would cost a request per commit. Instead,
+:class:`IdentityIndex` keeps three dictionaries that ingestion consults in
+O(1):
+
+- emails -> login, learned from every linked commit, from the public emails
+  of the org's members and from batched lookups of unseen emails
+- names -> login, learned the same way; a name used by more than one login
+  is ambiguous and never resolves
+- emails that could not be resolved, so they are only looked up again after
+  ``IDENTITY_RETRY_DAYS``
+
+``IDENTITY_ALIASES`` maps a canonical login to the other logins and emails of
+the same person, and every login the index returns is canonical. The index is
+saved as JSON at ``IDENTITY_INDEX_PATH`` and merged with the file on every
+save, so processes and organizations sharing the file add to it rather than
+overwrite each other.
+"""
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import orjson
+
+from app.utils.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_DAY = 24 * 60 * 60
+# Changes learned from linked commits are saved at most this often
+_SAVE_INTERVAL = 60.0
+_NOREPLY = re.compile(r"(?:\d+\+)?(?P<login>[A-Za-z0-9-]+)@users\.noreply\.github\.com", re.IGNORECASE)
+
+
+def email_key(email: Any) -> Optional[str]:
+    """Normalize a commit email for lookups, or None if there is none."""
+    if not isinstance(email, str):
+        return None
+    return email.strip().lower() or None
+
+
+def _name_key(name: Any) -> Optional[str]:
+    if not isinstance(name, str):
+        return None
+    return " ".join(name.split()).casefold() or None
+
+
+class IdentityIndex:
+    """Emails and names of commit authors mapped to canonical logins, persisted to one JSON file."""
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        aliases: Optional[Dict[str, List[str]]] = None
+    ):
+        """Initialize the index from its file, if it has one.
+
+        Args:
+            path: JSON file the index is kept in. If not provided, uses
+                IDENTITY_INDEX_PATH. An empty path keeps the index in memory only.
+            aliases: Canonical login -> other logins and emails of the same
+                person. If not provided, uses IDENTITY_ALIASES.
+        """
+        path = settings.IDENTITY_INDEX_PATH if path is None else path
+        self.path = Path(path) if path else None
+        aliases = settings.IDENTITY_ALIASES if aliases is None else aliases
+        self._aliases: Dict[str, str] = {}
+        self._pinned: Dict[str, str] = {}
+        for login, others in aliases.items():
+            for other in others:
+                if "@" in other:
+                    self._pinned[email_key(other)] = login
+                else:
+                    self._aliases[other.casefold()] = login
+
+        self._emails: Dict[str, str] = {}
+        # Email -> time of the last lookup that did not resolve it
+        self._misses: Dict[str, float] = {}
+        # Name -> login, or None when several logins use the name
+        self._names: Dict[str, Optional[str]] = {}
+        # Organization -> time its members were last read
+        self._members: Dict[str, float] = {}
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+        if self.path is not None:
+            self._merge(self._read())
+
+    def __len__(self) -> int:
+        return len(self._emails)
+
+    def canonical(self, login: str) -> str:
+        """The canonical login of ``login``, per the aliases."""
+        if not self._aliases:
+            return login
+        return self._aliases.get(login.casefold(), login)
+
+    def learn(self, email: Any, name: Any, login: str) -> str:
+        """Record that a linked commit with this email and name belongs to ``login``.
+
+        Returns:
+            The canonical login
+        """
+        login = self.canonical(login)
+        key = email_key(email)
+        if key is not None and self._emails.get(key) != login:
+            self._emails[key] = login
+            self._misses.pop(key, None)
+            self._dirty = True
+        name = _name_key(name)
+        if name is not None:
+            if name not in self._names:
+                self._names[name] = login
+                self._dirty = True
+            elif self._names[name] not in (login, None):
+                self._names[name] = None
+                self._dirty = True
+        return login
+
+    def resolve(self, email: Any, name: Any = None) -> Optional[str]:
+        """The canonical login of a commit author, or None if the index does not know it."""
+        key = email_key(email)
+        if key is not None:
+            login = self._pinned.get(key) or self._emails.get(key)
+            if login is not None:
+                return login
+            noreply = _NOREPLY.fullmatch(email.strip())
+            if noreply:
+                return self.canonical(noreply['login'])
+        name = _name_key(name)
+        return self._names.get(name) if name is not None else None
+
+    def needs_lookup(self, email: Any) -> bool:
+        """Whether an email is unseen, or its last failed lookup is older than IDENTITY_RETRY_DAYS."""
+        key = email_key(email)
+        if key is None or key in self._emails:
+            return False
+        missed = self._misses.get(key)
+        return missed is None or time.time() - missed >= settings.IDENTITY_RETRY_DAYS * _DAY
+
+    def record_lookups(self, found: Dict[str, Optional[str]]) -> Dict[str, str]:
+        """Record the results of looking up emails, None for those that did not resolve.
+
+        Returns:
+            Email -> canonical login, for the emails that resolved
+        """
+        resolved = {}
+        now = time.time()
+        for key, login in found.items():
+            if login:
+                resolved[key] = self._emails[key] = self.canonical(login)
+                self._misses.pop(key, None)
+            else:
+                self._misses[key] = now
+        self._dirty = self._dirty or bool(found)
+        return resolved
+
+    def members_stale(self, org: str) -> bool:
+        """Whether the org's members were last read more than IDENTITY_REFRESH_DAYS ago, or never."""
+        return time.time() - self._members.get(org, 0.0) >= settings.IDENTITY_REFRESH_DAYS * _DAY
+
+    def add_members(self, org: str, members: Iterable[Dict[str, Any]]) -> None:
+        """Learn the public email and profile name of each member, from GraphQL ``User`` nodes."""
+        for member in members:
+            if member and member.get('login'):
+                self.learn(member.get('email'), member.get('name'), member['login'])
+        self._members[org] = time.time()
+        self._dirty = True
+
+    def flush(self, force: bool = False) -> None:
+        """Save the index if it changed, at most every minute unless ``force`` is set."""
+        if self.path is None or not self._dirty:
+            return
+        if not force and time.monotonic() - self._saved_at < _SAVE_INTERVAL:
+            return
+        self.save()
+
+    def save(self) -> None:
+        """Merge the file's entries into the index and atomically replace the file with the result."""
+        if self.path is None:
+            return
+        with self._lock:
+            self._dirty = False
+            self._merge(self._read())
+            data = orjson.dumps({
+                'emails': dict(self._emails),
+                'misses': dict(self._misses),
+                'names': dict(self._names),
+                'members': dict(self._members),
+            })
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+            self._saved_at = time.monotonic()
+
+    def _read(self) -> Dict[str, Dict]:
+        """The file's entries, empty if there is no file or it cannot be read."""
+        try:
+            return orjson.loads(self.path.read_bytes())
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Discarding unreadable identity index {self.path}: {e}")
+            return {}
+
+    def _merge(self, saved: Dict[str, Dict]) -> None:
+        """Add saved entries the index does not have; the index's own entries win."""
+        for key, login in saved.get('emails', {}).items():
+            self._emails.setdefault(key, login)
+        for key, missed in saved.get('misses', {}).items():
+            if key not in self._emails and missed > self._misses.get(key, 0.0):
+                self._misses[key] = missed
+        for name, login in saved.get('names', {}).items():
+            known = self._names.setdefault(name, login)
+            if known != login:
+                self._names[name] = None
+        for org, read_at in saved.get('members', {}).items():
+            self._members[org] = max(read_at, self._members.get(org, 0.0))
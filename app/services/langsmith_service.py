@@ -1,260 +1,346 @@
 import os
-from typing import Dict, List, Optional, Tuple
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
-import pandas as pd
-from dotenv import load_dotenv
 
-# Try to import langsmith, but make it optional
-try:
-    from langsmith import Client
-    LANGCHAIN_AVAILABLE = True
-except ImportError:
-    LANGCHAIN_AVAILABLE = False
-    print("Warning: langsmith package not available. LangSmith features will be disabled.")
+from app.models.records import RunRecord
+from app.services.collection import COMPLETENESS, Completeness, collect, is_partial, partial_ttl
+from app.utils.metrics import instrumented
+from app.utils.profiling import profiled
 
-# Load environment variables
-load_dotenv()
+if TYPE_CHECKING:
+    from app.utils.cache_backends import ResultCache
+
+# langsmith is optional, and importing its client is slow, so only check that
+# it is installed here and import the client when a service is created
+LANGCHAIN_AVAILABLE = find_spec("langsmith") is not None
+Client = None
+
+def _get_client_class():
+    """Import the LangSmith client class on first use."""
+    global Client
+    if Client is None:
+        from langsmith import Client as LangSmithClient
+        Client = LangSmithClient
+    return Client
 
 class LangSmithService:
     """Service for interacting with LangSmith API to track prompt and test coverage."""
     
-    def __init__(self, api_key: Optional[str] = None, project_name: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        project_name: Optional[str] = None,
+        cache: Optional["ResultCache"] = None
+    ):
         """Initialize LangSmith service with API key and project name.
         
         Args:
             api_key: LangSmith API key. If not provided, will use LANGSMITH_API_KEY from env.
             project_name: LangSmith project name. If not provided, will use LANGSMITH_PROJECT from env.
+            cache: Cache for coverage and test results, e.g. shared between replicas.
+                If None, every call fetches from LangSmith.
         """
         if not LANGCHAIN_AVAILABLE:
             raise ImportError("langsmith package is not available. Please install it with 'pip install langsmith'.")
             
         self.api_key = api_key or os.getenv('LANGSMITH_API_KEY')
         self.project_name = project_name or os.getenv('LANGSMITH_PROJECT')
+        self.cache = cache
         
         if not self.api_key:
             raise ValueError("LangSmith API key is required. Set LANGSMITH_API_KEY environment variable.")
             
-        # Initialize LangSmith client
-        self.client = Client(api_key=self.api_key)
+        # Initialize LangSmith client with the shared pool size, retry policy
+        # and transport stats
+        from app.utils.config import settings
+        from app.utils.http import build_retry, create_session, mount_instrumented
+        
+        session = create_session()
+        self.client = _get_client_class()(
+            api_key=self.api_key,
+            session=session,
+            retry_config=build_retry(),
+            timeout_ms=settings.HTTP_TIMEOUT * 1000,
+        )
+        mount_instrumented(session, self.client.api_url)
+    
+    def _cache_get(self, key: Tuple[Hashable, ...], timeout: Optional[float]) -> Any:
+        value = self.cache.get(('langsmith', *key)) if self.cache is not None else None
+        # Calls without a time budget wait for complete results
+        if timeout is None and is_partial(value):
+            return None
+        return value
+    
+    def _cache_set(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        if self.cache is not None:
+            self.cache.set(('langsmith', *key), value, partial_ttl(value))
+    
+    def _collect_runs(
+        self,
+        project_name: str,
+        timeout: Optional[float],
+        completeness: Completeness,
+        **filters: Any
+    ) -> Iterator[RunRecord]:
+        """List a project's runs within ``timeout`` seconds, ending early rather than stalling on a slow page."""
+        def list_runs() -> Iterator[RunRecord]:
+            return map(RunRecord.from_langsmith, self.client.list_runs(project_name=project_name, **filters))
+        
+        kind = filters.get('run_type') or ",".join(filters.get('tags', ())) or 'runs'
+        return collect({(project_name, kind): list_runs}, timeout, completeness)
     
+    @instrumented("langsmith")
+    @profiled("langsmith.get_prompt_coverage")
     def get_prompt_coverage(
         self,
         days: int = 30,
-        project_name: Optional[str] = None
+        project_name: Optional[str] = None,
+        timeout: Optional[float] = None
     ) -> Dict:
         """Get prompt coverage metrics.
         
+        If LangSmith fails or ``timeout`` passes, the metrics cover the runs
+        listed until then and 'completeness' says so.
+        
         Args:
             days: Number of days to look back for prompt runs
             project_name: Name of the LangSmith project. If None, uses the instance project_name.
+            timeout: Seconds to wait for LangSmith. If None, waits for every run.
             
         Returns:
-            Dictionary containing prompt coverage metrics
+            Dictionary containing prompt coverage metrics, with the project
+            they cover under 'completeness'
         """
         project_name = project_name or self.project_name
         if not project_name:
             raise ValueError("Project name is required. Either pass it as an argument or set LANGSMITH_PROJECT environment variable.")
         
+        cache_key = ('prompt_coverage', project_name, days)
+        cached = self._cache_get(cache_key, timeout)
+        if cached is not None:
+            return cached
+        
         # Get all prompt templates in the project
-        try:
-            runs = self.client.list_runs(
-                project_name=project_name,
-                start_time=(datetime.now() - timedelta(days=days)).isoformat(),
-                run_type="llm"
-            )
-            
-            # Process runs to extract prompt templates and their coverage
-            prompt_templates = {}
-            test_runs = []
-            
-            for run in runs:
-                # Track unique prompt templates
-                if hasattr(run, 'prompt') and run.prompt:
-                    prompt_key = str(hash(run.prompt))
-                    if prompt_key not in prompt_templates:
-                        prompt_templates[prompt_key] = {
-                            'template': run.prompt,
-                            'runs': 0,
-                            'success': 0,
-                            'errors': 0,
-                            'tested': False
-                        }
-                    prompt_templates[prompt_key]['runs'] += 1
-                    
-                    # Check for errors
-                    if run.error:
-                        prompt_templates[prompt_key]['errors'] += 1
-                    else:
-                        prompt_templates[prompt_key]['success'] += 1
+        completeness = Completeness()
+        runs = self._collect_runs(
+            project_name,
+            timeout,
+            completeness,
+            start_time=(datetime.now() - timedelta(days=days)).isoformat(),
+            run_type="llm"
+        )
+        
+        # Process runs to extract prompt templates and their coverage
+        prompt_templates = {}
+        
+        for run in runs:
+            # Track unique prompt templates
+            if run.prompt:
+                prompt_key = str(hash(run.prompt))
+                if prompt_key not in prompt_templates:
+                    prompt_templates[prompt_key] = {
+                        'template': run.prompt,
+                        'runs': 0,
+                        'success': 0,
+                        'errors': 0,
+                        'tested': False
+                    }
+                prompt_templates[prompt_key]['runs'] += 1
                 
-                # Check if this is a test run
-                if hasattr(run, 'tags') and 'test' in run.tags:
-                    test_runs.append(run)
-                    # Mark prompt as tested if it has a test run
-                    if hasattr(run, 'prompt'):
-                        prompt_key = str(hash(run.prompt))
-                        if prompt_key in prompt_templates:
-                            prompt_templates[prompt_key]['tested'] = True
-            
-            # Calculate coverage metrics
-            total_prompts = len(prompt_templates)
-            tested_prompts = sum(1 for p in prompt_templates.values() if p['tested'])
-            coverage_percent = (tested_prompts / total_prompts * 100) if total_prompts > 0 else 0
-            
-            # Calculate success rate
-            total_runs = sum(p['runs'] for p in prompt_templates.values())
-            successful_runs = sum(p['success'] for p in prompt_templates.values())
-            success_rate = (successful_runs / total_runs * 100) if total_runs > 0 else 0
-            
-            return {
-                'prompt_coverage': round(coverage_percent, 2),
-                'test_success_rate': round(success_rate, 2),
-                'prompts_tracked': total_prompts,
-                'prompts_tested': tested_prompts,
-                'total_runs': total_runs,
-                'successful_runs': successful_runs,
-                'error_runs': total_runs - successful_runs,
-                'regression_failures': 0,  # This would require comparing against previous test runs
-                'prompt_templates': list(prompt_templates.values())
-            }
+                # Check for errors
+                if run.error:
+                    prompt_templates[prompt_key]['errors'] += 1
+                else:
+                    prompt_templates[prompt_key]['success'] += 1
             
-        except Exception as e:
-            print(f"Error fetching prompt coverage: {e}")
-            # Return mock data in case of error
-            return self._get_mock_coverage_metrics()
+            # Mark prompt as tested if it has a test run
+            if 'test' in run.tags:
+                if run.prompt:
+                    prompt_key = str(hash(run.prompt))
+                    if prompt_key in prompt_templates:
+                        prompt_templates[prompt_key]['tested'] = True
+        
+        # Calculate coverage metrics
+        total_prompts = len(prompt_templates)
+        tested_prompts = sum(1 for p in prompt_templates.values() if p['tested'])
+        coverage_percent = (tested_prompts / total_prompts * 100) if total_prompts > 0 else 0
+        
+        # Calculate success rate
+        total_runs = sum(p['runs'] for p in prompt_templates.values())
+        successful_runs = sum(p['success'] for p in prompt_templates.values())
+        success_rate = (successful_runs / total_runs * 100) if total_runs > 0 else 0
+        
+        coverage = {
+            'prompt_coverage': round(coverage_percent, 2),
+            'test_success_rate': round(success_rate, 2),
+            'prompts_tracked': total_prompts,
+            'prompts_tested': tested_prompts,
+            'total_runs': total_runs,
+            'successful_runs': successful_runs,
+            'error_runs': total_runs - successful_runs,
+            'regression_failures': 0,  # This would require comparing against previous test runs
+            'prompt_templates': list(prompt_templates.values()),
+            COMPLETENESS: completeness.to_dict(),
+        }
+        self._cache_set(cache_key, coverage)
+        return coverage
     
+    @instrumented("langsmith")
+    @profiled("langsmith.get_test_results")
     def get_test_results(
         self,
         days: int = 30,
-        project_name: Optional[str] = None
+        project_name: Optional[str] = None,
+        timeout: Optional[float] = None
     ) -> Dict:
         """Get test execution results and metrics.
         
+        If LangSmith fails or ``timeout`` passes, the results cover the runs
+        listed until then and 'completeness' says so.
+        
         Args:
             days: Number of days to look back for test runs
             project_name: Name of the LangSmith project. If None, uses the instance project_name.
+            timeout: Seconds to wait for LangSmith. If None, waits for every run.
             
         Returns:
-            Dictionary containing test results and metrics
+            Dictionary containing test results and metrics, with the project
+            they cover under 'completeness'
         """
         project_name = project_name or self.project_name
         if not project_name:
             raise ValueError("Project name is required. Either pass it as an argument or set LANGSMITH_PROJECT environment variable.")
         
-        try:
-            # Get test runs
-            test_runs = list(self.client.list_runs(
-                project_name=project_name,
-                start_time=(datetime.now() - timedelta(days=days)).isoformat(),
-                tags=["test"]
-            ))
-            
-            # Process test results
-            results = {
-                'total_tests': len(test_runs),
-                'passed': 0,
-                'failed': 0,
-                'error': 0,
-                'execution_times': [],
-                'failures_by_test_case': {},
-                'test_history': []
-            }
-            
-            for run in test_runs:
-                if run.error:
-                    results['error'] += 1
-                    status = 'error'
-                elif hasattr(run, 'outputs') and run.outputs:
-                    # Check if test passed based on outputs
-                    # This is a simplified check - adjust based on your test output format
-                    if 'evaluation' in run.outputs and 'score' in run.outputs['evaluation']:
-                        if run.outputs['evaluation']['score'] > 0.5:  # Assuming score > 0.5 is a pass
-                            results['passed'] += 1
-                            status = 'passed'
-                        else:
-                            results['failed'] += 1
-                            status = 'failed'
-                    else:
-                        # If no evaluation score, consider it passed
-                        results['passed'] += 1
-                        status = 'passed'
-                else:
-                    # If no outputs, consider it passed
+        cache_key = ('test_results', project_name, days)
+        cached = self._cache_get(cache_key, timeout)
+        if cached is not None:
+            return cached
+        
+        # Get test runs
+        completeness = Completeness()
+        test_runs = list(self._collect_runs(
+            project_name,
+            timeout,
+            completeness,
+            start_time=(datetime.now() - timedelta(days=days)).isoformat(),
+            tags=["test"]
+        ))
+        
+        # Process test results
+        results = {
+            'total_tests': len(test_runs),
+            'passed': 0,
+            'failed': 0,
+            'error': 0,
+            'execution_times': [],
+            'failures_by_test_case': {},
+            'test_history': []
+        }
+        
+        for run in test_runs:
+            if run.error:
+                results['error'] += 1
+                status = 'error'
+            elif run.score is not None:
+                # Check if test passed based on the evaluation score in its outputs
+                # This is a simplified check - adjust based on your test output format
+                if run.score > 0.5:  # Assuming score > 0.5 is a pass
                     results['passed'] += 1
                     status = 'passed'
-                
-                # Track execution time if available
-                if hasattr(run, 'start_time') and hasattr(run, 'end_time'):
-                    exec_time = (run.end_time - run.start_time).total_seconds()
-                    results['execution_times'].append(exec_time)
-                
-                # Track failures by test case
-                test_case = run.name or 'unnamed_test'
-                if status in ['failed', 'error']:
-                    if test_case not in results['failures_by_test_case']:
-                        results['failures_by_test_case'][test_case] = 0
-                    results['failures_by_test_case'][test_case] += 1
-                
-                # Add to test history
-                results['test_history'].append({
-                    'test_case': test_case,
-                    'status': status,
-                    'timestamp': run.start_time.isoformat() if hasattr(run, 'start_time') else None,
-                    'execution_time': exec_time if 'exec_time' in locals() else None,
-                    'run_id': str(run.id)
-                })
-            
-            # Calculate additional metrics
-            results['pass_rate'] = (results['passed'] / results['total_tests'] * 100) if results['total_tests'] > 0 else 0
-            results['avg_execution_time'] = sum(results['execution_times']) / len(results['execution_times']) if results['execution_times'] else 0
+                else:
+                    results['failed'] += 1
+                    status = 'failed'
+            else:
+                # If no evaluation score, consider it passed
+                results['passed'] += 1
+                status = 'passed'
             
-            # Sort test cases by failure count
-            results['failures_by_test_case'] = dict(
-                sorted(
-                    results['failures_by_test_case'].items(),
-                    key=lambda x: x[1],
-                    reverse=True
-                )
-            )
+            # Track execution time if available
+            exec_time = run.latency_seconds
+            if exec_time is not None:
+                results['execution_times'].append(exec_time)
             
-            return results
+            # Track failures by test case
+            test_case = run.name or 'unnamed_test'
+            if status in ['failed', 'error']:
+                if test_case not in results['failures_by_test_case']:
+                    results['failures_by_test_case'][test_case] = 0
+                results['failures_by_test_case'][test_case] += 1
             
-        except Exception as e:
-            print(f"Error fetching test results: {e}")
-            # Return mock data in case of error
-            return self._get_mock_test_results()
+            # Add to test history
+            results['test_history'].append({
+                'test_case': test_case,
+                'status': status,
+                'timestamp': run.start_time.isoformat() if run.start_time else None,
+                'execution_time': exec_time,
+                'run_id': run.run_id
+            })
+        
+        # Calculate additional metrics
+        results['pass_rate'] = (results['passed'] / results['total_tests'] * 100) if results['total_tests'] > 0 else 0
+        results['avg_execution_time'] = sum(results['execution_times']) / len(results['execution_times']) if results['execution_times'] else 0
+        
+        # Sort test cases by failure count
+        results['failures_by_test_case'] = dict(
+            sorted(
+                results['failures_by_test_case'].items(),
+                key=lambda x: x[1],
+                reverse=True
+            )
+        )
+        
+        results[COMPLETENESS] = completeness.to_dict()
+        self._cache_set(cache_key, results)
+        return results
     
-    def _get_mock_coverage_metrics(self) -> Dict:
-        """Return mock prompt coverage metrics for testing."""
-        return {
-            'prompt_coverage': 75.0,
-            'test_success_rate': 92.5,
-            'prompts_tracked': 124,
-            'prompts_tested': 93,
-            'total_runs': 542,
-            'successful_runs': 501,
-            'error_runs': 41,
-            'regression_failures': 3,
-            'prompt_templates': []
-        }
+    def iter_run_records(
+        self,
+        since: datetime,
+        project_name: Optional[str] = None,
+        until: Optional[datetime] = None
+    ) -> Iterator[Dict]:
+        """Yield one flat record per run started since ``since``, as the runs are listed.
+        
+        Args:
+            since: Earliest start time to include
+            project_name: Name of the LangSmith project. If None, uses the instance project_name.
+            until: Start time before which runs are included. If None, includes runs up to now.
+        """
+        project_name = project_name or self.project_name
+        if not project_name:
+            raise ValueError("Project name is required. Either pass it as an argument or set LANGSMITH_PROJECT environment variable.")
+        
+        filters = {'filter': f'lt(start_time, "{until.isoformat()}")'} if until is not None else {}
+        for run in self.client.list_runs(project_name=project_name, start_time=since.isoformat(), **filters):
+            run = RunRecord.from_langsmith(run)
+            yield {
+                'repo': project_name,
+                'run_id': run.run_id,
+                'name': run.name,
+                'run_type': run.run_type,
+                'status': 'error' if run.error else 'success',
+                'tags': list(run.tags),
+                'start_time': run.start_time,
+                'end_time': run.end_time,
+                'latency_seconds': run.latency_seconds,
+            }
     
-    def _get_mock_test_results(self) -> Dict:
-        """Return mock test results for testing."""
-        return {
-            'total_tests': 150,
-            'passed': 138,
-            'failed': 9,
-            'error': 3,
-            'pass_rate': 92.0,
-            'avg_execution_time': 12.5,
-            'execution_times': [10.2, 11.5, 15.8, 12.3],
-            'failures_by_test_case': {
-                'test_sensitive_data_detection': 4,
-                'test_response_quality': 3,
-                'test_prompt_injection': 2
-            },
-            'test_history': [
-                {'test_case': 'test_sensitive_data_detection', 'status': 'failed', 'timestamp': '2023-01-01T10:00:00'},
-                {'test_case': 'test_response_quality', 'status': 'passed', 'timestamp': '2023-01-01T10:05:00'}
-            ]
-        }
+    @instrumented("langsmith")
+    def get_run_records(
+        self,
+        since: datetime,
+        project_name: Optional[str] = None,
+        until: Optional[datetime] = None
+    ) -> List[Dict]:
+        """Get one flat record per run started since ``since``, for archiving.
+        
+        Unlike the metrics methods, errors are raised rather than reported as
+        partial results, so an incomplete listing never ends up in the archive.
+        
+        Args:
+            since: Earliest start time to include
+            project_name: Name of the LangSmith project. If None, uses the instance project_name.
+            until: Start time before which runs are included. If None, includes runs up to now.
+        """
+        return list(self.iter_run_records(since, project_name, until))
@@ -0,0 +1,364 @@
+"""Velocity of several GitHub organizations, collected by a pool of processes.
+
+One :class:`~app.services.github_service.GitHubService` covers one
+organization, and its collection pass aggregates every record on a single
+Python thread, so thousands of repositories are bound by one core and one
+token's rate limit. :class:`ShardedGitHub` lists the repositories of every
+organization in ``GITHUB_ORGS`` and splits them into shards of
+``SHARD_REPOS`` repositories. ``SHARD_WORKERS`` processes collect the shards.
+Each process keeps its own client per organization and token, and the tokens
+in ``GITHUB_TOKENS`` are handed to the shards in turn.
+
+With a time budget, every shard must be running from the start, so the
+repositories are split into at most ``SHARD_WORKERS`` larger shards instead.
+A shard still running at the end of the budget cannot be cancelled. It stops
+listing at the same deadline, and whatever it returns after a short grace
+period is discarded and its repositories are reported as pending.
+
+A shard returns the :class:`~app.services.aggregates.VelocityRollup` of the
+whole organization and of every team for its repositories. Rollups are sums
+and counters, so merging the shards' rollups gives the same numbers as one
+pass over all repositories. The merged results hold a view per
+organization (:func:`org_view`), the combined ``ALL_TEAMS`` view and the
+teams across all organizations, each with the repositories it covers under
+``'completeness'``, named ``org/repo``.
+"""
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar
+
+from app.services.aggregates import VelocityRollup
+from app.services.collection import COMPLETENESS, Completeness, is_partial, merge_completeness, partial_ttl
+from app.services.team_index import ALL_TEAMS, TeamIndex
+from app.utils.config import settings
+from app.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from app.services.github_service import GitHubService
+    from app.utils.cache_backends import ResultCache
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Seconds a shard may take beyond the time budget to hand back what it has
+_RESULT_GRACE = 5.0
+
+
+def org_view(org: str) -> str:
+    """Name of an organization's view in the merged results."""
+    return f"Org: {org}"
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Repositories of one organization, collected by one worker with one token."""
+
+    org: str
+    token: str
+    repos: Tuple[str, ...]
+
+
+@dataclass
+class ShardResult:
+    """Rollups of one shard, by team name (and ALL_TEAMS), and the repositories they cover."""
+
+    org: str
+    rollups: Dict[str, VelocityRollup]
+    completeness: Dict[str, Any]
+
+
+def plan_shards(
+    repos: Dict[str, Sequence[str]],
+    tokens: Sequence[str],
+    size: int,
+    max_shards: Optional[int] = None,
+) -> List[Shard]:
+    """Split every organization's repositories into shards, handing out the tokens in turn.
+
+    Args:
+        repos: Repository names per organization
+        tokens: GitHub tokens to spread over the shards
+        size: Most repositories per shard
+        max_shards: If given, shards grow beyond ``size`` so that there are at
+            most this many, or one per organization if there are more organizations
+    """
+    total = sum(len(names) for names in repos.values())
+    spare = max_shards - sum(1 for names in repos.values() if names) if max_shards else 0
+    shards = []
+    for org, names in repos.items():
+        org_size = size
+        if max_shards and names:
+            # One shard per organization, and the rest shared by their size
+            count = 1 + max(spare, 0) * len(names) // total
+            org_size = max(size, math.ceil(len(names) / count))
+        for start in range(0, len(names), org_size):
+            shards.append(Shard(org, tokens[len(shards) % len(tokens)], tuple(names[start:start + org_size])))
+    return shards
+
+
+# Clients of this worker process, by organization and token
+_services: Dict[Tuple[str, str], "GitHubService"] = {}
+
+
+def _shard_service(org: str, token: str) -> "GitHubService":
+    from app.services.github_service import GitHubService
+
+    service = _services.get((org, token))
+    if service is None:
+        service = _services[(org, token)] = GitHubService(token=token, org_name=org)
+    return service
+
+
+def collect_shard(shard: Shard, team_index: TeamIndex, since: datetime, deadline: Optional[float]) -> ShardResult:
+    """Collect the rollups of one shard; runs in a worker process.
+
+    Args:
+        shard: Repositories to collect
+        team_index: Team to repository/author mapping
+        since: Earliest PR creation and commit time to count
+        deadline: ``time.time()`` after which to stop waiting for GitHub. If None, waits for every repository.
+    """
+    service = _shard_service(shard.org, shard.token)
+    timeout = None if deadline is None else max(0.0, deadline - time.time())
+    rollups, completeness = service.collect_rollups(
+        team_index, since, service._get_repos(list(shard.repos), lazy=True), timeout
+    )
+    return ShardResult(shard.org, rollups, completeness.to_dict())
+
+
+def _qualified(org: str, completeness: Dict[str, Any]) -> Dict[str, Any]:
+    """Prefix the repositories of a shard's completeness with their organization."""
+    return {
+        **completeness,
+        'done': [f"{org}/{repo}" for repo in completeness['done']],
+        'pending': [f"{org}/{repo}" for repo in completeness['pending']],
+        'failed': {f"{org}/{repo}": error for repo, error in completeness['failed'].items()},
+    }
+
+
+def _unfinished(shard: Shard, timeout: Optional[float], error: Optional[str] = None) -> Dict[str, Any]:
+    """Completeness of a shard that failed or did not finish in time."""
+    repos = [f"{shard.org}/{repo}" for repo in shard.repos]
+    if error is not None:
+        return Completeness(failed=dict.fromkeys(repos, error), timeout=timeout).to_dict()
+    return Completeness(pending=repos, timeout=timeout, timed_out=True).to_dict()
+
+
+class ShardedGitHub:
+    """Velocity of several organizations, collected by a process pool."""
+
+    def __init__(
+        self,
+        orgs: Optional[List[str]] = None,
+        tokens: Optional[List[str]] = None,
+        workers: Optional[int] = None,
+        shard_size: Optional[int] = None,
+        cache: Optional["ResultCache"] = None,
+        executor: Optional[Executor] = None,
+    ):
+        """Initialize the collector.
+
+        Args:
+            orgs: GitHub organizations. If not provided, uses GITHUB_ORGS, or else GITHUB_ORG.
+            tokens: Tokens spread over the shards. If not provided, uses GITHUB_TOKENS, or else GITHUB_TOKEN.
+            workers: Processes collecting shards. If not provided, uses SHARD_WORKERS, or one per CPU.
+            shard_size: Most repositories per shard. If not provided, uses SHARD_REPOS.
+            cache: Cache for merged results, e.g. shared between replicas.
+                If None, every call collects from GitHub.
+            executor: Runs :func:`collect_shard`. If not provided, a pool of
+                ``workers`` processes is started on first use.
+        """
+        self.orgs = list(orgs or settings.GITHUB_ORGS or filter(None, [os.getenv('GITHUB_ORG')]))
+        self.tokens = list(tokens or settings.GITHUB_TOKENS or filter(None, [os.getenv('GITHUB_TOKEN')]))
+        self.workers = workers or settings.SHARD_WORKERS or os.cpu_count() or 1
+        self.shard_size = shard_size or settings.SHARD_REPOS
+        self.cache = cache
+        self._executor = executor
+
+        if not self.tokens:
+            raise ValueError("GitHub token is required. Set GITHUB_TOKENS or GITHUB_TOKEN environment variable.")
+
+        if not self.orgs:
+            raise ValueError("GitHub organization names are required. Set GITHUB_ORGS or GITHUB_ORG environment variable.")
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            # Spawned rather than forked: a forked worker would share this
+            # process's pooled HTTP connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _cached(self, key: Hashable, compute: Callable[[], T], timeout: Optional[float] = None) -> T:
+        """Serve ``compute()`` from the result cache, like ``GitHubService._cached``."""
+        if self.cache is None:
+            return compute()
+        key = ('github_shards', tuple(self.orgs), *key)
+        missing = object()
+        value = self.cache.get(key, missing)
+        if value is missing or (timeout is None and is_partial(value)):
+            value = compute()
+            self.cache.set(key, value, partial_ttl(value))
+        return value
+
+    def view_names(self) -> List[str]:
+        """Get the organization views of the merged results."""
+        return [org_view(org) for org in self.orgs]
+
+    def _with_token(self, org: str, call: Callable[["GitHubService"], T]) -> T:
+        """Run ``call`` with a client of ``org``, trying the tokens in turn until one is accepted.
+
+        Each organization starts with a different token, so listing several
+        organizations does not spend one token's rate limit.
+        """
+        from github import GithubException
+
+        first = self.orgs.index(org)
+        for i in range(len(self.tokens)):
+            try:
+                return call(_shard_service(org, self.tokens[(first + i) % len(self.tokens)]))
+            except GithubException as e:
+                if i == len(self.tokens) - 1:
+                    raise
+                logger.warning(f"Token {i + 1} of {len(self.tokens)} cannot read {org}, trying the next: {e}")
+
+    def list_repos(self, repo_names: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Get the repository names of every organization.
+
+        Args:
+            repo_names: Repositories to include, as ``org/repo`` or as a name
+                matched in every organization. If None, includes every repository.
+        """
+        repos = {}
+        for org in self.orgs:
+            names = self._with_token(org, lambda service: [repo.name for repo in service.org.get_repos()])
+            if repo_names:
+                wanted = {name.split("/", 1)[-1] for name in repo_names if "/" not in name or name.startswith(f"{org}/")}
+                names = [name for name in names if name in wanted]
+            repos[org] = names
+        return repos
+
+    def get_org_teams(self) -> Dict[str, Dict[str, List[str]]]:
+        """Get the teams of every organization; teams of the same name are merged."""
+        teams: Dict[str, Dict[str, List[str]]] = {}
+        for org in self.orgs:
+            for name, spec in self._with_token(org, lambda service: service.get_org_teams()).items():
+                merged = teams.setdefault(name, {'repos': [], 'authors': []})
+                merged['repos'] = sorted(set(merged['repos']) | set(spec['repos']))
+                merged['authors'] = sorted(set(merged['authors']) | set(spec['authors']))
+        return teams
+
+    def collect(
+        self,
+        team_index: TeamIndex,
+        since: datetime,
+        repo_names: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> List[ShardResult]:
+        """Collect every shard on the worker processes.
+
+        With a ``timeout``, there are at most as many shards as workers, so
+        none waits in the queue while the budget runs out. A shard that fails,
+        or does not finish within ``timeout`` seconds and a short grace
+        period, is reported as failed or pending rather than raising.
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        shards = plan_shards(
+            self.list_repos(repo_names), self.tokens, self.shard_size, self.workers if timeout is not None else None
+        )
+        executor = self._get_executor()
+        futures = {executor.submit(collect_shard, shard, team_index, since, deadline): shard for shard in shards}
+        wait(futures, timeout=None if deadline is None else max(0.0, deadline - time.time()) + _RESULT_GRACE)
+
+        results = []
+        for future, shard in futures.items():
+            if not future.done():
+                # Only drops a shard that has not started; a running one stops
+                # listing at the deadline and its result is discarded
+                future.cancel()
+                logger.warning(f"Shard of {len(shard.repos)} {shard.org} repositories did not finish in time")
+                results.append(ShardResult(shard.org, {}, _unfinished(shard, timeout)))
+            elif future.exception() is not None:
+                error = str(future.exception()) or type(future.exception()).__name__
+                logger.warning(f"Shard of {len(shard.repos)} {shard.org} repositories failed: {error}")
+                results.append(ShardResult(shard.org, {}, _unfinished(shard, timeout, error)))
+            else:
+                result = future.result()
+                results.append(ShardResult(result.org, result.rollups, _qualified(result.org, result.completeness)))
+        return results
+
+    def get_team_rollups(
+        self,
+        team_index: TeamIndex,
+        days: int = 30,
+        repo_names: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Dict]:
+        """Get velocity for every organization, all of them combined and every team.
+
+        Takes the same arguments as ``GitHubService.get_team_rollups``.
+
+        Returns:
+            Dictionary mapping each organization view, ALL_TEAMS and every
+            team name to team velocity metrics
+        """
+        def compute() -> Dict[str, Dict]:
+            since = datetime.now(timezone.utc) - timedelta(days=days)
+            results = self.collect(team_index, since, repo_names, timeout)
+
+            names = [ALL_TEAMS, *team_index.team_names()]
+            combined = {name: VelocityRollup() for name in names}
+            orgs = {org: VelocityRollup() for org in self.orgs}
+            for result in results:
+                for name, rollup in result.rollups.items():
+                    combined[name].merge(rollup)
+                if ALL_TEAMS in result.rollups:
+                    orgs[result.org].merge(result.rollups[ALL_TEAMS])
+
+            def coverage(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+                return merge_completeness(*parts) if parts else Completeness(timeout=timeout).to_dict()
+
+            views = {
+                org_view(org): {
+                    **rollup.to_velocity(days),
+                    COMPLETENESS: coverage([result.completeness for result in results if result.org == org]),
+                }
+                for org, rollup in orgs.items()
+            }
+            combined_coverage = coverage([result.completeness for result in results])
+            views.update({name: {**rollup.to_velocity(days), COMPLETENESS: combined_coverage} for name, rollup in combined.items()})
+            return views
+
+        return self._cached(
+            ('team_rollups', days, tuple(sorted(set(repo_names))) if repo_names else None, team_index.version),
+            compute,
+            timeout,
+        )
+
+
+@lru_cache(maxsize=None)
+def get_sharded_github() -> Optional[ShardedGitHub]:
+    """Get the shared multi-organization collector, or None if GITHUB_ORGS is not set."""
+    if not settings.GITHUB_ORGS:
+        return None
+    from app.utils.cache_backends import DASHBOARD_SCOPE, get_result_cache
+
+    try:
+        return ShardedGitHub(cache=get_result_cache().scoped(DASHBOARD_SCOPE))
+    except Exception as e:
+        logger.warning(f"Multi-organization collection unavailable: {e}")
+        return None
@@ -0,0 +1,122 @@
+"""Local store for precomputed metric snapshots.
+
+The snapshot worker (``python -m app.worker``) periodically writes the output of
+``GitHubService.get_team_velocity`` and the ``LangSmithService`` collectors for
+the common look-back windows. The dashboard reads the latest snapshot instead
+of waiting on GitHub or LangSmith, and only refreshes it when it is stale.
+"""
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from app.utils.config import settings
+
+# Snapshot kinds and the service method that produces each one
+VELOCITY = "velocity"
+PROMPT_COVERAGE = "prompt_coverage"
+TEST_RESULTS = "test_results"
+SNAPSHOT_KINDS = (VELOCITY, PROMPT_COVERAGE, TEST_RESULTS)
+
+
+@dataclass
+class Snapshot:
+    """A stored metrics payload and the time it was computed."""
+
+    kind: str
+    days: int
+    data: Dict[str, Any]
+    created_at: float
+
+    @property
+    def age_seconds(self) -> float:
+        """Seconds elapsed since the snapshot was computed."""
+        return time.time() - self.created_at
+
+    def is_stale(self, max_age: Optional[int] = None) -> bool:
+        """Check whether the snapshot is older than ``max_age`` seconds."""
+        max_age = settings.SNAPSHOT_MAX_AGE if max_age is None else max_age
+        return self.age_seconds > max_age
+
+
+def _encode(value: Any) -> Any:
+    """JSON ``default`` hook that tags dates so they survive a round trip."""
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, set):
+        return sorted(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    """JSON ``object_hook`` that restores values tagged by :func:`_encode`."""
+    if len(obj) == 1:
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        if "__date__" in obj:
+            return date.fromisoformat(obj["__date__"])
+    return obj
+
+
+class SnapshotStore:
+    """Directory of JSON snapshots, one file per (kind, window)."""
+
+    def __init__(self, directory: Optional[Union[str, Path]] = None):
+        """Initialize the store.
+
+        Args:
+            directory: Where snapshots are kept. If not provided, uses SNAPSHOT_DIR.
+        """
+        self.directory = Path(directory or settings.SNAPSHOT_DIR)
+
+    def _path(self, kind: str, days: int) -> Path:
+        return self.directory / f"{kind}-{days}d.json"
+
+    def read(self, kind: str, days: int) -> Optional[Snapshot]:
+        """Read the latest snapshot for a kind and window.
+
+        Returns:
+            The snapshot, or None if none has been written or it cannot be parsed
+        """
+        try:
+            with open(self._path(kind, days), encoding="utf-8") as f:
+                payload = json.load(f, object_hook=_decode)
+        except (OSError, ValueError):
+            return None
+
+        return Snapshot(
+            kind=kind,
+            days=days,
+            data=payload["data"],
+            created_at=payload["created_at"],
+        )
+
+    def write(self, kind: str, days: int, data: Dict[str, Any]) -> Snapshot:
+        """Atomically replace the snapshot for a kind and window.
+
+        The payload is written to a temporary file in the same directory and
+        renamed into place, so readers never observe a partial file.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        snapshot = Snapshot(kind=kind, days=days, data=data, created_at=time.time())
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"kind": kind, "days": days, "created_at": snapshot.created_at, "data": data},
+                    f,
+                    default=_encode,
+                )
+            os.replace(tmp_path, self._path(kind, days))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        return snapshot
@@ -0,0 +1,141 @@
+"""Team to repository and author mapping.
+
+A :class:`TeamIndex` says which repositories and which authors belong to each
+team. It is built from a JSON file (``TEAMS_CONFIG``) and, when
+``TEAMS_FROM_GITHUB`` is set, from the GitHub organization's teams. Lookups go
+through inverse maps, so attributing a PR or commit to its teams during a
+collection pass is a pair of dictionary lookups.
+
+The config file maps team names to their repositories and authors::
+
+    {
+        "AI Core": {"repos": ["model-serving", "evals"], "authors": ["alice"]},
+        "Platform": {"repos": ["infra"]}
+    }
+"""
+import hashlib
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Optional, Set
+
+from app.utils.config import settings
+from app.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from app.services.github_service import GitHubService
+
+logger = get_logger(__name__)
+
+# Pseudo-team covering the whole organization
+ALL_TEAMS = "All Teams"
+
+
+@dataclass
+class Team:
+    """Repositories and authors owned by one team."""
+
+    name: str
+    repos: Set[str] = field(default_factory=set)
+    authors: Set[str] = field(default_factory=set)
+
+
+class TeamIndex:
+    """Teams with inverse repository and author lookups."""
+
+    def __init__(self, teams: Iterable[Team] = ()):
+        self.teams: Dict[str, Team] = {}
+        self._teams_by_repo: Dict[str, Set[str]] = defaultdict(set)
+        self._teams_by_author: Dict[str, Set[str]] = defaultdict(set)
+        for team in teams:
+            self.add(team)
+
+    def __len__(self) -> int:
+        return len(self.teams)
+
+    def add(self, team: Team) -> None:
+        """Add a team, merging it with an existing team of the same name."""
+        if team.name == ALL_TEAMS:
+            raise ValueError(f"'{ALL_TEAMS}' is reserved")
+
+        existing = self.teams.setdefault(team.name, Team(team.name))
+        existing.repos |= team.repos
+        existing.authors |= team.authors
+        for repo in team.repos:
+            self._teams_by_repo[repo].add(team.name)
+        for author in team.authors:
+            self._teams_by_author[author].add(team.name)
+
+    def team_names(self) -> List[str]:
+        """Get team names in alphabetical order."""
+        return sorted(self.teams)
+
+    def teams_for(self, repo: str, author: Optional[str] = None) -> Set[str]:
+        """Get the teams a PR or commit counts towards.
+
+        Args:
+            repo: Repository the record belongs to
+            author: GitHub login of the record's author
+        """
+        teams = self._teams_by_repo.get(repo, set())
+        if author is not None and author in self._teams_by_author:
+            teams = teams | self._teams_by_author[author]
+        return teams
+
+    @property
+    def version(self) -> str:
+        """Digest of the mapping, so cached results can be keyed by it."""
+        payload = json.dumps(self.to_mapping(), sort_keys=True).encode()
+        return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+    def to_mapping(self) -> Dict[str, Dict[str, List[str]]]:
+        """Convert the index to the config file format."""
+        return {
+            name: {'repos': sorted(team.repos), 'authors': sorted(team.authors)}
+            for name, team in sorted(self.teams.items())
+        }
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping[str, Mapping[str, Iterable[str]]]) -> "TeamIndex":
+        """Build an index from the config file format."""
+        return cls(
+            Team(name, set(spec.get('repos', ())), set(spec.get('authors', ())))
+            for name, spec in mapping.items()
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "TeamIndex":
+        """Build an index from a JSON config file."""
+        with open(path, encoding="utf-8") as f:
+            return cls.from_mapping(json.load(f))
+
+
+def load_team_index(github_service: Optional["GitHubService"] = None) -> TeamIndex:
+    """Build the team index from the configured sources.
+
+    A missing or unreadable config file and a failing GitHub lookup are
+    logged and skipped, so the dashboard always gets at least an empty index.
+
+    Args:
+        github_service: Used to read the organization's teams when
+            ``TEAMS_FROM_GITHUB`` is set
+    """
+    index = TeamIndex()
+
+    if settings.TEAMS_FROM_GITHUB and github_service is not None:
+        try:
+            for name, spec in github_service.get_org_teams().items():
+                index.add(Team(name, set(spec['repos']), set(spec['authors'])))
+        except Exception as e:
+            logger.warning(f"Could not read teams from GitHub: {e}")
+
+    if settings.TEAMS_CONFIG:
+        path = Path(settings.TEAMS_CONFIG)
+        try:
+            for team in TeamIndex.from_file(path).teams.values():
+                index.add(team)
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Could not read team config {path}: {e}")
+
+    return index
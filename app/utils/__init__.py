@@ -1,7 +1,9 @@
 """Utility modules for the AI Velocity Dashboard."""
 
 from .config import settings, get_settings, is_production, is_development, is_testing
-from .logger import get_logger, logger, setup_logging
+from .logger import get_logger, logger, setup_logging, shutdown_logging
+from .cache import SharedCache, get_shared_cache
+from .cache_backends import CacheBackend, MemoryBackend, RedisBackend, ResultCache, get_result_cache
 
 __all__ = [
     'settings',
@@ -12,4 +14,12 @@ __all__ = [
     'get_logger',
     'logger',
     'setup_logging',
+    'shutdown_logging',
+    'SharedCache',
+    'get_shared_cache',
+    'CacheBackend',
+    'MemoryBackend',
+    'RedisBackend',
+    'ResultCache',
+    'get_result_cache',
 ]
@@ -0,0 +1,283 @@
+"""Process-wide result cache with single-flight deduplication.
+
+Every Streamlit session in a process shares the same module globals, so a
+single :class:`SharedCache` instance can serve all of them. When several
+sessions ask for the same key at once, only the first one runs the
+computation; the others wait for its result instead of repeating the same
+GitHub or LangSmith fetch.
+
+Cached values are shared between callers and must be treated as read-only.
+"""
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, TypeVar, Union
+
+from app.utils.config import settings
+from app.utils.metrics import CACHE_REQUESTS
+
+T = TypeVar("T")
+
+
+@dataclass
+class KeyStats:
+    """Hit/miss/wait counters for a single cache key."""
+
+    hits: int = 0
+    misses: int = 0
+    waits: int = 0
+    errors: int = 0
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    expires_at: Optional[float]
+
+
+class _Flight:
+    """A computation in progress that other callers can wait on."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        # Set when the key is invalidated mid-flight; the result is then not stored
+        self.stale = False
+
+
+def estimate_size(value: Any) -> int:
+    """Estimate the memory held by a cached value, in bytes."""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class SharedCache:
+    """Bounded LRU cache with TTLs, single-flight loads and per-key metrics."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached values before LRU eviction.
+            max_bytes: Maximum estimated size of all cached values. If None, only
+                ``max_entries`` bounds the cache.
+            default_ttl: Seconds a value stays valid when ``ttl`` is not given.
+                If None, values only leave the cache through eviction or invalidation.
+            clock: Monotonic time source, injectable for tests.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._stats: "OrderedDict[Hashable, KeyStats]" = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        """Estimated size of all cached values, in bytes."""
+        return self._bytes
+
+    def _key_stats(self, key: Hashable) -> KeyStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = KeyStats()
+            # Keep metrics for recently used keys only, so they stay bounded too
+            while len(self._stats) > self.max_entries * 4:
+                self._stats.popitem(last=False)
+        else:
+            self._stats.move_to_end(key)
+        return stats
+
+    def _lookup(self, key: Hashable) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at is not None and entry.expires_at <= self._clock():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _store(self, key: Hashable, value: Any, size: int, ttl: Optional[float]) -> None:
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        expires_at = self._clock() + ttl if ttl is not None else None
+        self._entries[key] = _Entry(value, size, expires_at)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for ``key`` without computing it.
+
+        A found value counts as a hit. A missing value is not counted, because
+        the caller is expected to follow up with :meth:`get_or_compute`.
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return default
+            self._key_stats(key).hits += 1
+            CACHE_REQUESTS.inc(cache="shared", result="hit")
+            return entry.value
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], T],
+        ttl: Union[None, float, Callable[[T], Optional[float]]] = None,
+    ) -> T:
+        """Return the cached value for ``key``, computing it at most once.
+
+        If another thread is already computing ``key``, this call waits for
+        that result instead of starting a duplicate computation. Exceptions
+        are re-raised to every waiting caller and are not cached. A computation
+        that was started before ``key`` was invalidated is not joined, and its
+        result is returned to its callers but not cached.
+
+        Args:
+            key: Hashable cache key
+            compute: Zero-argument function producing the value on a miss
+            ttl: Seconds the value stays valid, or a function of the computed
+                value returning them. If None, uses ``default_ttl``.
+        """
+        with self._lock:
+            stats = self._key_stats(key)
+            entry = self._lookup(key)
+            if entry is not None:
+                stats.hits += 1
+                CACHE_REQUESTS.inc(cache="shared", result="hit")
+                return entry.value
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                stats.misses += 1
+            else:
+                stats.waits += 1
+            CACHE_REQUESTS.inc(cache="shared", result="miss" if leader else "wait")
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._key_stats(key).errors += 1
+            raise
+        else:
+            # Pickling a large value to size it must not hold up other callers
+            size = estimate_size(flight.value)
+            seconds = ttl(flight.value) if callable(ttl) else ttl
+            with self._lock:
+                if not flight.stale:
+                    self._store(key, flight.value, size, self.default_ttl if seconds is None else seconds)
+            return flight.value
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight.done.set()
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Drop cached values, and the results of computations still in progress for them.
+
+        Args:
+            predicate: Called with each key; matching keys are dropped. If None,
+                drops everything.
+
+        Returns:
+            Number of values removed
+        """
+        with self._lock:
+            keys = [k for k in self._entries if predicate is None or predicate(k)]
+            for key in keys:
+                self._remove(key)
+            self._abandon_flights(predicate)
+        return len(keys)
+
+    def _abandon_flights(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> None:
+        """Keep in-flight results for matching keys out of the cache; later callers start new flights."""
+        for key in [k for k in self._inflight if predicate is None or predicate(k)]:
+            self._inflight.pop(key).stale = True
+
+    def clear(self) -> None:
+        """Drop all cached values and metrics."""
+        with self._lock:
+            self._abandon_flights()
+            self._entries.clear()
+            self._stats.clear()
+            self._bytes = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache-wide totals and per-key hit/miss/wait counters."""
+        with self._lock:
+            keys = {key: asdict(s) for key, s in self._stats.items()}
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self._bytes,
+                'evictions': self.evictions,
+                'inflight': len(self._inflight),
+                'hits': sum(s['hits'] for s in keys.values()),
+                'misses': sum(s['misses'] for s in keys.values()),
+                'waits': sum(s['waits'] for s in keys.values()),
+                'keys': keys,
+            }
+
+
+_shared_cache: Optional[SharedCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache() -> SharedCache:
+    """Get the process-wide cache shared by all dashboard sessions."""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = SharedCache(
+                    max_entries=settings.SHARED_CACHE_MAX_ENTRIES,
+                    max_bytes=settings.SHARED_CACHE_MAX_BYTES,
+                    default_ttl=settings.DASHBOARD_CACHE_TTL,
+                )
+    return _shared_cache
@@ -0,0 +1,304 @@
+"""Byte-level cache backends and the result cache used by the services.
+
+:class:`SharedCache` deduplicates work inside one process. To share fetched
+results between dashboard and API replicas, the services can also be given a
+:class:`ResultCache`. It serializes values, compresses large ones, and stores
+them under a versioned key namespace in a :class:`CacheBackend`:
+
+- :class:`MemoryBackend`: bounded in-process LRU, the default
+- :class:`RedisBackend`: shared Redis instance (needs the ``redis`` package)
+
+Bumping ``CACHE_VERSION`` (or :data:`SCHEMA_VERSION` when the shape of cached
+results changes) moves every key to a new namespace, so replicas running
+different code never read each other's entries. :meth:`ResultCache.scoped`
+gives a part of the application its own sub-namespace, so it can clear its
+entries without dropping anyone else's.
+
+Values are pickled, so the Redis instance must only be reachable by trusted
+replicas.
+"""
+import copy
+import hashlib
+import pickle
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from app.utils.config import settings
+from app.utils.logger import get_logger
+from app.utils.metrics import CACHE_REQUESTS
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Bumped whenever the structure of cached service results changes
+SCHEMA_VERSION = 1
+
+# Sub-namespace of the results the dashboard's refresh recomputes
+DASHBOARD_SCOPE = "dashboard"
+
+# First byte of every stored value
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+
+
+class CacheBackend(ABC):
+    """Storage for serialized cache values."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the stored bytes for ``key``, or None if absent or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """Store bytes under ``key``, expiring after ``ttl`` seconds if given."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove ``key`` if present."""
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str) -> int:
+        """Remove every key starting with ``prefix`` and return how many were removed."""
+
+
+class MemoryBackend(CacheBackend):
+    """Bounded in-process LRU backend."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the backend.
+
+        Args:
+            max_entries: Maximum number of stored values before LRU eviction.
+            max_bytes: Maximum total size of stored values. If None, only
+                ``max_entries`` bounds the backend.
+            clock: Monotonic time source, injectable for tests.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _pop(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self._clock():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if self.max_bytes is not None and len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (value, self._clock() + ttl if ttl is not None else None)
+            self._bytes += len(value)
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._pop(next(iter(self._entries)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                self._pop(key)
+        return len(keys)
+
+
+class RedisBackend(CacheBackend):
+    """Backend storing values in Redis, shared by every replica."""
+
+    def __init__(self, client: Any = None, url: Optional[str] = None):
+        """Initialize the backend.
+
+        Args:
+            client: A ``redis.Redis``-compatible client. If not provided, one is
+                created from ``url``.
+            url: Redis URL. If not provided, uses REDIS_URL.
+        """
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError("redis package is not available. Please install it with 'pip install redis'.") from e
+            client = redis.Redis.from_url(url or settings.REDIS_URL)
+        self.client = client
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        # Redis expiry has millisecond resolution; round up so tiny TTLs still expire
+        self.client.set(key, value, px=max(int(ttl * 1000), 1) if ttl is not None else None)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(key)
+
+    def delete_prefix(self, prefix: str) -> int:
+        keys = list(self.client.scan_iter(match=f"{prefix}*", count=500))
+        if keys:
+            self.client.delete(*keys)
+        return len(keys)
+
+
+class ResultCache:
+    """Serializing, compressing cache over a :class:`CacheBackend`."""
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        namespace: str = "ai_velocity",
+        version: int = 1,
+        default_ttl: Optional[float] = None,
+        compress_min_bytes: int = 1024,
+    ):
+        """Initialize the cache.
+
+        Args:
+            backend: Where serialized values are stored
+            namespace: Prefix shared by every key of this application
+            version: Deployment cache version, combined with SCHEMA_VERSION
+            default_ttl: Seconds a value stays valid when ``ttl`` is not given
+            compress_min_bytes: Serialized values at least this large are
+                zlib-compressed
+        """
+        self.backend = backend
+        self.prefix = f"{namespace}:v{version}.{SCHEMA_VERSION}:"
+        self.default_ttl = default_ttl
+        self.compress_min_bytes = compress_min_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: Hashable) -> str:
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return self.prefix + digest
+
+    def _dumps(self, value: Any) -> bytes:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) >= self.compress_min_bytes:
+            return _ZLIB + zlib.compress(data)
+        return _RAW + data
+
+    @staticmethod
+    def _loads(data: bytes) -> Any:
+        header, body = data[:1], data[1:]
+        if header == _ZLIB:
+            body = zlib.decompress(body)
+        elif header != _RAW:
+            raise ValueError(f"Unknown cache value header: {header!r}")
+        return pickle.loads(body)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for ``key``, or ``default``.
+
+        Backend failures and undecodable values are logged and treated as misses.
+        """
+        try:
+            data = self.backend.get(self._key(key))
+            if data is not None:
+                value = self._loads(data)
+                self.hits += 1
+                CACHE_REQUESTS.inc(cache="result", result="hit")
+                return value
+        except Exception as e:
+            logger.warning(f"Cache read failed for {key!r}: {e}")
+        self.misses += 1
+        CACHE_REQUESTS.inc(cache="result", result="miss")
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store ``value`` under ``key``. Backend failures are logged and ignored."""
+        try:
+            self.backend.set(self._key(key), self._dumps(value), self.default_ttl if ttl is None else ttl)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {key!r}: {e}")
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], T], ttl: Optional[float] = None) -> T:
+        """Return the cached value for ``key``, computing and storing it on a miss."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.set(key, value, ttl)
+        return value
+
+    def scoped(self, scope: str) -> "ResultCache":
+        """Get a view of this cache that stores its keys in the sub-namespace ``scope``.
+
+        Clearing the view only drops the values stored through it.
+        """
+        view = copy.copy(self)
+        view.prefix = f"{self.prefix}{scope}:"
+        view.hits = view.misses = 0
+        return view
+
+    def clear(self) -> int:
+        """Drop every value in this namespace and version, including those of its scopes."""
+        return self.backend.delete_prefix(self.prefix)
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit and miss counters."""
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def create_backend(name: Optional[str] = None) -> CacheBackend:
+    """Create the backend named by ``name`` (or CACHE_BACKEND)."""
+    name = (name or settings.CACHE_BACKEND).lower()
+    if name == "memory":
+        return MemoryBackend(
+            max_entries=settings.SHARED_CACHE_MAX_ENTRIES,
+            max_bytes=settings.CACHE_MEMORY_MAX_BYTES,
+        )
+    if name == "redis":
+        return RedisBackend()
+    raise ValueError(f"Unknown cache backend: {name}")
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Get the process-wide result cache configured by the CACHE_* settings."""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache(
+                    create_backend(),
+                    namespace=settings.CACHE_NAMESPACE,
+                    version=settings.CACHE_VERSION,
+                    default_ttl=settings.DASHBOARD_CACHE_TTL,
+                    compress_min_bytes=settings.CACHE_COMPRESS_MIN_BYTES,
+                )
+    return _result_cache
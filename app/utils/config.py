@@ -1,10 +1,8 @@
 import os
-from typing import Optional, Dict, Any
-from pydantic import BaseSettings, validator, PostgresDsn
-from dotenv import load_dotenv
-
-# Load environment variables from .env file if it exists
-load_dotenv()
+from functools import lru_cache
+from typing import Any, Optional
+from pydantic import Field, PostgresDsn, ValidationInfo, field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     """Application settings and configuration."""
@@ -14,11 +12,17 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = "development"
     DEBUG: bool = False
     LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"  # "text" or "json" (one object per line)
+    LOG_BACKUP_COUNT: int = 14  # rotated daily log files to keep
     
     # API settings
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    API_CACHE_TTL: int = 5 * 60  # seconds a computed response is reused
+    API_CACHE_MAX_AGE: int = 60  # Cache-Control max-age sent to clients
+    API_GZIP_MIN_SIZE: int = 1000  # bytes
+    API_MAX_CONCURRENT_FETCHES: int = 4  # distinct upstream fetches at once
     
     # CORS settings
     BACKEND_CORS_ORIGINS: list[str] = ["*"]
@@ -28,16 +32,99 @@ class Settings(BaseSettings):
     POSTGRES_USER: Optional[str] = os.getenv("POSTGRES_USER", "postgres")
     POSTGRES_PASSWORD: Optional[str] = os.getenv("POSTGRES_PASSWORD", "postgres")
     POSTGRES_DB: Optional[str] = os.getenv("POSTGRES_DB", "aivelocity")
-    DATABASE_URI: Optional[PostgresDsn] = None
+    DATABASE_URI: Optional[PostgresDsn] = Field(None, validate_default=True)
     
     # GitHub settings
     GITHUB_TOKEN: Optional[str] = os.getenv("GITHUB_TOKEN")
     GITHUB_ORG: Optional[str] = os.getenv("GITHUB_ORG")
     
+    GITHUB_ALL_BRANCHES: bool = False  # count commits on every branch, not only the default one
+    BRANCH_LEDGER_DIR: str = "data/branches"  # per-repository commit ledgers for GITHUB_ALL_BRANCHES
+    BRANCH_LEDGER_RETENTION_DAYS: int = 365  # commits older than this are dropped from the ledgers
+    REVIEW_RETENTION_DAYS: int = 365  # cached review timelines of PRs created longer ago are dropped
+    STATS_POLL_INTERVAL: float = 1.0  # seconds before re-requesting statistics GitHub is still computing, doubled every round
+    STATS_POLL_MAX_WAIT: float = 120.0  # seconds to wait for statistics when a call has no time budget
+    STATS_CACHE_TTL: int = 7 * 24 * 60 * 60  # seconds repository statistics stay cached while nothing is pushed
+    GITHUB_ORGS: list[str] = []  # organizations whose velocity is collected side by side; empty: only GITHUB_ORG
+    GITHUB_TOKENS: list[str] = []  # tokens spread over the shards of GITHUB_ORGS; empty: only GITHUB_TOKEN
+    SHARD_WORKERS: int = 0  # processes collecting GITHUB_ORGS; 0: one per CPU
+    SHARD_REPOS: int = 50  # repositories per shard
+    IDENTITY_INDEX_PATH: str = "data/identities.json"  # commit author emails and names -> logins; empty: not saved
+    IDENTITY_ALIASES: dict[str, list[str]] = {}  # canonical login -> other logins and emails of the same person
+    IDENTITY_LOOKUP_BATCH: int = 50  # unseen commit emails looked up per GraphQL query
+    IDENTITY_RETRY_DAYS: int = 7  # days before an email that did not resolve is looked up again
+    IDENTITY_REFRESH_DAYS: int = 7  # days between reads of the org members' public emails and names
+    
     # LangSmith settings
     LANGSMITH_API_KEY: Optional[str] = os.getenv("LANGSMITH_API_KEY")
     LANGSMITH_PROJECT: Optional[str] = os.getenv("LANGSMITH_PROJECT")
     
+    # Dashboard settings
+    DASHBOARD_CACHE_TTL: int = 15 * 60  # seconds
+    DASHBOARD_LOAD_WORKERS: int = 8  # threads loading dashboard sections concurrently
+    SHARED_CACHE_MAX_ENTRIES: int = 512
+    SHARED_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    CHART_WIDTH_PX: int = 1200  # assumed plot width used for downsampling
+    CHART_POINT_BUDGET: int = 1500  # maximum points per chart, across all series
+    WEBGL_POINT_THRESHOLD: int = 1000  # switch to WebGL traces above this many points
+    
+    # Collection settings (shared by the dashboard and the API)
+    FETCH_TIME_BUDGET: Optional[float] = 20.0  # seconds a request waits on upstream before showing partial numbers
+    FETCH_CONCURRENCY: int = 8  # repositories listed in parallel
+    PARTIAL_RESULT_TTL: int = 60  # seconds partial results are cached before they are refetched
+    
+    # HTTP transport settings (shared by the GitHub and LangSmith clients)
+    HTTP_POOL_SIZE: Optional[int] = None  # connections per host; defaults to the load concurrency
+    HTTP_TIMEOUT: int = 15  # seconds
+    HTTP_MAX_RETRIES: int = 5
+    HTTP_BACKOFF_FACTOR: float = 0.5  # seconds, doubled on every retry
+    HTTP_BACKOFF_MAX: float = 30.0  # seconds
+    HTTP_BACKOFF_JITTER: float = 0.5  # up to this many random seconds added to each backoff
+    
+    # Result cache settings (shared between dashboard and API replicas)
+    CACHE_BACKEND: str = "memory"  # "memory" or "redis"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_NAMESPACE: str = "ai_velocity"
+    CACHE_VERSION: int = 1  # bump to invalidate every cached result
+    CACHE_COMPRESS_MIN_BYTES: int = 1024  # compress serialized values at least this large
+    CACHE_MEMORY_MAX_BYTES: int = 64 * 1024 * 1024
+    
+    # Snapshot worker settings
+    SNAPSHOT_DIR: str = "data/snapshots"
+    SNAPSHOT_WINDOWS: list[int] = [7, 30, 90]  # look-back windows in days
+    SNAPSHOT_INTERVAL: int = 10 * 60  # seconds between worker passes
+    SNAPSHOT_MAX_AGE: int = 15 * 60  # seconds before a snapshot is stale
+    
+    # Team settings
+    TEAMS_CONFIG: Optional[str] = None  # JSON file mapping teams to repos and authors
+    TEAMS_FROM_GITHUB: bool = False  # also read teams from the GitHub organization
+    TEAM_INDEX_TTL: int = 60 * 60  # seconds before the team index is rebuilt
+    
+    # Archive settings
+    ARCHIVE_ENABLED: bool = False  # archive raw records on every worker pass
+    ARCHIVE_DIR: str = "data/archive"
+    ARCHIVE_LOOKBACK_DAYS: int = 7  # whole days re-archived on every worker pass
+    
+    # Export settings
+    EXPORT_CHUNK_ROWS: int = 50_000  # records encoded at a time by exports
+    EXPORT_MAX_DAYS: int = 365  # longest look-back of an API export read from upstream
+    API_PUBLIC_URL: str = "http://localhost:8000"  # API address the dashboard's download links point to
+    
+    # Backfill settings
+    BACKFILL_CHECKPOINT: str = "data/backfill.sqlite"  # progress of interrupted backfills
+    BACKFILL_SLICE_DAYS: int = 7  # days of one repository fetched per work unit
+    BACKFILL_WORKERS: int = 4  # work units fetched in parallel
+    BACKFILL_MAX_ATTEMPTS: int = 3  # tries per work unit before it is left for the next run
+    BACKFILL_GITHUB_REQUESTS_PER_HOUR: int = 3000  # leaves GitHub's 5,000/hour for the dashboard
+    BACKFILL_LANGSMITH_REQUESTS_PER_HOUR: int = 3600
+    
+    # Profiling settings
+    PROFILING_ENABLED: bool = False  # profile every dashboard rerun and service call
+    PROFILE_DIR: str = "data/profiles"
+    PROFILE_KEEP: int = 10  # slowest profiles kept per kind
+    PROFILE_MAX_AGE: int = 7 * 24 * 60 * 60  # seconds before a profile is deleted
+    PROFILE_INTERVAL_MS: int = 5  # sampling interval
+    
     # AWS settings (for future use)
     AWS_ACCESS_KEY_ID: Optional[str] = os.getenv("AWS_ACCESS_KEY_ID")
     AWS_SECRET_ACCESS_KEY: Optional[str] = os.getenv("AWS_SECRET_ACCESS_KEY")
@@ -46,25 +133,26 @@ class Settings(BaseSettings):
     # Sentry settings (for error tracking)
     SENTRY_DSN: Optional[str] = os.getenv("SENTRY_DSN")
     
-    class Config:
-        case_sensitive = True
-        env_file = ".env"
+    # Variables in .env that are not settings, e.g. for docker-compose, are ignored
+    model_config = SettingsConfigDict(case_sensitive=True, env_file=".env", extra="ignore")
     
-    @validator("DATABASE_URI", pre=True)
-    def assemble_db_connection(cls, v: Optional[str], values: Dict[str, Any]) -> str:
+    @field_validator("DATABASE_URI", mode="before")
+    @classmethod
+    def assemble_db_connection(cls, v: Optional[str], info: ValidationInfo) -> str:
         """Assemble the database connection string."""
         if isinstance(v, str):
             return v
             
-        return PostgresDsn.build(
+        return str(PostgresDsn.build(
             scheme="postgresql",
-            user=values.get("POSTGRES_USER"),
-            password=values.get("POSTGRES_PASSWORD"),
-            host=values.get("POSTGRES_SERVER"),
-            path=f"/{values.get('POSTGRES_DB') or ''}",
-        )
+            username=info.data.get("POSTGRES_USER"),
+            password=info.data.get("POSTGRES_PASSWORD"),
+            host=info.data.get("POSTGRES_SERVER"),
+            path=info.data.get("POSTGRES_DB") or "",
+        ))
     
-    @validator("BACKEND_CORS_ORIGINS", pre=True)
+    @field_validator("BACKEND_CORS_ORIGINS", mode="before")
+    @classmethod
     def assemble_cors_origins(cls, v: str | list[str]) -> list[str] | str:
         """Assemble CORS origins."""
         if isinstance(v, str) and not v.startswith("["):
@@ -73,12 +161,34 @@ class Settings(BaseSettings):
             return v
         raise ValueError(v)
 
-# Create settings instance
-settings = Settings()
-
+@lru_cache(maxsize=None)
 def get_settings() -> Settings:
-    """Get the application settings."""
-    return settings
+    """Get the application settings, building them on first use."""
+    return Settings()
+
+class _LazySettings:
+    """Stand-in for the settings instance that defers building it.
+
+    Reading ``.env`` and validating every field happens on the first attribute
+    access rather than when this module is imported.
+    """
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Assignments, e.g. ``monkeypatch.setattr`` in tests, must reach the
+        # instance rather than shadow it on the proxy
+        setattr(get_settings(), name, value)
+    
+    def __delattr__(self, name: str) -> None:
+        delattr(get_settings(), name)
+    
+    def __repr__(self) -> str:
+        return repr(get_settings())
+
+# Settings instance, built on first attribute access
+settings = _LazySettings()
 
 def is_production() -> bool:
     """Check if the application is running in production mode."""
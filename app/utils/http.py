@@ -0,0 +1,334 @@
+"""Shared HTTP transport for the GitHub and LangSmith clients.
+
+GitHub requests (and any other direct API calls) go through one process-wide
+:class:`requests.Session`, so connections are kept alive and reused across
+threads and dashboard sessions. The LangSmith client mounts its own adapters
+on, and closes, whatever session it is given, so it gets a session of its own
+built by the same :func:`create_session` with the instrumented adapter
+re-mounted for its API URL. All connection pools are sized to the configured
+concurrency (``HTTP_POOL_SIZE``, defaulting to the larger of
+``DASHBOARD_LOAD_WORKERS`` and ``API_MAX_CONCURRENT_FETCHES``), and sessions
+ask for every response compression urllib3 can decode.
+
+Failed requests are retried with jittered exponential backoff on connection
+errors, 429 and 5xx responses, honouring ``Retry-After``. GitHub requests use
+PyGithub's :class:`~github.GithubRetry.GithubRetry`, which also waits out
+secondary rate limits (403 responses with a rate-limit message).
+
+Every request is timed, and :func:`transport_stats` reports per-host request
+counts, latency and how often pooled connections were reused. Sessions also
+record request counts, latency, response bytes, list pages and the remaining
+rate limit in :mod:`app.utils.metrics`, labelled by endpoint template.
+:func:`limit_rate` caps the request rate to a host, e.g. for a backfill that
+must leave rate limit for the dashboard.
+"""
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
+
+from app.utils.config import settings
+from app.utils.rate_limit import TokenBucket
+from app.utils.metrics import (
+    RATE_LIMIT_REMAINING,
+    UPSTREAM_BYTES,
+    UPSTREAM_LATENCY,
+    UPSTREAM_PAGES,
+    UPSTREAM_REQUESTS,
+    add_list_page,
+    add_upstream_time,
+)
+
+GITHUB_API_URL = "https://api.github.com"
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+@dataclass
+class HostStats:
+    """Request counters for one host."""
+
+    requests: int = 0
+    errors: int = 0
+    connections_opened: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def avg_ms(self) -> float:
+        """Mean request latency, including retries, in milliseconds."""
+        return self.total_seconds / self.requests * 1000 if self.requests else 0.0
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Share of requests that were sent over an already open connection."""
+        if not self.requests:
+            return 0.0
+        return max(0.0, 1 - self.connections_opened / self.requests)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'connections_opened': self.connections_opened,
+            'reuse_ratio': round(self.reuse_ratio, 3),
+            'avg_ms': round(self.avg_ms, 1),
+            'max_ms': round(self.max_seconds * 1000, 1),
+        }
+
+
+_stats: Dict[str, HostStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(host: str, seconds: float, error: bool, connections_opened: Optional[int]) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(host, HostStats())
+        stats.requests += 1
+        stats.errors += int(error)
+        stats.total_seconds += seconds
+        stats.max_seconds = max(stats.max_seconds, seconds)
+        if connections_opened is not None:
+            stats.connections_opened = connections_opened
+
+
+def transport_stats() -> Dict[str, Dict[str, Any]]:
+    """Get per-host request counts, latency and connection reuse."""
+    with _stats_lock:
+        return {host: stats.to_dict() for host, stats in sorted(_stats.items())}
+
+
+def reset_transport_stats() -> None:
+    """Forget all recorded transport statistics."""
+    with _stats_lock:
+        _stats.clear()
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """HTTP adapter that records latency and connection reuse per host."""
+
+    def send(self, request: requests.PreparedRequest, *args: Any, **kwargs: Any) -> requests.Response:
+        host = urlsplit(request.url).netloc
+        started = time.perf_counter()
+        error = True
+        try:
+            response = super().send(request, *args, **kwargs)
+            error = response.status_code >= 500
+            return response
+        finally:
+            _record(host, time.perf_counter() - started, error, self._connections_opened(request.url))
+
+    def _connections_opened(self, url: str) -> Optional[int]:
+        try:
+            return self.poolmanager.connection_from_url(url).num_connections
+        except Exception:
+            return None
+
+
+# Path segments that are owner/repository/org names rather than resources
+_NAMED_SEGMENTS = {'repos': (':owner', ':repo'), 'orgs': (':org',), 'users': (':user',), 'teams': (':team',)}
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-f]{7,40}|[0-9a-f-]{36})$", re.IGNORECASE)
+
+
+def endpoint_template(path: str) -> str:
+    """Reduce a URL path to a low-cardinality template for metric labels.
+
+    ``/repos/acme/web/pulls/12`` becomes ``/repos/:owner/:repo/pulls/:id``,
+    and ``/repos/acme/web/compare/<sha>...<sha>`` becomes
+    ``/repos/:owner/:repo/compare/:base...:head``.
+    """
+    parts = [part for part in path.split("?", 1)[0].split("/") if part]
+    template = []
+    placeholders: Tuple[str, ...] = ()
+    for i, part in enumerate(parts):
+        if part == "compare" and template[-3:-2] == ["repos"] and i + 1 < len(parts):
+            # Refs may be branch names with slashes, so the rest of the path is the range
+            template.extend([part, ":base...:head"])
+            break
+        if placeholders:
+            template.append(placeholders[0])
+            placeholders = placeholders[1:]
+            continue
+        if _ID_SEGMENT.match(part):
+            template.append(":id")
+            continue
+        template.append(part)
+        placeholders = _NAMED_SEGMENTS.get(part, ())
+    return "/" + "/".join(template)
+
+
+def _is_list_page(endpoint: str, body: bytes) -> bool:
+    # GitHub list endpoints return a JSON array; LangSmith pages runs via POST .../query
+    return body[:1] == b"[" or endpoint.endswith("/query")
+
+
+_rate_limits: Dict[str, TokenBucket] = {}
+
+
+def limit_rate(host: str, bucket: Optional[TokenBucket]) -> None:
+    """Make every request to ``host`` wait for a token from ``bucket``; None removes the limit."""
+    if bucket is None:
+        _rate_limits.pop(host, None)
+    else:
+        _rate_limits[host] = bucket
+
+
+class InstrumentedSession(requests.Session):
+    """Session that records every request in the process-wide metrics."""
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        url = urlsplit(request.url)
+        labels = {'host': url.netloc, 'endpoint': endpoint_template(url.path)}
+        bucket = _rate_limits.get(url.netloc)
+        if bucket is not None:
+            bucket.acquire()
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = super().send(request, **kwargs)
+            status = str(response.status_code)
+            # Unless streaming, the body has been read by now
+            if not kwargs.get("stream") and response.ok:
+                body = response.content or b""
+                UPSTREAM_BYTES.inc(len(body), **labels)
+                if _is_list_page(labels['endpoint'], body):
+                    UPSTREAM_PAGES.inc(**labels)
+                    add_list_page()
+            remaining = response.headers.get("X-RateLimit-Remaining")
+            if remaining is not None and remaining.isdigit():
+                resource = response.headers.get("X-RateLimit-Resource", "core")
+                RATE_LIMIT_REMAINING.set(int(remaining), host=labels['host'], resource=resource)
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            add_upstream_time(elapsed)
+            UPSTREAM_REQUESTS.inc(status=status, **labels)
+            UPSTREAM_LATENCY.observe(elapsed, **labels)
+
+
+def pool_size() -> int:
+    """Number of pooled connections kept per host."""
+    return settings.HTTP_POOL_SIZE or max(
+        settings.DASHBOARD_LOAD_WORKERS, settings.API_MAX_CONCURRENT_FETCHES
+    )
+
+
+def _retry_options() -> Dict[str, Any]:
+    return {
+        'total': settings.HTTP_MAX_RETRIES,
+        'backoff_factor': settings.HTTP_BACKOFF_FACTOR,
+        'backoff_max': settings.HTTP_BACKOFF_MAX,
+        'backoff_jitter': settings.HTTP_BACKOFF_JITTER,
+        'status_forcelist': list(RETRY_STATUSES),
+        'respect_retry_after_header': True,
+    }
+
+
+def build_retry() -> Retry:
+    """Retry policy for generic HTTP APIs."""
+    return Retry(**_retry_options())
+
+
+def build_github_retry() -> Retry:
+    """Retry policy for the GitHub API, including secondary rate limits."""
+    from github.GithubRetry import GithubRetry
+
+    return GithubRetry(**_retry_options())
+
+
+def _adapter(retry: Retry) -> InstrumentedAdapter:
+    size = pool_size()
+    return InstrumentedAdapter(pool_connections=size, pool_maxsize=size, max_retries=retry)
+
+
+def mount_instrumented(session: requests.Session, prefix: str, retry: Optional[Retry] = None) -> None:
+    """Route requests under ``prefix`` through a pooled, instrumented adapter.
+
+    requests picks the longest matching prefix, so this takes precedence over
+    adapters a client library mounted for all of ``https://``.
+    """
+    session.mount(prefix, _adapter(retry or build_retry()))
+
+
+def _no_auth(request: requests.PreparedRequest) -> requests.PreparedRequest:
+    return request
+
+
+def create_session() -> requests.Session:
+    """Create a pooled, instrumented session with the shared retry policy."""
+    session = InstrumentedSession()
+    # Clients set their own credentials; never fall back to ~/.netrc
+    session.auth = _no_auth
+    session.headers['Accept-Encoding'] = make_headers(accept_encoding=True)['accept-encoding']
+    session.mount("https://", _adapter(build_retry()))
+    session.mount("http://", _adapter(build_retry()))
+    session.mount(GITHUB_API_URL, _adapter(build_github_retry()))
+    return session
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Get the process-wide HTTP session shared by all clients."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def _github_connection_class():
+    from github.Requester import HTTPSRequestsConnectionClass
+
+    class SharedSessionConnection(HTTPSRequestsConnectionClass):
+        """PyGithub connection that sends requests through the shared session.
+
+        PyGithub normally opens a private session per client. This stand-in is
+        cheap to create, so PyGithub can build one per request (which also
+        keeps concurrent threads from sharing request state), while the
+        underlying connections stay pooled in the shared session.
+        """
+
+        def __init__(self, host: str, port: Optional[int] = None, strict: bool = False,
+                     timeout: Optional[int] = None, retry: Any = None,
+                     pool_size: Optional[int] = None, **kwargs: Any) -> None:
+            self.host = host
+            self.port = port if port else 443
+            self.protocol = "https"
+            self.timeout = timeout
+            self.verify = kwargs.get("verify", True)
+            self.session = get_session()
+
+        def close(self) -> None:
+            # The shared session outlives every connection object
+            pass
+
+    return SharedSessionConnection
+
+
+_github_patched = False
+
+
+def use_shared_session_for_github() -> None:
+    """Route PyGithub's HTTPS requests through the shared session.
+
+    Must be called before the ``Github`` client is created. Safe to call
+    more than once.
+    """
+    global _github_patched
+    with _session_lock:
+        if _github_patched:
+            return
+        from github.Requester import HTTPRequestsConnectionClass, Requester
+
+        Requester.injectConnectionClasses(HTTPRequestsConnectionClass, _github_connection_class())
+        _github_patched = True
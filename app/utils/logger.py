@@ -1,14 +1,20 @@
+import atexit
 import logging
+import queue
 import sys
-from typing import Optional
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from typing import Optional, TextIO
 from pathlib import Path
-from datetime import datetime
+
+import orjson
 
 from app.utils.config import settings
 
-# Create logs directory if it doesn't exist
+# Directory for log files, created by setup_logging()
 LOG_DIR = Path("logs")
-LOG_DIR.mkdir(exist_ok=True)
+LOG_FILE_NAME = "ai_velocity.log"
 
 # Log format
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -40,74 +46,148 @@ class ColoredFormatter(logging.Formatter):
         logging.CRITICAL: f"{BOLD_RED}{LOG_FORMAT}{RESET}",
     }
     
+    def __init__(self):
+        super().__init__(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+        # One formatter per level, built once instead of on every record
+        self._formatters = {
+            level: logging.Formatter(fmt, datefmt=LOG_DATE_FORMAT)
+            for level, fmt in self.FORMATS.items()
+        }
+    
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt, datefmt=LOG_DATE_FORMAT)
-        return formatter.format(record)
+        formatter = self._formatters.get(record.levelno)
+        return formatter.format(record) if formatter else super().format(record)
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """Formatter emitting one JSON object per line for log aggregation.
+    
+    Fields passed with ``extra={...}`` are included as top-level keys.
+    """
+    
+    def format(self, record):
+        payload = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exception'] = record.exc_text
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                payload[key] = value
+        return orjson.dumps(payload, default=str).decode()
 
 # Console formatter
 CONSOLE_FORMATTER = ColoredFormatter()
+JSON_FORMATTER = JsonFormatter()
 
 def get_logger(name: str, log_level: Optional[str] = None) -> logging.Logger:
-    """Get a configured logger instance.
+    """Get a logger instance.
+    
+    Loggers propagate to the root logger, whose queue handler is installed by
+    setup_logging(). Getting a logger has no side effects, so it is safe at
+    module import time.
     
     Args:
         name: Name of the logger (usually __name__)
-        log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-        
+        log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL).
+            If not provided, the level set by setup_logging() applies.
+    
     Returns:
-        Configured logger instance
+        Logger instance
     """
-    # Create logger
     logger = logging.getLogger(name)
     
-    # Set log level
     if log_level:
-        level = getattr(logging, log_level.upper(), logging.INFO)
-    else:
-        level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
+        logger.setLevel(getattr(logging, log_level.upper(), logging.INFO))
     
-    logger.setLevel(level)
-    
-    # Prevent duplicate handlers
-    if logger.handlers:
-        return logger
+    return logger
+
+# Create root logger
+logger = get_logger("ai_velocity")
+
+# Installed by setup_logging(), removed by shutdown_logging()
+_queue_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+class _StructuredQueueHandler(QueueHandler):
+    """Queue handler that keeps the record's fields for the JSON formatter.
     
-    # Create console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(level)
-    console_handler.setFormatter(CONSOLE_FORMATTER)
+    The stock handler replaces the message with fully formatted text. This one
+    only resolves the message arguments and the traceback on the calling
+    thread, so the listener can still emit them as separate fields.
+    """
     
-    # Create file handler
-    log_file = LOG_DIR / f"{datetime.now().strftime('%Y%m%d')}.log"
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
-    file_handler.setLevel(level)
-    file_handler.setFormatter(FILE_FORMATTER)
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = FILE_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def setup_logging(log_dir: Optional[Path] = None, console: Optional[TextIO] = None):
+    """Set up logging configuration.
     
-    # Add handlers to logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    Call this once from an entry point (dashboard, worker, API); later calls
+    are no-ops. The root logger gets a single queue handler, so logging calls
+    only enqueue the record. One listener thread formats records and writes
+    them to the console and to a log file that rotates at midnight.
     
-    # Prevent logging from propagating to the root logger
-    logger.propagate = False
+    Set LOG_FORMAT=json for one JSON object per line instead of text.
     
-    return logger
-
-# Create root logger
-logger = get_logger("ai_velocity")
+    Args:
+        log_dir: Directory for log files. If not provided, uses LOG_DIR.
+        console: Stream for console output, e.g. ``sys.stderr`` when stdout
+            carries data. If not provided, uses ``sys.stdout``.
+    """
+    with _setup_lock:
+        if _listener is None:
+            _start_listener(log_dir, console)
 
-def setup_logging():
-    """Set up logging configuration."""
-    # Configure root logger
-    logging.basicConfig(
-        level=settings.LOG_LEVEL.upper(),
-        format=LOG_FORMAT,
-        datefmt=LOG_DATE_FORMAT,
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler(LOG_DIR / f"{datetime.now().strftime('%Y%m%d')}.log")
-        ]
+def _start_listener(log_dir: Optional[Path], console: Optional[TextIO] = None):
+    global _queue_handler, _listener
+    level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
+    structured = settings.LOG_FORMAT.lower() == "json"
+    
+    # Create console handler
+    console_handler = logging.StreamHandler(console or sys.stdout)
+    console_handler.setFormatter(JSON_FORMATTER if structured else CONSOLE_FORMATTER)
+    
+    # Create file handler, rotated daily without reopening it per logger
+    log_dir = Path(log_dir or LOG_DIR)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    file_handler = TimedRotatingFileHandler(
+        log_dir / LOG_FILE_NAME,
+        when="midnight",
+        backupCount=settings.LOG_BACKUP_COUNT,
+        encoding='utf-8',
+        delay=True,
     )
+    file_handler.setFormatter(JSON_FORMATTER if structured else FILE_FORMATTER)
+    
+    # Configure root logger to hand records to the listener thread
+    log_queue = queue.SimpleQueue()
+    _queue_handler = _StructuredQueueHandler(log_queue)
+    _listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_queue_handler)
     
     # Set log levels for third-party libraries
     logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -115,3 +195,16 @@ def setup_logging():
     logging.getLogger("openai").setLevel(logging.WARNING)
     logging.getLogger("github").setLevel(logging.WARNING)
     logging.getLogger("urllib3").setLevel(logging.WARNING)
+
+def shutdown_logging():
+    """Flush queued records, stop the listener and close the log handlers."""
+    global _queue_handler, _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _queue_handler = _listener = None
@@ -0,0 +1,360 @@
+"""In-process metrics for upstream calls, caches and aggregation.
+
+A small, dependency-free registry of counters, gauges and histograms, rendered
+in the Prometheus text exposition format by :func:`render_metrics` (served on
+``GET /api/v1/metrics``) and shown in the dashboard's debug panel.
+
+Every HTTP request made through :mod:`app.utils.http` is counted per host and
+endpoint with its latency, response size and the upstream's remaining rate
+limit. Service methods decorated with :func:`instrumented` record their total
+duration and, separately, the time spent outside upstream requests on the
+calling thread. That second histogram is our own aggregation work, so a slow
+dashboard can be attributed to GitHub, LangSmith or this code.
+
+Metrics are per process: the dashboard, the API and the worker each keep
+their own.
+"""
+import bisect
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from a cache hit to a full org scan
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+T = TypeVar("T")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class Metric:
+    """A named metric with a fixed set of label names."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if labels.keys() != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        """Yield (sample name, labels, value) for every label combination."""
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, self._labels(key), value
+
+    def reset(self) -> None:
+        """Forget every recorded value."""
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """Value that can go up and down, e.g. the remaining rate limit."""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels: Any) -> Optional[float]:
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+
+class _HistogramValue:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * buckets
+        self.sum = 0.0
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = _HistogramValue(len(self.buckets))
+            entry.counts[index] += 1
+            entry.sum += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the duration of the ``with`` block, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry.counts) if entry else 0
+
+    def total(self, **labels: Any) -> float:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry.sum if entry else 0.0
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            items = sorted((key, list(entry.counts), entry.sum) for key, entry in self._values.items())
+        for key, counts, total in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, 'le': _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """Collection of metrics, rendered together."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, cls: type, name: str, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def metrics(self) -> List[Metric]:
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Flatten counters and gauges, plus histogram counts and sums, into table rows."""
+        return [
+            {'metric': name, 'labels': _format_labels(labels)[1:-1], 'value': value}
+            for metric in self.metrics()
+            for name, labels, value in metric.samples()
+            if not name.endswith("_bucket")
+        ]
+
+    def reset(self) -> None:
+        """Reset every metric, keeping the registrations."""
+        for metric in self.metrics():
+            metric.reset()
+
+
+REGISTRY = MetricsRegistry()
+
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "upstream_requests_total", "Upstream HTTP requests by response status.", ("host", "endpoint", "status")
+)
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "upstream_request_duration_seconds",
+    "Upstream HTTP request duration, including retries and reading the body.",
+    ("host", "endpoint"),
+)
+UPSTREAM_BYTES = REGISTRY.counter(
+    "upstream_response_bytes_total", "Decoded upstream response body bytes received.", ("host", "endpoint")
+)
+UPSTREAM_PAGES = REGISTRY.counter(
+    "upstream_pages_total", "Pages of list results fetched from upstream APIs.", ("host", "endpoint")
+)
+RATE_LIMIT_REMAINING = REGISTRY.gauge(
+    "upstream_rate_limit_remaining", "Requests left in the upstream's current rate-limit window.", ("host", "resource")
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "cache_requests_total", "Cache lookups by cache and result.", ("cache", "result")
+)
+SERVICE_CALLS = REGISTRY.counter(
+    "service_calls_total", "Service method calls by outcome.", ("service", "method", "outcome")
+)
+SERVICE_LATENCY = REGISTRY.histogram(
+    "service_call_duration_seconds", "Service method duration.", ("service", "method")
+)
+AGGREGATION_LATENCY = REGISTRY.histogram(
+    "service_aggregation_duration_seconds",
+    "Service method duration spent outside upstream requests on the calling thread.",
+    ("service", "method"),
+)
+
+_thread = threading.local()
+
+
+def add_upstream_time(seconds: float) -> None:
+    """Attribute ``seconds`` of upstream waiting to the current thread."""
+    _thread.upstream_seconds = getattr(_thread, 'upstream_seconds', 0.0) + seconds
+
+
+def _upstream_time() -> float:
+    return getattr(_thread, 'upstream_seconds', 0.0)
+
+
+class PageCounter:
+    """Counts the list pages fetched by threads while they :meth:`track` it."""
+
+    def __init__(self) -> None:
+        self.pages = 0
+
+    @contextmanager
+    def track(self) -> Iterator["PageCounter"]:
+        previous = getattr(_thread, 'page_counter', None)
+        _thread.page_counter = self
+        try:
+            yield self
+        finally:
+            _thread.page_counter = previous
+
+
+def add_list_page() -> None:
+    """Count a list page fetched by the current thread towards its :class:`PageCounter`."""
+    counter = getattr(_thread, 'page_counter', None)
+    if counter is not None:
+        counter.pages += 1
+
+
+def instrumented(service: str, method: Optional[str] = None) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorate a service method to record its calls, duration and aggregation time.
+
+    Args:
+        service: Service label, e.g. ``github``
+        method: Method label. If None, uses the function name.
+    """
+    def decorate(func: Callable[..., T]) -> Callable[..., T]:
+        labels = {'service': service, 'method': method or func.__name__}
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            started = time.perf_counter()
+            upstream_before = _upstream_time()
+            outcome = "error"
+            try:
+                result = func(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                elapsed = time.perf_counter() - started
+                upstream = _upstream_time() - upstream_before
+                SERVICE_CALLS.inc(outcome=outcome, **labels)
+                SERVICE_LATENCY.observe(elapsed, **labels)
+                AGGREGATION_LATENCY.observe(max(0.0, elapsed - upstream), **labels)
+
+        return wrapper
+
+    return decorate
+
+
+def service_summary() -> List[Dict[str, Any]]:
+    """Per service method: call count and mean total, upstream and aggregation time."""
+    rows = []
+    for name, labels, calls in SERVICE_LATENCY.samples():
+        if name != f"{SERVICE_LATENCY.name}_count" or not calls:
+            continue
+        total = SERVICE_LATENCY.total(**labels)
+        aggregation = AGGREGATION_LATENCY.total(**labels)
+        rows.append({
+            **labels,
+            'calls': int(calls),
+            'avg_ms': round(total / calls * 1000, 1),
+            'upstream_ms': round((total - aggregation) / calls * 1000, 1),
+            'aggregation_ms': round(aggregation / calls * 1000, 1),
+        })
+    return rows
+
+
+def render_metrics() -> str:
+    """Render the process-wide registry in the Prometheus text format."""
+    return REGISTRY.render()
@@ -0,0 +1,254 @@
+"""On-demand sampling profiler for dashboard reruns and service calls.
+
+:class:`SamplingProfiler` polls :func:`sys._current_frames` from a background
+thread every ``PROFILE_INTERVAL_MS`` milliseconds and counts the call stacks
+it sees. Nothing is traced, so a profiled call runs at close to full speed.
+Profiles are written in the collapsed-stack format read by ``flamegraph.pl``,
+speedscope and ``inferno``, one ``frame;frame;frame count`` line per stack,
+next to a JSON file holding the call's parameters and duration.
+
+Profiling is off by default. ``PROFILING_ENABLED=true`` profiles every
+dashboard rerun and every decorated service call. Opening the dashboard with
+``?profile=1`` profiles that one rerun, including the sections loaded on other
+threads. Only the ``PROFILE_KEEP`` slowest recent profiles of each kind are
+kept in ``PROFILE_DIR``; faster ones and ones older than ``PROFILE_MAX_AGE``
+are deleted.
+"""
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+import orjson
+
+from app.utils.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Counts the call stacks of one thread, or of all threads, at a fixed interval."""
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        thread_id: Optional[int] = None,
+        all_threads: bool = False,
+        max_seconds: float = 300.0,
+    ):
+        """Initialize the profiler.
+
+        Args:
+            interval: Seconds between samples
+            thread_id: Thread to sample. If None, the thread calling start().
+            all_threads: Sample every thread, with the thread name as the root frame
+            max_seconds: Stop sampling after this long, in case stop() is never called
+        """
+        self.interval = interval
+        self.thread_id = thread_id
+        self.all_threads = all_threads
+        self.max_seconds = max_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        deadline = self.started_at + self.max_seconds
+        while not self._stop.wait(self.interval) and time.perf_counter() < deadline:
+            frames = sys._current_frames()
+            if self.all_threads:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                targets = [(names.get(ident, str(ident)), frame) for ident, frame in frames.items() if ident != own_id]
+            else:
+                frame = frames.get(self.thread_id)
+                targets = [(None, frame)] if frame is not None else []
+            for root, frame in targets:
+                self._sample(root, frame)
+            self.samples += 1
+
+    def _sample(self, root: Optional[str], frame: Any) -> None:
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        if root is not None:
+            stack.append(root)
+        self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Render the samples as collapsed stacks, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+@dataclass
+class ProfileRecord:
+    """Metadata of a saved profile."""
+
+    kind: str
+    duration_seconds: float
+    samples: int
+    params: Dict[str, Any] = field(default_factory=dict)
+    created_at: str = ""
+    path: str = ""
+
+
+class ProfileStore:
+    """Keeps the slowest recent profiles of each kind on disk."""
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        keep: Optional[int] = None,
+        max_age: Optional[float] = None,
+    ):
+        self.directory = Path(directory or settings.PROFILE_DIR)
+        self.keep = keep if keep is not None else settings.PROFILE_KEEP
+        self.max_age = max_age if max_age is not None else settings.PROFILE_MAX_AGE
+        self._lock = threading.Lock()
+
+    def save(self, kind: str, profiler: SamplingProfiler, params: Optional[Dict[str, Any]] = None) -> Optional[ProfileRecord]:
+        """Save a finished profile if it is among the slowest recent ones.
+
+        Returns:
+            The saved record, or None if faster profiles of this kind are all kept
+        """
+        if self.keep <= 0:
+            return None
+        now = datetime.now(timezone.utc)
+        stem = f"{kind}-{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        record = ProfileRecord(
+            kind=kind,
+            duration_seconds=round(profiler.duration, 4),
+            samples=profiler.samples,
+            params={key: str(value) for key, value in (params or {}).items()},
+            created_at=now.isoformat(),
+            path=str(self.directory / f"{stem}.folded"),
+        )
+        with self._lock:
+            kept = self._prune(kind, now)
+            if len(kept) >= self.keep and record.duration_seconds <= kept[-1].duration_seconds:
+                return None
+            self.directory.mkdir(parents=True, exist_ok=True)
+            Path(record.path).write_text(profiler.collapsed(), encoding="utf-8")
+            Path(record.path).with_suffix(".json").write_bytes(orjson.dumps(asdict(record)))
+            for evicted in kept[self.keep - 1:]:
+                self._delete(evicted)
+        return record
+
+    def records(self, kind: Optional[str] = None) -> List[ProfileRecord]:
+        """List kept profiles, slowest first."""
+        records = []
+        for meta in self.directory.glob("*.json"):
+            try:
+                record = ProfileRecord(**orjson.loads(meta.read_bytes()))
+            except Exception as e:
+                logger.warning(f"Skipping unreadable profile {meta}: {e}")
+                continue
+            if kind is None or record.kind == kind:
+                records.append(record)
+        return sorted(records, key=lambda r: r.duration_seconds, reverse=True)
+
+    def _prune(self, kind: str, now: datetime) -> List[ProfileRecord]:
+        kept = []
+        for record in self.records(kind):
+            age = (now - datetime.fromisoformat(record.created_at)).total_seconds()
+            if age > self.max_age:
+                self._delete(record)
+            else:
+                kept.append(record)
+        return kept
+
+    @staticmethod
+    def _delete(record: ProfileRecord) -> None:
+        for path in (Path(record.path), Path(record.path).with_suffix(".json")):
+            path.unlink(missing_ok=True)
+
+
+_store: Optional[ProfileStore] = None
+
+
+def get_profile_store() -> ProfileStore:
+    """Get the process-wide profile store."""
+    global _store
+    if _store is None:
+        _store = ProfileStore()
+    return _store
+
+
+def start_profiler(all_threads: bool = False) -> SamplingProfiler:
+    """Start sampling the calling thread (or all threads) at PROFILE_INTERVAL_MS."""
+    return SamplingProfiler(interval=settings.PROFILE_INTERVAL_MS / 1000, all_threads=all_threads).start()
+
+
+def profiled(kind: Optional[str] = None) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorate a function to be profiled on every call while PROFILING_ENABLED is set.
+
+    The call's arguments, except ``self``, are saved with the profile.
+
+    Args:
+        kind: Profile name. If None, uses the function's qualified name.
+    """
+    def decorate(func: Callable[..., T]) -> Callable[..., T]:
+        signature = inspect.signature(func)
+        name = kind or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            if not settings.PROFILING_ENABLED:
+                return func(*args, **kwargs)
+            profiler = start_profiler()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.stop()
+                bound = signature.bind_partial(*args, **kwargs)
+                bound.apply_defaults()
+                params = {key: value for key, value in bound.arguments.items() if key != "self"}
+                get_profile_store().save(name, profiler, params)
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,63 @@
+"""Client-side request budgets.
+
+Long jobs such as the historical backfill share GitHub's hourly rate limit with
+the dashboard and the API. A :class:`TokenBucket` registered for a host with
+:func:`app.utils.http.limit_rate` makes every request to that host wait for a
+token, so a job never spends more than its share of the limit however many
+threads it runs.
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at ``rate`` tokens per second."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Most tokens saved up for a burst. If not provided, one second's worth.
+            clock: Monotonic time source, replaceable in tests
+            sleep: Sleep function, replaceable in tests
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1.0, capacity if capacity is not None else rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_hour(cls, requests: float, capacity: Optional[float] = None) -> "TokenBucket":
+        return cls(requests / 3600, capacity)
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Take ``tokens``, waiting until the bucket has refilled enough.
+
+        Waiting callers reserve their tokens up front, so they are served in
+        the order they arrived.
+
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            self._sleep(wait)
+        return wait
@@ -0,0 +1,220 @@
+"""Server-side downsampling for dashboard time-series charts.
+
+Plotly ships every point to the browser, so long date ranges multiplied by
+several series quickly produce large payloads and slow renders. The helpers
+here keep each chart under a fixed point budget: count series are resampled
+to a coarser frequency (day, week, month), and when even monthly buckets
+exceed the budget each series is reduced with Largest-Triangle-Three-Buckets.
+Large results are drawn with WebGL traces.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from app.utils.config import settings
+
+# Resampling steps from finest to coarsest, with their approximate length in days
+FREQUENCIES: List[Tuple[str, str, int]] = [
+    ("D", "daily", 1),
+    ("W-MON", "weekly", 7),
+    ("MS", "monthly", 30),
+]
+
+# Horizontal pixels per point below which extra points are not distinguishable
+MIN_PIXELS_PER_POINT = 2
+
+
+def points_per_series(
+    n_series: int,
+    plot_width: Optional[int] = None,
+    point_budget: Optional[int] = None,
+) -> int:
+    """Get how many points each series may contribute to a chart.
+
+    Args:
+        n_series: Number of series drawn on the chart
+        plot_width: Plot width in pixels. If None, uses CHART_WIDTH_PX.
+        point_budget: Maximum points across all series. If None, uses CHART_POINT_BUDGET.
+    """
+    plot_width = plot_width or settings.CHART_WIDTH_PX
+    point_budget = point_budget or settings.CHART_POINT_BUDGET
+    by_width = plot_width // MIN_PIXELS_PER_POINT
+    by_budget = point_budget // max(n_series, 1)
+    return max(min(by_width, by_budget), 2)
+
+
+def choose_frequency(
+    n_days: int,
+    n_series: int = 1,
+    plot_width: Optional[int] = None,
+    point_budget: Optional[int] = None,
+) -> Tuple[str, str]:
+    """Pick the finest resampling frequency that fits the point budget.
+
+    Args:
+        n_days: Length of the date range in days
+        n_series: Number of series drawn on the chart
+        plot_width: Plot width in pixels
+        point_budget: Maximum points across all series
+
+    Returns:
+        Tuple of (pandas offset alias, human-readable label)
+    """
+    limit = points_per_series(n_series, plot_width, point_budget)
+    for alias, label, days in FREQUENCIES:
+        if math.ceil(n_days / days) <= limit:
+            return alias, label
+    alias, label, _ = FREQUENCIES[-1]
+    return alias, label
+
+
+def resample_counts(df: pd.DataFrame, date_column: str, freq: str) -> pd.DataFrame:
+    """Sum count columns into ``freq`` buckets.
+
+    Args:
+        df: DataFrame with one row per day
+        date_column: Name of the datetime column
+        freq: Pandas offset alias, e.g. "W-MON"
+
+    Returns:
+        DataFrame with one row per bucket, labelled by the bucket start
+    """
+    if freq == "D":
+        return df
+    return (
+        df.set_index(date_column)
+        .resample(freq, label="left", closed="left")
+        .sum(numeric_only=True)
+        .reset_index()
+    )
+
+
+def lttb(x: Sequence[float], y: Sequence[float], threshold: int) -> np.ndarray:
+    """Select point indices with Largest-Triangle-Three-Buckets downsampling.
+
+    LTTB keeps the first and last points and, from each of ``threshold - 2``
+    equal-width buckets in between, the point that forms the largest triangle
+    with the previously selected point and the mean of the next bucket. It
+    preserves peaks and troughs far better than uniform striding.
+
+    Args:
+        x: Monotonically increasing x values (e.g. epoch seconds)
+        y: Values to plot
+        threshold: Number of points to keep
+
+    Returns:
+        Sorted array of indices into ``x``/``y``
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1][:max(threshold, 0)], dtype=int)
+
+    xs = np.asarray(x, dtype=float)
+    ys = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_start = end if end < next_end else n - 1
+        avg_x = xs[next_start:next_end].mean()
+        avg_y = ys[next_start:next_end].mean()
+
+        areas = np.abs(
+            (xs[previous] - avg_x) * (ys[start:end] - ys[previous])
+            - (xs[previous] - xs[start:end]) * (avg_y - ys[previous])
+        )
+        previous = start + int(areas.argmax())
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample_points(
+    x: Sequence,
+    y: Sequence[float],
+    threshold: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Reduce a point series to at most ``threshold`` points with LTTB.
+
+    Args:
+        x: Increasing x values; numbers, datetimes or dates
+        y: Values to plot
+        threshold: Number of points to keep
+
+    Returns:
+        Tuple of the kept x and y values
+    """
+    x_array = np.asarray(x)
+    numeric_x = x_array
+    if x_array.dtype.kind in "OM":
+        numeric_x = pd.to_datetime(x_array).to_numpy().astype("int64")
+    keep = lttb(numeric_x, y, threshold)
+    return x_array[keep], np.asarray(y)[keep]
+
+
+def build_activity_figure(
+    df: pd.DataFrame,
+    date_column: str,
+    value_columns: Sequence[str],
+    title: str,
+    labels: Optional[Dict[str, str]] = None,
+    plot_width: Optional[int] = None,
+    point_budget: Optional[int] = None,
+) -> go.Figure:
+    """Build a line chart of daily counts that stays under the point budget.
+
+    The frequency is chosen from the date range and plot width. If monthly
+    buckets still exceed the budget, each trace is reduced with LTTB to its
+    share of it. Traces switch to WebGL once the chart holds more than
+    WEBGL_POINT_THRESHOLD points.
+
+    Args:
+        df: DataFrame with one row per day
+        date_column: Name of the datetime column
+        value_columns: Count columns to plot, one trace each
+        title: Chart title; the chosen granularity is appended
+        labels: Display names for the columns
+        plot_width: Plot width in pixels
+        point_budget: Maximum points across all traces
+    """
+    labels = labels or {}
+    n_days = int(df[date_column].nunique()) if len(df) else 0
+    freq, granularity = choose_frequency(n_days, len(value_columns), plot_width, point_budget)
+    resampled = resample_counts(df, date_column, freq)
+    limit = points_per_series(len(value_columns), plot_width, point_budget)
+
+    series = []
+    for column in value_columns:
+        x, y = resampled[date_column].to_numpy(), resampled[column].to_numpy()
+        if len(x) > limit:
+            x, y = downsample_points(x, y, limit)
+        series.append((column, x, y))
+
+    total_points = sum(len(x) for _, x, _ in series)
+    trace = go.Scattergl if total_points > settings.WEBGL_POINT_THRESHOLD else go.Scatter
+
+    fig = go.Figure()
+    for column, x, y in series:
+        fig.add_trace(trace(
+            x=x,
+            y=y,
+            mode="lines",
+            name=labels.get(column, column),
+        ))
+    fig.update_layout(
+        title=f"{title} ({granularity})",
+        xaxis_title=labels.get(date_column, date_column),
+        yaxis_title=labels.get("value", "Count"),
+        legend_title=labels.get("variable", None),
+        template="plotly_white",
+    )
+    return fig
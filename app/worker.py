@@ -0,0 +1,197 @@
+"""Background worker that keeps dashboard snapshots fresh.
+
+Run it next to the dashboard (``python -m app.worker``) so page loads never
+wait on GitHub or LangSmith. Every ``SNAPSHOT_INTERVAL`` seconds it recomputes
+team velocity, prompt coverage and test results for each window in
+``SNAPSHOT_WINDOWS`` and writes them to the :class:`SnapshotStore`.
+
+With ``ARCHIVE_ENABLED`` set, each pass also re-archives the raw records of
+the last ``ARCHIVE_LOOKBACK_DAYS`` days to the Parquet
+:class:`~app.services.archive.MetricsArchive`. ``--archive-days`` archives a
+longer history once and exits.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+from app.services.snapshot_store import (
+    PROMPT_COVERAGE,
+    SNAPSHOT_KINDS,
+    TEST_RESULTS,
+    VELOCITY,
+    Snapshot,
+    SnapshotStore,
+)
+from app.services.shards import get_sharded_github
+from app.services.team_index import load_team_index
+from app.utils.config import settings
+from app.utils.logger import get_logger, setup_logging
+
+if TYPE_CHECKING:
+    from app.services.archive import MetricsArchive
+
+logger = get_logger(__name__)
+
+
+def compute_snapshot(kind: str, days: int, github_service, langsmith_service) -> Optional[Dict]:
+    """Compute the payload for one snapshot kind.
+
+    Velocity snapshots hold the metrics of every team, keyed by team name.
+    With ``GITHUB_ORGS`` set they cover every listed organization, with a
+    view per organization, and are collected by worker processes.
+
+    Returns:
+        The metrics dictionary, or None if the backing service is not configured
+    """
+    if kind == VELOCITY:
+        collector = get_sharded_github() or github_service
+        if collector is None:
+            return None
+        return collector.get_team_rollups(load_team_index(collector), days=days)
+    if kind == PROMPT_COVERAGE:
+        return langsmith_service.get_prompt_coverage(days=days) if langsmith_service else None
+    if kind == TEST_RESULTS:
+        return langsmith_service.get_test_results(days=days) if langsmith_service else None
+    raise ValueError(f"Unknown snapshot kind: {kind}")
+
+
+def refresh_snapshot(
+    store: SnapshotStore,
+    kind: str,
+    days: int,
+    github_service,
+    langsmith_service,
+) -> Optional[Snapshot]:
+    """Recompute one snapshot and write it to the store."""
+    data = compute_snapshot(kind, days, github_service, langsmith_service)
+    if data is None:
+        return None
+    return store.write(kind, days, data)
+
+
+def run_once(
+    store: SnapshotStore,
+    github_service,
+    langsmith_service,
+    windows: Optional[Iterable[int]] = None,
+) -> List[Snapshot]:
+    """Refresh every snapshot kind for every window once.
+
+    A failure for one snapshot is logged and does not stop the others.
+    """
+    written = []
+    for days in windows or settings.SNAPSHOT_WINDOWS:
+        for kind in SNAPSHOT_KINDS:
+            started = time.monotonic()
+            try:
+                snapshot = refresh_snapshot(store, kind, days, github_service, langsmith_service)
+            except Exception as e:
+                logger.error(f"Failed to refresh {kind} snapshot for {days}d: {e}")
+                continue
+            if snapshot is not None:
+                written.append(snapshot)
+                logger.info(f"Refreshed {kind} snapshot for {days}d in {time.monotonic() - started:.1f}s")
+    return written
+
+
+def archive_once(
+    archive: "MetricsArchive",
+    github_service,
+    langsmith_service,
+    days: Optional[int] = None,
+) -> Dict[str, int]:
+    """Archive the raw records of the last ``days`` whole days (UTC).
+
+    Whole days are fetched because each write replaces the day partitions it
+    touches. PRs are partitioned by creation day, so a PR's state is as of the
+    last pass that re-archived that day.
+
+    Returns:
+        Number of records written per archive source
+    """
+    from app.services.archive import COMMITS, PRS, RUNS
+
+    days = days or settings.ARCHIVE_LOOKBACK_DAYS
+    today = datetime.now(timezone.utc).date()
+    since = datetime.combine(today - timedelta(days=days - 1), datetime.min.time(), timezone.utc)
+
+    fetchers = {}
+    if github_service is not None:
+        fetchers[PRS] = lambda: github_service.get_pr_records(since)
+        fetchers[COMMITS] = lambda: github_service.get_commit_records(since)
+    if langsmith_service is not None:
+        fetchers[RUNS] = lambda: langsmith_service.get_run_records(since)
+
+    written = {}
+    for source, fetch in fetchers.items():
+        try:
+            written[source] = archive.write(source, fetch())
+        except Exception as e:
+            logger.error(f"Failed to archive {source} for the last {days}d: {e}")
+    return written
+
+
+def _build_services():
+    from app.services.github_service import GitHubService
+    from app.services.langsmith_service import LangSmithService
+
+    github_service = langsmith_service = None
+    try:
+        github_service = GitHubService()
+    except Exception as e:
+        logger.warning(f"GitHub snapshots disabled: {e}")
+    try:
+        langsmith_service = LangSmithService()
+    except Exception as e:
+        logger.warning(f"LangSmith snapshots disabled: {e}")
+    return github_service, langsmith_service
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point for ``python -m app.worker``."""
+    load_dotenv()
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="Precompute dashboard metric snapshots.")
+    parser.add_argument("--once", action="store_true", help="Refresh all snapshots once and exit")
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=settings.SNAPSHOT_INTERVAL,
+        help="Seconds between refresh passes",
+    )
+    parser.add_argument(
+        "--archive-days",
+        type=int,
+        help="Archive raw records of the last N days once and exit",
+    )
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore()
+    github_service, langsmith_service = _build_services()
+    if github_service is None and langsmith_service is None:
+        raise SystemExit("No services configured; nothing to snapshot.")
+
+    archive = None
+    if settings.ARCHIVE_ENABLED or args.archive_days:
+        from app.services.archive import MetricsArchive
+
+        archive = MetricsArchive()
+    if args.archive_days:
+        archive_once(archive, github_service, langsmith_service, days=args.archive_days)
+        return
+
+    while True:
+        run_once(store, github_service, langsmith_service)
+        if archive is not None:
+            archive_once(archive, github_service, langsmith_service)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Benchmarks for the AI Velocity Dashboard. Run them as ``python -m benchmarks.<name>``."""
@@ -0,0 +1,173 @@
+"""Measure the memory held per PR, commit and run: upstream objects vs. records.
+
+Builds N PyGithub ``PullRequest`` and ``Commit`` objects and LangSmith ``Run``
+models from payloads shaped like the real list responses, keeps them alive,
+and reports the traced bytes per object. It then does the same for the
+records the services convert them to.
+
+Usage::
+
+    python -m benchmarks.bench_records            # 10,000 of each
+    python -m benchmarks.bench_records -n 100000
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import orjson
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.models.records import CommitRecord, PRRecord, RunRecord  # noqa: E402
+
+AUTHORS = [f"dev{i}" for i in range(50)]
+REPOS = [f"service-{i}" for i in range(20)]
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _user(login: str) -> Dict[str, Any]:
+    base = f"https://api.github.com/users/{login}"
+    return {
+        "login": login, "id": abs(hash(login)) % 10**8, "node_id": "MDQ6VXNlcjE=",
+        "avatar_url": f"https://avatars.githubusercontent.com/u/{login}?v=4", "gravatar_id": "",
+        "url": base, "html_url": f"https://github.com/{login}",
+        "followers_url": f"{base}/followers", "following_url": f"{base}/following{{/other_user}}",
+        "gists_url": f"{base}/gists{{/gist_id}}", "starred_url": f"{base}/starred{{/owner}}{{/repo}}",
+        "subscriptions_url": f"{base}/subscriptions", "organizations_url": f"{base}/orgs",
+        "repos_url": f"{base}/repos", "events_url": f"{base}/events{{/privacy}}",
+        "received_events_url": f"{base}/received_events", "type": "User", "site_admin": False,
+    }
+
+
+def _repo(name: str) -> Dict[str, Any]:
+    base = f"https://api.github.com/repos/acme/{name}"
+    repo = {
+        "id": abs(hash(name)) % 10**8, "node_id": "MDEwOlJlcG9zaXRvcnkx", "name": name,
+        "full_name": f"acme/{name}", "private": True, "owner": _user("acme"),
+        "html_url": f"https://github.com/acme/{name}", "description": "Internal service", "fork": False,
+        "url": base, "created_at": "2020-01-01T00:00:00Z", "updated_at": "2024-05-01T00:00:00Z",
+        "pushed_at": "2024-05-01T00:00:00Z", "size": 12345, "stargazers_count": 3, "watchers_count": 3,
+        "language": "Python", "default_branch": "main", "open_issues_count": 12, "visibility": "private",
+    }
+    for rel in ("forks", "keys", "collaborators", "teams", "hooks", "issue_events", "events", "assignees",
+                "branches", "tags", "blobs", "git_tags", "git_refs", "trees", "statuses", "languages",
+                "stargazers", "contributors", "subscribers", "subscription", "commits", "git_commits",
+                "comments", "issue_comment", "contents", "compare", "merges", "archive", "downloads",
+                "issues", "pulls", "milestones", "notifications", "labels", "releases", "deployments"):
+        repo[f"{rel}_url"] = f"{base}/{rel}"
+    return repo
+
+
+def pr_payload(i: int) -> Dict[str, Any]:
+    repo, author = REPOS[i % len(REPOS)], AUTHORS[i % len(AUTHORS)]
+    created = START + timedelta(minutes=17 * i)
+    merged = created + timedelta(hours=5) if i % 3 else None
+    base = f"https://api.github.com/repos/acme/{repo}/pulls/{i}"
+    return {
+        "url": base, "id": 10**6 + i, "node_id": "MDExOlB1bGxSZXF1ZXN0MQ==",
+        "html_url": f"https://github.com/acme/{repo}/pull/{i}", "diff_url": f"{base}.diff",
+        "patch_url": f"{base}.patch", "issue_url": base.replace("pulls", "issues"), "number": i,
+        "state": "closed" if merged else "open", "locked": False, "title": f"Change number {i}",
+        "user": _user(author), "body": "Refactors the handler and adds tests. " * 8,
+        "created_at": created.isoformat(), "updated_at": created.isoformat(),
+        "closed_at": merged.isoformat() if merged else None,
+        "merged_at": merged.isoformat() if merged else None,
+        "merge_commit_sha": uuid.uuid4().hex, "assignees": [], "requested_reviewers": [_user(AUTHORS[0])],
+        "labels": [{"id": 1, "name": "enhancement", "color": "a2eeef", "default": True}],
+        "head": {"label": f"acme:feature-{i}", "ref": f"feature-{i}", "sha": uuid.uuid4().hex,
+                 "user": _user("acme"), "repo": _repo(repo)},
+        "base": {"label": "acme:main", "ref": "main", "sha": uuid.uuid4().hex,
+                 "user": _user("acme"), "repo": _repo(repo)},
+        "author_association": "MEMBER", "draft": False,
+    }
+
+
+def commit_payload(i: int) -> Dict[str, Any]:
+    repo, author = REPOS[i % len(REPOS)], AUTHORS[i % len(AUTHORS)]
+    sha = uuid.uuid4().hex + uuid.uuid4().hex[:8]
+    date = (START + timedelta(minutes=7 * i)).isoformat()
+    signature = {"name": author.title(), "email": f"{author}@acme.dev", "date": date}
+    return {
+        "sha": sha, "node_id": "MDY6Q29tbWl0MQ==",
+        "url": f"https://api.github.com/repos/acme/{repo}/commits/{sha}",
+        "html_url": f"https://github.com/acme/{repo}/commit/{sha}",
+        "commit": {"author": signature, "committer": signature, "message": f"Fix issue {i}\n\nDetails.",
+                   "tree": {"sha": uuid.uuid4().hex, "url": "https://api.github.com/tree"}, "comment_count": 0},
+        "author": _user(author), "committer": _user(author), "parents": [{"sha": uuid.uuid4().hex}],
+    }
+
+
+def run_payload(i: int) -> Dict[str, Any]:
+    start = START + timedelta(seconds=30 * i)
+    return {
+        "id": uuid.uuid4(), "name": f"test_case_{i % 40}", "run_type": "llm",
+        "start_time": start, "end_time": start + timedelta(seconds=2),
+        "inputs": {"messages": [{"role": "user", "content": "Summarize the incident report. " * 20}]},
+        "outputs": {"generations": [{"text": "The incident was caused by a config change. " * 15}],
+                    "evaluation": {"score": (i % 10) / 10}},
+        "tags": ["test", "nightly"], "error": None if i % 7 else "timeout",
+        "extra": {"metadata": {"ls_model_name": "model-x", "revision_id": "abc123"}},
+        "trace_id": uuid.uuid4(), "dotted_order": f"20240101T000000Z{i}",
+    }
+
+
+def _fresh(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # Round-trip through JSON so nested dicts and strings are not shared, as in a real response
+    return orjson.loads(orjson.dumps(payload))
+
+
+def _measure(build: Callable[[int], Any], n: int) -> float:
+    """Traced bytes per object while ``n`` objects from ``build`` are alive."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects: List[Any] = [build(i) for i in range(n)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", type=int, default=10_000, help="objects of each kind")
+    args = parser.parse_args()
+
+    from github import Github
+    from github.Commit import Commit
+    from github.PullRequest import PullRequest
+    from langsmith.schemas import Run
+
+    requester = Github(per_page=100).requester
+    prs = [_fresh(pr_payload(i)) for i in range(args.n)]
+    commits = [_fresh(commit_payload(i)) for i in range(args.n)]
+
+    def github_pr(i: int) -> Any:
+        return PullRequest(requester, {}, _fresh(prs[i]), completed=False)
+
+    def github_commit(i: int) -> Any:
+        return Commit(requester, {}, _fresh(commits[i]), completed=False)
+
+    rows = [
+        ("PullRequest", _measure(github_pr, args.n),
+         _measure(lambda i: PRRecord.from_github(REPOS[i % len(REPOS)], github_pr(i)), args.n)),
+        ("Commit", _measure(github_commit, args.n),
+         _measure(lambda i: CommitRecord.from_github(REPOS[i % len(REPOS)], github_commit(i)), args.n)),
+        ("Run", _measure(lambda i: Run(**run_payload(i)), args.n),
+         _measure(lambda i: RunRecord.from_langsmith(Run(**run_payload(i))), args.n)),
+    ]
+
+    print(f"Bytes held per object, n={args.n:,}")
+    print(f"{'kind':<12}{'upstream':>12}{'record':>10}{'saved':>8}")
+    for kind, upstream, record in rows:
+        print(f"{kind:<12}{upstream:>12,.0f}{record:>10,.0f}{1 - record / upstream:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
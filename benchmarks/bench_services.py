@@ -0,0 +1,244 @@
+"""Benchmark the service aggregation paths on synthetic data at several scales.
+
+Runs ``get_pr_metrics``, ``get_commit_activity``, ``get_prompt_coverage`` and
+``get_test_results`` against the fakes in :mod:`benchmarks.synthetic` and
+reports, per method, the wall time, the peak traced memory and the number of
+requests the real APIs would have served. Each run is appended to
+``benchmarks/results/<tier>.jsonl`` with the commit it ran on and compared
+with the previous run of that tier, so a slower commit shows up as a
+regression. Times are the best of ``--repeat`` runs; memory is measured in a
+separate run under tracemalloc, which would otherwise slow the timed runs.
+
+Usage::
+
+    python -m benchmarks.bench_services                    # small tier
+    python -m benchmarks.bench_services --tier medium --repeat 3
+    python -m benchmarks.bench_services --baseline 1a2b3c4 --fail-on-regression
+"""
+import argparse
+import gc
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+import orjson
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import TIERS, FakeGithub, FakeLangSmithClient, Tier  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Method -> (service, result field counting the items, fake attribute with the expected count)
+METHODS = {
+    'get_pr_metrics': ('github', 'total_prs', 'expected_prs'),
+    'get_commit_activity': ('github', 'total_commits', 'expected_commits'),
+    'get_prompt_coverage': ('langsmith', 'total_runs', 'expected_llm_runs'),
+    'get_test_results': ('langsmith', 'total_tests', 'expected_test_runs'),
+}
+
+# A method regresses when it gets this much slower or bigger than the
+# baseline; request counts are deterministic and may not grow at all
+DEFAULT_THRESHOLD = 0.2
+
+
+def _service(kind: str, tier: Tier, seed: int) -> Tuple[Any, Any]:
+    """Build a fresh service on fresh fakes, so every run starts cold."""
+    if kind == 'github':
+        from app.services.github_service import GitHubService
+        from app.services.identity_index import IdentityIndex
+
+        client = FakeGithub(tier, seed)
+        with patch("app.services.github_service.Github", return_value=client):
+            return GitHubService(token="benchmark", org_name="synthetic", identities=IdentityIndex(path="")), client
+
+    from app.services.langsmith_service import LangSmithService
+
+    client = FakeLangSmithClient(tier, seed)
+    with patch("app.services.langsmith_service.Client", return_value=client):
+        return LangSmithService(api_key="benchmark", project_name="synthetic"), client
+
+
+def run_method(tier: Tier, method: str, seed: int = 0, repeat: int = 1, memory: bool = True) -> Dict[str, Any]:
+    """Benchmark one service method.
+
+    Raises:
+        RuntimeError: If the method did not count every synthetic item, e.g.
+            because it fell back to mock data
+    """
+    kind, field, expected_attr = METHODS[method]
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        service, client = _service(kind, tier, seed)
+        gc.collect()
+        started = time.perf_counter()
+        result = getattr(service, method)(days=tier.days)
+        best = min(best, time.perf_counter() - started)
+        items, requests, expected = result[field], client.requests, getattr(client, expected_attr)
+        if items != expected:
+            raise RuntimeError(f"{method} counted {items} of {expected} synthetic items")
+        del result
+
+    peak = None
+    if memory:
+        service, _ = _service(kind, tier, seed)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            getattr(service, method)(days=tier.days)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {'wall_seconds': round(best, 4), 'peak_bytes': peak, 'requests': requests, 'items': items}
+
+
+def run_tier(
+    tier: Tier,
+    methods: Optional[List[str]] = None,
+    seed: int = 0,
+    repeat: int = 1,
+    memory: bool = True,
+) -> Dict[str, Any]:
+    """Benchmark every method on one tier and describe the environment it ran in."""
+    from app.services.langsmith_service import LANGCHAIN_AVAILABLE
+
+    results = {}
+    for method in methods or METHODS:
+        if METHODS[method][0] == 'langsmith' and not LANGCHAIN_AVAILABLE:
+            print(f"Skipping {method}: langsmith is not installed")
+            continue
+        results[method] = run_method(tier, method, seed=seed, repeat=repeat, memory=memory)
+    return {
+        'commit': _git_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'tier': tier.name,
+        'seed': seed,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"], capture_output=True).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def load_runs(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    return [orjson.loads(line) for line in path.read_bytes().splitlines() if line.strip()]
+
+
+def save_run(path: Path, run: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("ab") as f:
+        f.write(orjson.dumps(run) + b"\n")
+
+
+def find_baseline(runs: List[Dict[str, Any]], commit: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """The latest run on ``commit``, or the latest run if no commit is given."""
+    for run in reversed(runs):
+        if commit is None or run['commit'].startswith(commit):
+            return run
+    return None
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Compare two runs of a tier, method by method.
+
+    Returns:
+        One row per method and measure found in both runs, with the relative
+        change and whether it is a regression
+    """
+    rows = []
+    for method, now in current['results'].items():
+        before = baseline['results'].get(method)
+        if before is None:
+            continue
+        for measure, limit in (('wall_seconds', threshold), ('peak_bytes', threshold), ('requests', 0.0)):
+            old, new = before.get(measure), now.get(measure)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            rows.append({
+                'method': method,
+                'measure': measure,
+                'baseline': old,
+                'current': new,
+                'change': change,
+                'regression': change > limit,
+            })
+    return rows
+
+
+def _format(measure: str, value: float) -> str:
+    if measure == 'wall_seconds':
+        return f"{value:.3f}s"
+    if measure == 'peak_bytes':
+        return f"{value / 2**10:,.0f}KiB"
+    return f"{value:,}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tier", choices=sorted(TIERS), default="small")
+    parser.add_argument("--method", action="append", choices=list(METHODS), help="benchmark only this method (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per method; the best is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--results", type=Path, help="results file (default: benchmarks/results/<tier>.jsonl)")
+    parser.add_argument("--baseline", help="compare with the latest run on this commit instead of the previous run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="relative slowdown that counts as a regression")
+    parser.add_argument("--no-save", action="store_true", help="do not append this run to the results file")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 on a regression")
+    args = parser.parse_args()
+
+    tier = TIERS[args.tier]
+    path = args.results or RESULTS_DIR / f"{tier.name}.jsonl"
+    history = load_runs(path)
+    baseline = find_baseline([run for run in history if run['seed'] == args.seed], args.baseline)
+
+    print(f"Tier {tier.name}: {tier.repos:,} repos, {tier.prs:,} PRs, {tier.commits:,} commits, {tier.runs:,} runs")
+    run = run_tier(tier, args.method, seed=args.seed, repeat=args.repeat, memory=not args.no_memory)
+
+    print(f"{'method':<22}{'wall':>10}{'peak':>12}{'requests':>12}{'items':>12}")
+    for method, result in run['results'].items():
+        peak = _format('peak_bytes', result['peak_bytes']) if result['peak_bytes'] is not None else "-"
+        print(f"{method:<22}{_format('wall_seconds', result['wall_seconds']):>10}{peak:>12}"
+              f"{result['requests']:>12,}{result['items']:>12,}")
+
+    regressions = []
+    if baseline is not None:
+        print(f"\nCompared with {baseline['commit']} ({baseline['created_at']}):")
+        for row in compare(baseline, run, args.threshold):
+            flag = "  REGRESSION" if row['regression'] else ""
+            print(f"  {row['method']:<22}{row['measure']:<14}{_format(row['measure'], row['baseline']):>12} -> "
+                  f"{_format(row['measure'], row['current']):<12}{row['change']:>+8.1%}{flag}")
+            if row['regression']:
+                regressions.append(row)
+    elif args.baseline:
+        print(f"\nNo {tier.name} run on {args.baseline} in {path}")
+
+    if not args.no_save:
+        save_run(path, run)
+        print(f"\nSaved to {path}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
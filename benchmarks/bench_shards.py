@@ -0,0 +1,92 @@
+"""Benchmark multi-organization collection with increasing numbers of worker processes.
+
+Runs ``ShardedGitHub.get_team_rollups`` over several synthetic organizations
+(see :mod:`benchmarks.synthetic`) with a pool of 1, 2, 4, ... spawned worker
+processes, each of which answers from its own fakes with ``--latency``
+seconds per request. Reports the wall time per level and the speedup and
+parallel efficiency over one process, so a change that serializes the shards
+shows up as flattening speedup. The pool is started before timing.
+
+Usage::
+
+    python -m benchmarks.bench_shards --workers 1,2,4 --orgs 4 --tier small
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import TIERS, FakeGithub, Tier  # noqa: E402
+
+
+def _use_synthetic_github(tier: Tier, seed: int, latency: float) -> None:
+    """Worker initializer: every GitHub client in this process talks to a synthetic org, and no identities are saved."""
+    patch("app.services.github_service.Github", return_value=FakeGithub(tier, seed, latency=latency)).start()
+    patch("app.utils.config.settings.IDENTITY_INDEX_PATH", "").start()
+
+
+def _started(_: int) -> None:
+    time.sleep(0.2)
+
+
+def run_level(tier: Tier, orgs: int, workers: int, latency: float, shard_size: int, seed: int = 0) -> Dict[str, Any]:
+    """Collect every organization once with ``workers`` processes."""
+    from app.services.shards import ShardedGitHub
+    from app.services.team_index import ALL_TEAMS, TeamIndex
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_use_synthetic_github,
+        initargs=(tier, seed, latency),
+    )
+    collector = ShardedGitHub(
+        orgs=[f"org-{i}" for i in range(orgs)],
+        tokens=[f"token-{i}" for i in range(workers)],
+        workers=workers,
+        shard_size=shard_size,
+        executor=executor,
+    )
+    try:
+        list(executor.map(_started, range(workers)))
+        with patch("app.services.github_service.Github", return_value=FakeGithub(tier, seed)):
+            started = time.perf_counter()
+            views = collector.get_team_rollups(TeamIndex(), days=tier.days)
+            seconds = time.perf_counter() - started
+    finally:
+        collector.close()
+
+    expected = orgs * FakeGithub(tier, seed).expected_commits
+    if views[ALL_TEAMS]['total_commits'] != expected:
+        raise RuntimeError(f"Counted {views[ALL_TEAMS]['total_commits']} of {expected} synthetic commits")
+    return {'workers': workers, 'seconds': seconds}
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tier", choices=list(TIERS), default="small")
+    parser.add_argument("--orgs", type=int, default=4, help="Synthetic organizations")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker process counts")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per simulated request")
+    parser.add_argument("--shard-size", type=int, default=25, help="Repositories per shard")
+    args = parser.parse_args(argv)
+
+    tier = TIERS[args.tier]
+    print(f"Tier {tier.name}, {args.orgs} organizations, {args.latency * 1000:.0f} ms per upstream request")
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8} {'efficiency':>11}")
+    baseline = None
+    for workers in (int(level) for level in args.workers.split(",")):
+        result = run_level(tier, args.orgs, workers, args.latency, args.shard_size)
+        baseline = baseline or result['seconds'] * result['workers']
+        speedup = baseline / result['seconds']
+        print(f"{workers:>8} {result['seconds']:>9.2f} {speedup:>8.2f} {speedup / workers:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""Load test the Streamlit dashboard with concurrent simulated sessions.
+
+Each session is a Streamlit ``AppTest`` running ``app/main.py`` in this
+process, so all sessions share the process-wide caches, the section loader
+pool and the GIL, like the sessions of one dashboard container. GitHub and
+LangSmith are replaced by the synthetic fakes in :mod:`benchmarks.synthetic`,
+with ``--latency`` seconds of simulated round trip per API request.
+
+A session loads the dashboard and then, after a random think time, performs
+``--actions`` interactions drawn from: change the date range, switch team,
+and (rarely) hit refresh, which clears the caches for every session. Every
+concurrency level in ``--sessions`` starts from cold caches (after one
+unmeasured session has imported the app) and reports
+p50/p95/p99 rerun latency (overall and per interaction), process CPU time
+and resident memory per session. Compare the levels to find where latency
+starts to degrade and size replicas accordingly.
+
+Usage::
+
+    python -m benchmarks.load_test                                 # 1, 5, 10 and 25 sessions
+    python -m benchmarks.load_test --sessions 10,50 --tier medium --latency 0.1
+    python -m benchmarks.load_test --output load.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from unittest.mock import patch
+
+import orjson
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import TIERS, FakeGithub, FakeLangSmithClient, Tier  # noqa: E402
+
+APP_PATH = ROOT / "app" / "main.py"
+
+# Interaction -> relative frequency
+ACTIONS = {'date_range': 5, 'team': 5, 'refresh': 1}
+DATE_RANGES = (7, 14, 30, 60, 90)  # look-back days offered by the date range action
+
+
+@contextmanager
+def fake_backends(tier: Tier, latency: float = 0.0, teams: int = 5, seed: int = 0) -> Iterator[Tuple[FakeGithub, FakeLangSmithClient]]:
+    """Point the dashboard at synthetic GitHub and LangSmith backends.
+
+    Writes a teams config splitting the synthetic repositories between
+    ``teams`` teams, and keeps snapshots in a temporary directory so every
+    request goes through the services.
+    """
+    from app.services.dashboard_service import clear_dashboard_cache
+    from app.utils.config import get_settings
+
+    github = FakeGithub(tier, seed, latency=latency)
+    langsmith = FakeLangSmithClient(tier, seed, latency=latency)
+    with tempfile.TemporaryDirectory() as workdir:
+        config = Path(workdir) / "teams.json"
+        config.write_text(json.dumps({
+            f"Team {i + 1}": {'repos': [repo.name for repo in github.repositories[i::teams]]}
+            for i in range(teams)
+        }))
+        env = {
+            'GITHUB_TOKEN': "load-test",
+            'GITHUB_ORG': "synthetic",
+            'LANGSMITH_API_KEY': "load-test",
+            'LANGSMITH_PROJECT': "synthetic",
+            'TEAMS_CONFIG': str(config),
+            'TEAMS_FROM_GITHUB': "false",
+            'SNAPSHOT_DIR': str(Path(workdir) / "snapshots"),
+            'PROFILING_ENABLED': "false",
+        }
+        with patch.dict(os.environ, env), \
+                patch("app.services.github_service.Github", return_value=github), \
+                patch("app.services.langsmith_service.Client", return_value=langsmith):
+            get_settings.cache_clear()
+            clear_dashboard_cache(clients=True)
+            try:
+                yield github, langsmith
+            finally:
+                clear_dashboard_cache(clients=True)
+                get_settings.cache_clear()
+
+
+def _rss_bytes() -> int:
+    """Current resident set size, or the peak where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _RSSSampler:
+    """Tracks the peak resident set size while a level runs."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = _rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __enter__(self) -> "_RSSSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def _interact(at: Any, action: str, rng: random.Random) -> None:
+    """Apply one interaction to a session; the caller reruns it."""
+    if action == 'date_range':
+        today = date.today()
+        at.date_input[0].set_value(today - timedelta(days=rng.choice(DATE_RANGES)))
+    elif action == 'team':
+        select = at.selectbox[0]
+        select.select(rng.choice([team for team in select.options if team != select.value] or select.options))
+    elif action == 'refresh':
+        at.button[0].click()
+    else:
+        raise ValueError(f"Unknown action: {action}")
+
+
+def simulate_session(
+    seed: int,
+    actions: int,
+    think_time: float,
+    timeout: float,
+    start: threading.Barrier,
+    samples: List[Dict[str, Any]],
+    sessions: List[Any],
+) -> None:
+    """Load the dashboard, then perform ``actions`` random interactions."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+    sessions.append(at)  # kept alive until the level ends, like an open browser tab
+    plan = ['load', *rng.choices(list(ACTIONS), weights=list(ACTIONS.values()), k=actions)]
+    start.wait()
+    for i, action in enumerate(plan):
+        if i:
+            time.sleep(rng.uniform(0, think_time))
+        started = time.perf_counter()
+        error = None
+        try:
+            if i:
+                _interact(at, action, rng)
+            at.run()
+            if at.exception:
+                error = at.exception[0].value
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        samples.append({'action': action, 'seconds': time.perf_counter() - started, 'error': error})
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of ``values``, for ``q`` between 0 and 100."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[min(int(rank), len(ordered)) - 1]
+
+
+def _latency(samples: List[Dict[str, Any]]) -> Dict[str, float]:
+    seconds = [sample['seconds'] for sample in samples]
+    return {f"p{q}_ms": round(percentile(seconds, q) * 1000, 1) for q in (50, 95, 99)}
+
+
+@contextmanager
+def _shared_runtime() -> Iterator[None]:
+    """Keep a Streamlit runtime installed while sessions run concurrently.
+
+    ``AppTest`` installs a mock ``Runtime`` instance for each run and removes
+    it when the run ends, which would pull it out from under sessions that are
+    still running and leave them with an empty page. Within this block a run
+    still installs its own runtime but never removes one.
+
+    Sessions also share one script cache, as they do under a server, so the
+    app is compiled once. Each ``AppTest`` run otherwise compiles it afresh,
+    and concurrent compiles can fail on Python 3.11 ("AST constructor
+    recursion depth mismatch").
+    """
+    import streamlit.testing.v1.app_test as app_test
+    import streamlit.testing.v1.local_script_runner as local_script_runner
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    class _KeepInstance(type(Runtime)):
+        def __setattr__(cls, name: str, value: Any) -> None:
+            if name == '_instance':
+                if value is not None:
+                    Runtime._instance = value
+                return
+            super().__setattr__(name, value)
+
+    script_cache = ScriptCache()
+    with patch.object(app_test, 'Runtime', _KeepInstance('Runtime', (Runtime,), {})), \
+            patch.object(local_script_runner, 'ScriptCache', lambda: script_cache):
+        try:
+            yield
+        finally:
+            Runtime._instance = None
+
+
+def run_level(
+    sessions: int,
+    actions: int = 5,
+    think_time: float = 1.0,
+    timeout: float = 120.0,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Run ``sessions`` concurrent sessions from cold caches and summarize them."""
+    from streamlit.testing.v1.util import patch_config_options
+
+    from app.services.dashboard_service import clear_dashboard_cache
+
+    clear_dashboard_cache()
+    samples: List[Dict[str, Any]] = []
+    apps: List[Any] = []
+    start = threading.Barrier(sessions + 1)
+    threads = [
+        threading.Thread(
+            target=simulate_session,
+            args=(seed * 100_000 + i, actions, think_time, timeout, start, samples, apps),
+            name=f"session-{i}",
+        )
+        for i in range(sessions)
+    ]
+    for thread in threads:
+        thread.start()
+
+    rss_before = _rss_bytes()
+    # AppTest patches this option for the length of each run and restores it
+    # afterwards, which would switch it off under sessions that are still running
+    with patch_config_options({'global.appTest': True}), _shared_runtime(), _RSSSampler() as rss:
+        start.wait()
+        cpu_started, wall_started = time.process_time(), time.perf_counter()
+        for thread in threads:
+            thread.join()
+        cpu, wall = time.process_time() - cpu_started, time.perf_counter() - wall_started
+    apps.clear()
+
+    by_action = {}
+    for action in ['load', *ACTIONS]:
+        matching = [sample for sample in samples if sample['action'] == action]
+        if matching:
+            by_action[action] = {'reruns': len(matching), **_latency(matching)}
+
+    errors = [sample['error'] for sample in samples if sample['error']]
+    return {
+        'sessions': sessions,
+        'reruns': len(samples),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        **_latency(samples),
+        'by_action': by_action,
+        'wall_seconds': round(wall, 2),
+        'cpu_seconds': round(cpu, 2),
+        'cpu_cores': round(cpu / wall, 2) if wall else 0.0,
+        'cpu_seconds_per_session': round(cpu / sessions, 3),
+        'peak_rss_mib': round(rss.peak / 2**20, 1),
+        'rss_mib_per_session': round(max(rss.peak - rss_before, 0) / sessions / 2**20, 2),
+    }
+
+
+def _print_levels(levels: List[Dict[str, Any]]) -> None:
+    print(f"{'sessions':>8}{'reruns':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'CPU s/sess':>12}{'cores':>7}{'MiB/sess':>10}{'peak MiB':>10}")
+    for level in levels:
+        print(f"{level['sessions']:>8}{level['reruns']:>8}{level['errors']:>8}"
+              f"{level['p50_ms']:>10,.0f}{level['p95_ms']:>10,.0f}{level['p99_ms']:>10,.0f}"
+              f"{level['cpu_seconds_per_session']:>12.3f}{level['cpu_cores']:>7.2f}"
+              f"{level['rss_mib_per_session']:>10.2f}{level['peak_rss_mib']:>10,.0f}")
+    print("\np95 ms by interaction")
+    actions = ['load', *ACTIONS]
+    print(f"{'sessions':>8}" + "".join(f"{action:>12}" for action in actions))
+    for level in levels:
+        row = "".join(
+            f"{level['by_action'][action]['p95_ms']:>12,.0f}" if action in level['by_action'] else f"{'-':>12}"
+            for action in actions
+        )
+        print(f"{level['sessions']:>8}{row}")
+    for level in levels:
+        if level['first_error']:
+            print(f"\n{level['sessions']} sessions, first error: {level['first_error']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", default="1,5,10,25", help="comma-separated concurrency levels")
+    parser.add_argument("--actions", type=int, default=5, help="interactions per session after the first load")
+    parser.add_argument("--think-time", type=float, default=1.0, help="maximum seconds between interactions")
+    parser.add_argument("--tier", choices=sorted(TIERS), default="small")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds per upstream request")
+    parser.add_argument("--teams", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds before a rerun is abandoned")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    # Streamlit warns on every rerun of every session about deprecated
+    # arguments and about sessions created outside `streamlit run`
+    from streamlit import deprecation_util
+    from streamlit.runtime.scriptrunner_utils import script_run_context
+
+    deprecation_util._LOGGER.disabled = True
+    script_run_context._LOGGER.disabled = True
+
+    tier = TIERS[args.tier]
+    levels = []
+    with fake_backends(tier, latency=args.latency, teams=args.teams, seed=args.seed) as (github, langsmith):
+        # Import the app and its dependencies before the first measured level
+        run_level(1, actions=0, timeout=args.timeout)
+        github.requests = langsmith.requests = 0
+        for sessions in (int(level) for level in args.sessions.split(",")):
+            print(f"Running {sessions} session(s)...", flush=True)
+            levels.append(run_level(sessions, args.actions, args.think_time, args.timeout, args.seed))
+        requests = {'github': github.requests, 'langsmith': langsmith.requests}
+
+    print(f"\nTier {tier.name}, {args.latency * 1000:.0f} ms per upstream request, "
+          f"{args.actions} interactions per session, upstream requests: {requests}\n")
+    _print_levels(levels)
+
+    if args.output:
+        args.output.write_bytes(orjson.dumps({
+            'tier': tier.name,
+            'latency': args.latency,
+            'actions': args.actions,
+            'think_time': args.think_time,
+            'upstream_requests': requests,
+            'levels': levels,
+        }, option=orjson.OPT_INDENT_2))
+    return 1 if any(level['errors'] for level in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,388 @@
+"""Deterministic synthetic GitHub orgs and LangSmith projects at several scales.
+
+The fakes stand in for the PyGithub ``Github`` client and the LangSmith
+``Client`` that the services are built on. Items are generated lazily while
+a service iterates over them, so a tier with millions of runs does not have
+to fit in memory before the service under test has even started. The same
+tier and seed always produce the same repositories, authors, PRs, commits and
+runs, so two benchmark runs differ only in the code under test.
+
+Every listing counts the requests the real API would need for it, 100 items
+per page as the services request, and every GraphQL query counts as one, in :attr:`FakeGithub.requests` and
+:attr:`FakeLangSmithClient.requests`. With ``latency`` set, each of those
+requests also waits that long, like a round trip to the real API.
+"""
+import itertools
+import random
+import re
+import threading
+import time
+from bisect import bisect
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+PAGE_SIZE = 100
+PROMPT_TEMPLATES = 200
+AUTHORLESS_EVERY = 33
+
+
+@dataclass(frozen=True)
+class Tier:
+    """Size of a synthetic organization and LangSmith project."""
+
+    name: str
+    repos: int
+    authors: int
+    prs: int
+    commits: int
+    runs: int
+    days: int = 30
+
+
+TIERS = {
+    tier.name: tier
+    for tier in (
+        Tier("tiny", repos=5, authors=10, prs=500, commits=1_000, runs=1_000),
+        Tier("small", repos=100, authors=50, prs=10_000, commits=50_000, runs=50_000),
+        Tier("medium", repos=1_000, authors=300, prs=100_000, commits=500_000, runs=500_000),
+        Tier("large", repos=10_000, authors=2_000, prs=1_000_000, commits=5_000_000, runs=5_000_000),
+    )
+}
+
+
+class _User:
+    __slots__ = ('login',)
+
+    def __init__(self, login: str):
+        self.login = login
+
+
+class _PullRequest:
+    __slots__ = ('number', 'user', 'state', 'created_at', 'merged_at', 'closed_at', 'updated_at')
+
+    def __init__(self, number, user, state, created_at, merged_at, closed_at):
+        self.number = number
+        self.user = user
+        self.state = state
+        self.created_at = created_at
+        self.merged_at = merged_at
+        self.closed_at = closed_at
+        self.updated_at = closed_at or created_at
+
+
+class _Signature:
+    __slots__ = ('date', 'email', 'name')
+
+    def __init__(self, date: datetime, email: str, name: str):
+        self.date = date
+        self.email = email
+        self.name = name
+
+
+class _GitCommit:
+    __slots__ = ('author',)
+
+    def __init__(self, author: _Signature):
+        self.author = author
+
+
+class _Commit:
+    __slots__ = ('sha', 'author', 'commit')
+
+    def __init__(self, sha, author, commit):
+        self.sha = sha
+        self.author = author
+        self.commit = commit
+
+
+class _Run:
+    __slots__ = ('id', 'name', 'run_type', 'error', 'tags', 'start_time', 'end_time', 'outputs', 'prompt')
+
+    def __init__(self, id, name, run_type, error, tags, start_time, end_time, outputs, prompt):
+        self.id = id
+        self.name = name
+        self.run_type = run_type
+        self.error = error
+        self.tags = tags
+        self.start_time = start_time
+        self.end_time = end_time
+        self.outputs = outputs
+        self.prompt = prompt
+
+
+def _split(total: int, parts: int, rng: random.Random) -> List[int]:
+    """Split ``total`` into ``parts`` uneven, non-negative shares."""
+    weights = [rng.paretovariate(1.5) for _ in range(parts)]
+    scale = total / sum(weights)
+    shares = [int(weight * scale) for weight in weights]
+    for i in range(total - sum(shares)):
+        shares[i % parts] += 1
+    return shares
+
+
+class _Authors:
+    """Picks authors with a long-tailed distribution, like most orgs."""
+
+    def __init__(self, count: int):
+        self.users = [_User(f"dev{i:05d}") for i in range(count)]
+        self._cumulative = list(itertools.accumulate(1 / (i + 1) for i in range(count)))
+
+    def pick(self, rng: random.Random) -> _User:
+        return self.users[bisect(self._cumulative, rng.random() * self._cumulative[-1])]
+
+
+class _FakeClient:
+    """Counts simulated requests and optionally waits ``latency`` seconds on each."""
+
+    def __init__(self, latency: float = 0.0):
+        self.requests = 0
+        self.latency = latency
+        self._lock = threading.Lock()
+
+    def _request(self) -> None:
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class _Listing:
+    """A lazily generated listing that makes one request per page consumed."""
+
+    def __init__(self, client: _FakeClient, items: Iterator[Any]):
+        self._client = client
+        self._items = items
+
+    def __iter__(self) -> Iterator[Any]:
+        self._client._request()
+        for served, item in enumerate(self._items, 1):
+            yield item
+            if served % PAGE_SIZE == 0:
+                self._client._request()
+
+
+class FakeRepository:
+    """A repository whose PRs and commits are generated on demand."""
+
+    def __init__(self, client: "FakeGithub", index: int, prs: int, commits: int):
+        self._client = client
+        self.index = index
+        self.name = f"repo-{index:05d}"
+        self.pr_count = prs
+        self.commit_count = commits
+
+    def _rng(self, kind: str) -> random.Random:
+        return random.Random(f"{self._client.seed}:{kind}:{self.index}")
+
+    def get_pulls(self, state: str = 'open', sort: str = 'created', direction: str = 'desc') -> _Listing:
+        return _Listing(self._client, self._pulls())
+
+    def _pulls(self) -> Iterator[_PullRequest]:
+        rng = self._rng("pulls")
+        window = self._client.window_seconds
+        offsets = sorted((rng.random() * window for _ in range(self.pr_count)), reverse=True)
+        for number, offset in zip(range(self.pr_count, 0, -1), offsets):
+            created = self._client.since + timedelta(seconds=offset)
+            roll = rng.random()
+            if roll < 0.7:
+                merged = created + timedelta(hours=rng.expovariate(1 / 20))
+                yield _PullRequest(number, self._client.authors.pick(rng), 'closed', created, merged, merged)
+            elif roll < 0.8:
+                closed = created + timedelta(hours=rng.expovariate(1 / 40))
+                yield _PullRequest(number, self._client.authors.pick(rng), 'closed', created, None, closed)
+            else:
+                yield _PullRequest(number, self._client.authors.pick(rng), 'open', created, None, None)
+        # One PR from before the window, where the services stop listing
+        created = self._client.since - timedelta(days=1)
+        yield _PullRequest(0, self._client.authors.pick(rng), 'closed', created, created, created)
+
+    def get_commits(self, since: Optional[datetime] = None) -> _Listing:
+        return _Listing(self._client, self._commits())
+
+    def _commits(self) -> Iterator[_Commit]:
+        rng = self._rng("commits")
+        window = self._client.window_seconds
+        for i in range(self.commit_count):
+            date = self._client.since + timedelta(seconds=rng.random() * window)
+            # Some commits have no linked GitHub account, made by a bot no PR belongs to
+            if i % AUTHORLESS_EVERY == AUTHORLESS_EVERY - 1:
+                author, signature = None, _Signature(date, f"build@{self.name}.invalid", "Build Bot")
+            else:
+                author = self._client.authors.pick(rng)
+                signature = _Signature(date, f"{author.login}@synthetic.example", author.login.title())
+            yield _Commit(f"{rng.getrandbits(160):040x}", author, _GitCommit(signature))
+
+
+class _FakeRequester:
+    """Answers the services' GraphQL review, commit author and member queries, one request per query.
+
+    Members have no public email, and no commit belongs to a PR.
+    """
+
+    def __init__(self, client: "FakeGithub"):
+        self._client = client
+
+    def graphql_query(self, query: str, variables: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        self._client._request()
+        if "membersWithRole" in query:
+            members = [{'login': user.login, 'name': user.login.title(), 'email': ""} for user in self._client.authors.users]
+            page = {'pageInfo': {'hasNextPage': False, 'endCursor': None}, 'nodes': members}
+            return {}, {'data': {'organization': {'membersWithRole': page}}}
+        if "associatedPullRequests" in query:
+            repository = {
+                alias: {'associatedPullRequests': {'nodes': []}} for alias in re.findall(r"(c\d+): object", query)
+            }
+            return {}, {'data': {'repository': repository}}
+        repository = {
+            f"pr{number}": self._client.pull_request_reviews(variables['name'], int(number))
+            for number in re.findall(r"pr(\d+): pullRequest", query)
+        }
+        return {}, {'data': {'repository': repository}}
+
+
+class FakeOrganization:
+    def __init__(self, client: "FakeGithub"):
+        self._client = client
+
+    def get_repos(self) -> _Listing:
+        return _Listing(self._client, iter(self._client.repositories))
+
+    def get_repo(self, name: str) -> FakeRepository:
+        self._client._request()
+        return self._client.repositories[int(name.rsplit("-", 1)[-1])]
+
+
+class FakeGithub(_FakeClient):
+    """Stands in for ``github.Github`` with a synthetic organization.
+
+    Each repository also lists one PR from before the window, and every
+    ``AUTHORLESS_EVERY``-th commit has no GitHub author that the services
+    could resolve. The totals the
+    services should report are :attr:`expected_prs` and :attr:`expected_commits`.
+    """
+
+    def __init__(self, tier: Tier, seed: int = 0, now: Optional[datetime] = None, latency: float = 0.0):
+        super().__init__(latency)
+        self.tier = tier
+        self.seed = seed
+        self.now = now or datetime.now(timezone.utc)
+        # Start an hour inside the window, since the services compute their
+        # own "now" a moment later
+        self.since = self.now - timedelta(days=tier.days) + timedelta(hours=1)
+        self.window_seconds = (self.now - self.since).total_seconds()
+        self.authors = _Authors(tier.authors)
+
+        self.requester = _FakeRequester(self)
+
+        rng = random.Random(f"{seed}:org")
+        self.repositories = [
+            FakeRepository(self, index, prs, commits)
+            for index, (prs, commits) in enumerate(
+                zip(_split(tier.prs, tier.repos, rng), _split(tier.commits, tier.repos, rng))
+            )
+        ]
+
+    def get_organization(self, login: str) -> FakeOrganization:
+        self._request()
+        return FakeOrganization(self)
+
+    def withLazy(self, lazy: bool) -> "FakeGithub":
+        return self
+
+    def get_repo(self, full_name: str) -> FakeRepository:
+        """A repository by ``org/name``, without a request, like a lazy ``github.Github``."""
+        return self.repositories[int(full_name.rsplit("-", 1)[-1])]
+
+    def pull_request_reviews(self, repo: str, number: int) -> Dict[str, Any]:
+        """A GraphQL ``PullRequest`` node with up to four reviews."""
+        rng = random.Random(f"{self.seed}:reviews:{repo}:{number}")
+        reviews = []
+        submitted = self.since + timedelta(seconds=rng.random() * self.window_seconds)
+        for _ in range(rng.randrange(5)):
+            submitted += timedelta(hours=rng.expovariate(1 / 8))
+            reviews.append({
+                'state': rng.choice(('APPROVED', 'CHANGES_REQUESTED', 'COMMENTED')),
+                'submittedAt': submitted.isoformat(),
+                'author': {'login': self.authors.pick(rng).login},
+            })
+        return {'author': None, 'reviews': {'nodes': reviews}}
+
+    @property
+    def expected_prs(self) -> int:
+        """PRs created within the window, which the services count."""
+        return self.tier.prs
+
+    @property
+    def expected_commits(self) -> int:
+        """Commits with a GitHub author, which the services count."""
+        return sum(repo.commit_count - repo.commit_count // AUTHORLESS_EVERY for repo in self.repositories)
+
+
+class FakeLangSmithClient(_FakeClient):
+    """Stands in for ``langsmith.Client`` with a synthetic project.
+
+    Every fourth run is tagged ``test`` and every tenth is a ``chain`` run;
+    the rest are ``llm`` runs. Prompts are drawn from a fixed set of templates.
+    """
+
+    api_url = "https://api.smith.langchain.com"
+
+    def __init__(self, tier: Tier, seed: int = 0, now: Optional[datetime] = None, latency: float = 0.0):
+        super().__init__(latency)
+        self.tier = tier
+        self.seed = seed
+        self.now = now or datetime.now()
+        self.prompts = [
+            f"Template {i}: summarize the {{document}} for the {{audience}}." for i in range(PROMPT_TEMPLATES)
+        ]
+
+    def list_runs(
+        self,
+        project_name: str,
+        start_time: Optional[str] = None,
+        run_type: Optional[str] = None,
+        tags: Optional[Sequence[str]] = None,
+        **kwargs: Any,
+    ) -> Iterator[_Run]:
+        self._request()
+        served = 0
+        for run in self._runs():
+            if run_type is not None and run.run_type != run_type:
+                continue
+            if tags and not set(tags) <= set(run.tags):
+                continue
+            yield run
+            served += 1
+            if served % PAGE_SIZE == 0:
+                self._request()
+
+    def _runs(self) -> Iterator[_Run]:
+        rng = random.Random(f"{self.seed}:runs")
+        window = (self.tier.days * 86400) - 7200
+        since = self.now - timedelta(days=self.tier.days) + timedelta(hours=1)
+        test_tags, other_tags = ("test", "nightly"), ("production",)
+        for i in range(self.tier.runs):
+            start = since + timedelta(seconds=rng.random() * window)
+            is_test = i % 4 == 0
+            yield _Run(
+                id=f"{rng.getrandbits(128):032x}",
+                name=f"test_case_{rng.randrange(400)}" if is_test else "chat",
+                run_type="chain" if i % 10 == 9 else "llm",
+                error="timeout" if rng.random() < 0.03 else None,
+                tags=test_tags if is_test else other_tags,
+                start_time=start,
+                end_time=start + timedelta(seconds=rng.expovariate(1 / 3)),
+                outputs={'evaluation': {'score': round(rng.random(), 2)}} if is_test else {},
+                prompt=self.prompts[min(int(rng.expovariate(1 / 20)), PROMPT_TEMPLATES - 1)],
+            )
+
+    @property
+    def expected_llm_runs(self) -> int:
+        """Runs of type ``llm``, which prompt coverage counts."""
+        return self.tier.runs - self.tier.runs // 10
+
+    @property
+    def expected_test_runs(self) -> int:
+        """Runs tagged ``test``, which test results count."""
+        return (self.tier.runs + 3) // 4
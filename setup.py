@@ -18,18 +18,22 @@ setup(
     },
     python_requires=">=3.10",
     install_requires=[
-        "streamlit>=1.32.0",
+        "streamlit>=1.37.0",
         "python-dotenv>=1.0.1",
         "pydantic>=2.6.1",
+        "pydantic-settings>=2.2.1",
         "fastapi>=0.109.2",
         "uvicorn>=0.27.0",
-        "PyGithub>=2.1.1",
+        "orjson>=3.9.0",
+        "PyGithub>=2.2.0",
         "langsmith>=0.0.87",
         "pandas>=2.1.4",
         "numpy>=1.26.3",
+        "pyarrow>=14.0.0",
         "plotly>=5.18.0",
         "matplotlib>=3.8.2",
         "requests>=2.31.0",
+        "urllib3>=2.0.0",
         "python-dateutil>=2.8.2",
     ],
     extras_require={
@@ -43,6 +47,9 @@ setup(
             "types-python-dateutil>=2.8.19",
             "types-requests>=2.31.0",
         ],
+        "redis": [
+            "redis>=5.0.0",
+        ],
     },
     classifiers=[
         "Development Status :: 3 - Alpha",
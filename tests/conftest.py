@@ -1,7 +1,9 @@
 """Pytest configuration and fixtures."""
 import os
+import threading
 import pytest
 from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import MagicMock, patch
 
 # Add the project root to the Python path
@@ -17,8 +19,55 @@ load_dotenv()
 
 # Fixtures
 
+
+class LocalServer:
+    """Local HTTP/1.1 server whose responses each test configures."""
+
+    def __init__(self):
+        # Response body, or a function of the request path returning it
+        self.body = b"ok"
+        self.headers = {}
+        # Statuses of the next responses, one per request; 200 once used up
+        self.statuses = []
+        self.url = self.host = None
+
+    def respond(self, path):
+        status = self.statuses.pop(0) if self.statuses else 200
+        return status, self.body(path) if callable(self.body) else self.body
+
+
 @pytest.fixture
-github_service_mock():
+def local_server():
+    """Local HTTP server answering with the body, headers and statuses set on it."""
+    server = LocalServer()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            status, body = server.respond(self.path)
+            self.send_response(status)
+            for name, value in server.headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    server.host = f"127.0.0.1:{httpd.server_port}"
+    server.url = f"http://{server.host}"
+    yield server
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def github_service_mock():
     """Mock GitHub service for testing."""
     with patch('app.services.github_service.Github') as mock_github:
         # Create a mock organization
@@ -51,7 +100,7 @@ github_service_mock():
         yield mock_github
 
 @pytest.fixture
-github_service(github_service_mock):
+def github_service(github_service_mock):
     """GitHub service instance with mocked GitHub API."""
     from app.services.github_service import GitHubService
     return GitHubService(token="test-token", org_name="test-org")
@@ -135,7 +184,7 @@ def mock_coverage_data():
 
 # Configure pytest to use these fixtures for all tests
 @pytest.fixture(autouse=True)
-def setup_test_environment(monkeypatch):
+def setup_test_environment(monkeypatch, tmp_path):
     """Set up test environment."""
     # Set environment variables for testing
     monkeypatch.setenv("GITHUB_TOKEN", "test-token")
@@ -149,6 +198,10 @@ def setup_test_environment(monkeypatch):
     monkeypatch.setattr('requests.get', MagicMock())
     monkeypatch.setattr('requests.post', MagicMock())
     
+    # Keep the commit author identity index out of the working tree
+    from app.utils.config import settings
+    monkeypatch.setattr(settings, 'IDENTITY_INDEX_PATH', str(tmp_path / "identities.json"))
+    
     # Set up test database if needed
     # ...
     
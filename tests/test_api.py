@@ -0,0 +1,134 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.fixture
+def api_client(mock_velocity_data, mock_coverage_data):
+    """Metrics API test client with mocked services and an empty response cache."""
+    from fastapi.testclient import TestClient
+
+    from app.api import routes
+    from app.api.main import create_app
+    from app.utils.cache import get_shared_cache
+
+    github = MagicMock()
+    github.get_team_velocity.return_value = mock_velocity_data
+    langsmith = MagicMock()
+    langsmith.get_prompt_coverage.return_value = mock_coverage_data
+
+    get_shared_cache().clear()
+    with patch.object(routes, 'get_github_service', return_value=github), \
+            patch.object(routes, 'get_langsmith_service', return_value=langsmith):
+        yield TestClient(create_app()), github, langsmith
+    get_shared_cache().clear()
+
+
+class TestMetricsAPI:
+    """Tests for the JSON metrics API."""
+
+    def test_velocity_is_cached(self, api_client):
+        """Test that repeated requests are answered from the response cache."""
+        from app.utils.config import settings
+
+        client, github, _ = api_client
+
+        first = client.get('/api/v1/velocity', params={'days': 7, 'repos': ['b', 'a']})
+        second = client.get('/api/v1/velocity', params={'days': 7, 'repos': ['a', 'b']})
+
+        assert first.status_code == second.status_code == 200
+        assert first.json()['prs_merged'] == 12
+        assert first.content == second.content
+        github.get_team_velocity.assert_called_once_with(
+            days=7, repo_names=['a', 'b'], timeout=settings.FETCH_TIME_BUDGET
+        )
+
+    def test_reviews_include_review_metrics(self, api_client):
+        """Test that the reviews endpoint asks for the review metrics."""
+        from app.utils.config import settings
+
+        client, github, _ = api_client
+        github.get_pr_metrics.return_value = {'total_prs': 3, 'avg_review_rounds': 1.5}
+
+        response = client.get('/api/v1/reviews', params={'days': 14})
+
+        assert response.status_code == 200
+        assert response.json()['avg_review_rounds'] == 1.5
+        github.get_pr_metrics.assert_called_once_with(
+            days=14, repo_names=None, timeout=settings.FETCH_TIME_BUDGET, reviews=True
+        )
+
+    def test_etag_revalidation(self, api_client):
+        """Test that a matching If-None-Match gets an empty 304."""
+        client, _, _ = api_client
+
+        response = client.get('/api/v1/prompt-coverage')
+        etag = response.headers['ETag']
+        revalidated = client.get('/api/v1/prompt-coverage', headers={'If-None-Match': etag})
+        changed = client.get('/api/v1/prompt-coverage', headers={'If-None-Match': '"stale"'})
+
+        assert revalidated.status_code == 304
+        assert revalidated.content == b''
+        assert revalidated.headers['ETag'] == etag
+        assert changed.status_code == 200
+
+    def test_gzip_compression(self, api_client):
+        """Test that large responses are gzip-compressed."""
+        client, github, _ = api_client
+        github.get_team_velocity.return_value = {'commits_by_author': {f'user{i}': i for i in range(500)}}
+
+        response = client.get(
+            '/api/v1/velocity', headers={'Accept-Encoding': 'gzip'}, params={'days': 90}
+        )
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.json()['commits_by_author']['user7'] == 7
+
+    def test_unconfigured_service_returns_503(self, api_client):
+        """Test that a missing LangSmith configuration maps to 503."""
+        from app.api import routes
+
+        client, _, _ = api_client
+        with patch.object(routes, 'get_langsmith_service', side_effect=ValueError("no key")):
+            response = client.get('/api/v1/test-results')
+
+        assert response.status_code == 503
+
+    def test_query_validation(self, api_client):
+        """Test that out-of-range look-back windows are rejected."""
+        client, _, _ = api_client
+        assert client.get('/api/v1/velocity', params={'days': 0}).status_code == 422
+
+    def test_metrics_endpoint(self, api_client):
+        """Test that metrics are served in the Prometheus text format."""
+        client, _, _ = api_client
+        client.get('/api/v1/velocity')
+        client.get('/api/v1/velocity')
+
+        response = client.get('/api/v1/metrics')
+
+        assert response.status_code == 200
+        assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+        assert '# TYPE cache_requests_total counter' in response.text
+        assert 'cache_requests_total{cache="shared",result="hit"}' in response.text
+
+    def test_export_streams_records(self, api_client):
+        """Test that exports are streamed as an attachment and unknown sources are 404."""
+        from datetime import datetime, timezone
+
+        client, github, _ = api_client
+        github.iter_commit_records.return_value = iter([
+            {'repo': 'web', 'sha': 'abc', 'author': 'alice', 'committed_at': datetime(2024, 1, 1, tzinfo=timezone.utc)},
+        ])
+
+        response = client.get('/api/v1/export/github_commits', params={'format': 'ndjson', 'repos': ['web']})
+
+        assert response.status_code == 200
+        assert response.headers['Content-Type'] == 'application/x-ndjson'
+        assert response.headers['Content-Disposition'] == 'attachment; filename="github_commits.ndjson"'
+        assert response.json()['sha'] == 'abc'
+        assert github.iter_commit_records.call_args.args[1] == ['web']
+        assert client.get('/api/v1/export/tickets').status_code == 404
+        assert client.get('/api/v1/export/github_prs', params={'format': 'xlsx'}).status_code == 422
+        assert client.get('/api/v1/export/github_prs', params={'days': 100_000}).status_code == 422
+        github.iter_pr_records.assert_not_called()
@@ -0,0 +1,104 @@
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+
+def _commit(repo, sha, day, hour=12):
+    return {
+        'repo': repo,
+        'sha': sha,
+        'author': 'alice',
+        'committed_at': datetime(2024, 1, day, hour, tzinfo=timezone.utc),
+    }
+
+
+@pytest.fixture
+def archive(tmp_path):
+    from app.services.archive import COMMITS, MetricsArchive
+
+    archive = MetricsArchive(tmp_path)
+    archive.write(COMMITS, [
+        _commit('web', 'a', 1), _commit('web', 'b', 2), _commit('api', 'c', 2), _commit('api', 'd', 3),
+    ])
+    return archive
+
+
+class TestMetricsArchive:
+    """Tests for the Parquet metrics archive."""
+
+    def test_scan_filters_by_date_and_repo(self, archive):
+        """Test that date and repository filters select the matching rows."""
+        from app.services.archive import COMMITS
+
+        table = archive.scan(COMMITS, start=date(2024, 1, 2), repos=['api'])
+
+        assert sorted(table['sha'].to_pylist()) == ['c', 'd']
+        assert archive.scan(COMMITS).num_rows == 4
+
+    def test_filters_prune_partitions(self, archive):
+        """Test that date and repo predicates skip non-matching files entirely."""
+        from app.services.archive import COMMITS
+
+        dataset = archive.dataset(COMMITS)
+        predicate = archive._predicate(date(2024, 1, 2), date(2024, 1, 2), ['web'])
+
+        assert len(list(dataset.get_fragments())) == 4
+        assert len(list(dataset.get_fragments(filter=predicate))) == 1
+
+    def test_rewriting_a_day_replaces_it(self, archive):
+        """Test that re-archiving a day does not duplicate its records."""
+        from app.services.archive import COMMITS
+
+        archive.write(COMMITS, [_commit('web', 'b', 2), _commit('web', 'e', 2, hour=13)])
+
+        assert archive.daily_counts(COMMITS, repos=['web']) == [
+            (date(2024, 1, 1), 1), (date(2024, 1, 2), 2),
+        ]
+        assert archive.scan(COMMITS, repos=['api']).num_rows == 2
+
+    def test_where_filters_on_columns(self, archive):
+        """Test that extra column predicates are applied."""
+        import pyarrow.dataset as ds
+
+        from app.services.archive import COMMITS
+
+        table = archive.scan(COMMITS, where=ds.field('sha') == 'c', columns=['sha', 'repo'])
+
+        assert table.to_pylist() == [{'sha': 'c', 'repo': 'api'}]
+
+    def test_empty_archive(self, tmp_path):
+        """Test that querying a source with no data returns an empty table."""
+        from app.services.archive import PRS, MetricsArchive
+
+        archive = MetricsArchive(tmp_path)
+
+        assert archive.scan(PRS).num_rows == 0
+        assert archive.daily_counts(PRS) == []
+        with pytest.raises(ValueError):
+            archive.scan('unknown')
+
+    def test_archive_once_writes_each_source(self, tmp_path):
+        """Test that a worker archive pass stores records from both services."""
+        from app.services.archive import COMMITS, PRS, RUNS, MetricsArchive
+        from app.worker import archive_once
+
+        now = datetime.now(timezone.utc)
+        github = MagicMock()
+        github.get_pr_records.return_value = [{
+            'repo': 'web', 'number': 1, 'author': 'alice', 'state': 'closed', 'merged': True,
+            'created_at': now - timedelta(hours=5), 'merged_at': now, 'closed_at': now,
+        }]
+        github.get_commit_records.return_value = [_commit('web', 'a', 1)]
+        langsmith = MagicMock()
+        langsmith.get_run_records.side_effect = RuntimeError("boom")
+
+        written = archive_once(MetricsArchive(tmp_path), github, langsmith, days=3)
+
+        assert written == {PRS: 1, COMMITS: 1}
+        since = github.get_pr_records.call_args.args[0]
+        assert since.date() == now.date() - timedelta(days=2)
+        assert (since.hour, since.minute) == (0, 0)
+        assert RUNS not in written
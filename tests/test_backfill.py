@@ -0,0 +1,115 @@
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+
+class _Pages:
+    """Newest-first PR listing that counts the pages requested."""
+
+    def __init__(self, prs, per_page):
+        self.prs = prs
+        self.per_page = per_page
+        self.requested = []
+
+    def get_page(self, i):
+        self.requested.append(i)
+        return self.prs[i * self.per_page:(i + 1) * self.per_page]
+
+
+class TestBackfill:
+    """Tests for the checkpointed archive backfill."""
+
+    def test_slices_are_aligned_across_days(self):
+        """Test that a run on the next day plans the same units except the newest."""
+        from app.backfill import plan_units
+
+        repos = {'github_commits': ['web', 'api']}
+        today = plan_units(repos, days=30, slice_days=7, today=date(2024, 3, 10))
+        tomorrow = plan_units(repos, days=30, slice_days=7, today=date(2024, 3, 11))
+
+        assert today[0].start <= date(2024, 2, 10) and today[-1].end == date(2024, 3, 11)
+        assert all((unit.end - unit.start).days <= 7 for unit in today)
+        assert all((unit.start - date(1970, 1, 1)).days % 7 == 0 for unit in today)
+        assert today[:-2] == tomorrow[:len(today) - 2]
+        assert [unit.start for unit in today] == sorted(unit.start for unit in today)
+
+    def test_interrupted_backfill_resumes(self, tmp_path):
+        """Test that a second run only fetches the units the first one did not finish."""
+        from app.backfill import Checkpoint, plan_units, run_backfill
+        from app.services.archive import COMMITS, MetricsArchive
+
+        units = plan_units({COMMITS: ['web', 'api']}, days=21, slice_days=7, today=date(2024, 1, 20))
+        archive = MetricsArchive(tmp_path / "archive")
+        fetched = []
+
+        def fetch(unit):
+            fetched.append(unit)
+            if unit.repo == 'api' and broken:
+                raise RuntimeError("502 Bad Gateway")
+            return [{'repo': unit.repo, 'sha': f"{unit.repo}-{unit.start}", 'author': 'alice',
+                     'committed_at': unit.since + timedelta(hours=1)}]
+
+        broken = True
+        checkpoint = Checkpoint(tmp_path / "backfill.sqlite")
+        first = run_backfill(units, {COMMITS: fetch}, archive, checkpoint, workers=3, max_attempts=2)
+        checkpoint.close()
+
+        api_units = [unit for unit in units if unit.repo == 'api']
+        assert first.done == len(units) - len(api_units)
+        assert first.failed == len(api_units)
+        assert len(fetched) == len(units) + len(api_units)
+
+        broken = False
+        fetched.clear()
+        checkpoint = Checkpoint(tmp_path / "backfill.sqlite")
+        second = run_backfill(units, {COMMITS: fetch}, archive, checkpoint, workers=3)
+
+        assert sorted(fetched, key=str) == sorted(api_units, key=str)
+        assert second.resumed == len(units) - len(api_units)
+        assert second.remaining == 0 and second.eta_seconds == 0
+        assert archive.scan(COMMITS).num_rows == len(units)
+        assert checkpoint.pending(units) == []
+
+    def test_pr_slice_skips_newer_pages(self, github_service):
+        """Test that a historical PR slice bisects to its pages instead of listing every newer PR."""
+        now = datetime(2024, 6, 1, tzinfo=timezone.utc)
+        prs = [
+            SimpleNamespace(number=n, user=SimpleNamespace(login="alice"), state="closed",
+                            created_at=now - timedelta(days=n), merged_at=None, closed_at=None,
+                            updated_at=now - timedelta(days=n))
+            for n in range(200)
+        ]
+        pages = _Pages(prs, per_page=5)
+        repo = github_service.org.get_repo.return_value
+        repo.get_pulls.return_value = pages
+
+        records = github_service.get_pr_records(now - timedelta(days=150), [repo.name], until=now - timedelta(days=140))
+
+        assert [record['number'] for record in records] == list(range(141, 151))
+        assert len(set(pages.requested)) < 15
+
+
+class TestTokenBucket:
+    """Tests for the request budget."""
+
+    def test_acquire_waits_for_refill(self):
+        """Test that a burst is served at once and later requests wait for tokens."""
+        from app.utils.rate_limit import TokenBucket
+
+        clock = SimpleNamespace(now=0.0)
+        slept = []
+
+        def sleep(seconds):
+            slept.append(seconds)
+            clock.now += seconds
+
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: clock.now, sleep=sleep)
+
+        assert [bucket.acquire() for _ in range(2)] == [0, 0]
+        assert bucket.acquire() == pytest.approx(0.5)
+        clock.now += 10
+        assert bucket.acquire() == 0
+        assert sum(slept) == pytest.approx(0.5)
@@ -0,0 +1,72 @@
+import pytest
+
+
+class TestBenchmarks:
+    """Tests for the synthetic data and the service benchmark runner."""
+
+    def test_synthetic_org_is_deterministic(self):
+        """Test that a tier and seed always generate the same items."""
+        from benchmarks.synthetic import TIERS, FakeGithub
+
+        def listing(seed):
+            client = FakeGithub(TIERS['tiny'], seed=seed)
+            repo = client.get_organization("synthetic").get_repos()
+            return [(pr.number, pr.user.login, pr.state) for r in repo for pr in r.get_pulls()]
+
+        assert listing(0) == listing(0)
+        assert listing(0) != listing(1)
+
+    def test_run_tier_counts_every_item(self):
+        """Test that each method is measured and has counted every synthetic item."""
+        from benchmarks.bench_services import METHODS, run_tier
+        from benchmarks.synthetic import TIERS
+
+        run = run_tier(TIERS['tiny'])
+
+        assert set(run['results']) == set(METHODS)
+        prs = run['results']['get_pr_metrics']
+        assert prs['items'] == TIERS['tiny'].prs
+        assert prs['peak_bytes'] > 0
+        # The org, the repository listing, and a page per 100 PRs of each repository
+        assert prs['requests'] >= 2 + TIERS['tiny'].prs // 100
+        assert run['results']['get_test_results']['items'] == 250
+
+    def test_compare_flags_regressions(self, tmp_path):
+        """Test that slower runs and extra requests are regressions, and runs are saved in order."""
+        from benchmarks.bench_services import compare, find_baseline, load_runs, save_run
+
+        def run(commit, seconds, requests):
+            return {'commit': commit, 'results': {'get_pr_metrics': {
+                'wall_seconds': seconds, 'peak_bytes': 1000, 'requests': requests, 'items': 10,
+            }}}
+
+        path = tmp_path / "tiny.jsonl"
+        save_run(path, run("aaa1111", 1.0, 50))
+        save_run(path, run("bbb2222", 1.1, 50))
+        runs = load_runs(path)
+
+        assert find_baseline(runs)['commit'] == "bbb2222"
+        assert find_baseline(runs, "aaa")['commit'] == "aaa1111"
+        rows = {row['measure']: row for row in compare(find_baseline(runs, "aaa"), run("ccc3333", 1.5, 51))}
+        assert rows['wall_seconds']['regression']
+        assert rows['wall_seconds']['change'] == pytest.approx(0.5)
+        assert rows['requests']['regression']
+        assert not rows['peak_bytes']['regression']
+        assert not any(row['regression'] for row in compare(runs[0], runs[1]))
+
+    def test_load_test_drives_concurrent_sessions(self):
+        """Test that concurrent dashboard sessions rerun against the fake backends."""
+        from benchmarks.load_test import fake_backends, percentile, run_level
+        from benchmarks.synthetic import TIERS
+
+        with fake_backends(TIERS['tiny'], teams=2) as (github, langsmith):
+            level = run_level(2, actions=2, think_time=0)
+
+        assert level['errors'] == 0, level['first_error']
+        assert level['reruns'] == 6
+        assert level['by_action']['load']['reruns'] == 2
+        assert 0 < level['p50_ms'] <= level['p95_ms'] <= level['p99_ms']
+        assert level['cpu_seconds'] > 0
+        assert github.requests > 0 and langsmith.requests > 0
+        assert percentile([4, 1, 3, 2], 50) == 2
+        assert percentile([4, 1, 3, 2], 99) == 4
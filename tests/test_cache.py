@@ -0,0 +1,142 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSharedCache:
+    """Tests for the process-wide SharedCache."""
+
+    def test_hit_and_miss_metrics(self):
+        """Test that repeated lookups are served from the cache and counted."""
+        from app.utils.cache import SharedCache
+
+        cache = SharedCache()
+        compute = MagicMock(return_value={'prs_merged': 3})
+
+        assert cache.get_or_compute('velocity', compute) == {'prs_merged': 3}
+        assert cache.get_or_compute('velocity', compute) == {'prs_merged': 3}
+
+        compute.assert_called_once()
+        stats = cache.stats()
+        assert stats['keys']['velocity'] == {'hits': 1, 'misses': 1, 'waits': 0, 'errors': 0}
+        assert stats['entries'] == 1
+
+    def test_ttl_expiry(self):
+        """Test that values are recomputed once their TTL has passed."""
+        from app.utils.cache import SharedCache
+
+        clock = FakeClock()
+        cache = SharedCache(default_ttl=10, clock=clock)
+        compute = MagicMock(side_effect=[1, 2])
+
+        assert cache.get_or_compute('k', compute) == 1
+        clock.now = 9
+        assert cache.get_or_compute('k', compute) == 1
+        clock.now = 10
+        assert cache.get_or_compute('k', compute) == 2
+
+    def test_lru_eviction_by_entries_and_bytes(self):
+        """Test that the least recently used values are evicted first."""
+        from app.utils.cache import SharedCache, estimate_size
+
+        cache = SharedCache(max_entries=2)
+        cache.get_or_compute('a', lambda: 1)
+        cache.get_or_compute('b', lambda: 2)
+        cache.get_or_compute('a', lambda: 1)
+        cache.get_or_compute('c', lambda: 3)
+
+        assert cache.stats()['evictions'] == 1
+        assert cache.get_or_compute('a', lambda: 'recomputed') == 1
+        assert cache.get_or_compute('b', lambda: 'recomputed') == 'recomputed'
+
+        payload = 'x' * 1000
+        cache = SharedCache(max_bytes=int(estimate_size(payload) * 1.5))
+        cache.get_or_compute('first', lambda: payload)
+        cache.get_or_compute('second', lambda: payload)
+        assert len(cache) == 1
+        assert cache.size_bytes <= cache.max_bytes
+
+    def test_single_flight_deduplicates_concurrent_loads(self):
+        """Test that concurrent identical requests share one computation."""
+        from app.utils.cache import SharedCache
+
+        cache = SharedCache()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(timeout=5)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        while cache.stats()['keys'].get('k', {}).get('waits', 0) < 7:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert results == ['value'] * 8
+        assert len(calls) == 1
+        assert cache.stats()['keys']['k']['waits'] == 7
+
+    def test_errors_propagate_and_are_not_cached(self):
+        """Test that a failed computation is retried on the next call."""
+        from app.utils.cache import SharedCache
+
+        cache = SharedCache()
+        with pytest.raises(RuntimeError):
+            cache.get_or_compute('k', MagicMock(side_effect=RuntimeError("rate limited")))
+
+        assert cache.get_or_compute('k', lambda: 'ok') == 'ok'
+        assert cache.stats()['keys']['k']['errors'] == 1
+
+    def test_invalidate_by_predicate(self):
+        """Test that invalidation only drops matching keys."""
+        from app.utils.cache import SharedCache
+
+        cache = SharedCache()
+        cache.get_or_compute(('velocity', 7), lambda: 1)
+        cache.get_or_compute(('other', 7), lambda: 2)
+
+        assert cache.invalidate(lambda key: key[0] == 'velocity') == 1
+        assert cache.get_or_compute(('other', 7), lambda: 'recomputed') == 2
+
+    def test_invalidate_during_flight(self):
+        """Test that a computation started before invalidation is neither joined nor cached."""
+        from app.utils.cache import SharedCache
+
+        cache = SharedCache()
+        started, release = threading.Event(), threading.Event()
+
+        def stale():
+            started.set()
+            release.wait(timeout=5)
+            return 'stale'
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(cache.get_or_compute('k', stale)))
+        leader.start()
+        assert started.wait(timeout=5)
+        cache.invalidate()
+
+        assert cache.get_or_compute('k', lambda: 'fresh') == 'fresh'
+        release.set()
+        leader.join(timeout=5)
+        assert results == ['stale']
+        assert cache.get_or_compute('k', lambda: 'recomputed') == 'fresh'
@@ -0,0 +1,162 @@
+import fnmatch
+from unittest.mock import MagicMock
+
+import pytest
+
+from tests.test_cache import FakeClock
+
+
+class FakeRedis:
+    """In-memory stand-in for the subset of redis.Redis the backend uses."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.data = {}
+
+    def get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= self.clock():
+            del self.data[key]
+            return None
+        return value
+
+    def set(self, key, value, px=None):
+        self.data[key] = (value, self.clock() + px / 1000 if px is not None else None)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, match, count=None):
+        return [key for key in list(self.data) if fnmatch.fnmatchcase(key, match)]
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def backend(request):
+    from app.utils.cache_backends import MemoryBackend, RedisBackend
+
+    clock = FakeClock()
+    if request.param == 'memory':
+        return MemoryBackend(clock=clock), clock
+    return RedisBackend(client=FakeRedis(clock)), clock
+
+
+class TestCacheBackends:
+    """Tests for the cache backends and ResultCache."""
+
+    def test_get_set_and_ttl(self, backend):
+        """Test that values round-trip and expire after their TTL."""
+        backend, clock = backend
+
+        backend.set('a', b'1', ttl=10)
+        backend.set('b', b'2')
+        assert backend.get('a') == b'1'
+
+        clock.now = 11
+        assert backend.get('a') is None
+        assert backend.get('b') == b'2'
+
+    def test_delete_prefix(self, backend):
+        """Test that a namespace can be dropped without touching other keys."""
+        backend, _ = backend
+        backend.set('ns:v1:a', b'1')
+        backend.set('ns:v1:b', b'2')
+        backend.set('other:a', b'3')
+
+        assert backend.delete_prefix('ns:v1:') == 2
+        assert backend.get('ns:v1:a') is None
+        assert backend.get('other:a') == b'3'
+
+    def test_memory_backend_is_bounded(self):
+        """Test LRU eviction by entry count and by total size."""
+        from app.utils.cache_backends import MemoryBackend
+
+        backend = MemoryBackend(max_entries=2, max_bytes=10)
+        backend.set('a', b'1')
+        backend.set('b', b'2')
+        backend.get('a')
+        backend.set('c', b'3')
+        assert backend.get('b') is None
+        assert backend.get('a') == b'1'
+
+        backend.set('big', b'x' * 9)
+        assert backend.get('c') is None
+        assert len(backend) == 2
+        backend.set('huge', b'x' * 11)
+        assert backend.get('huge') is None
+
+    def test_result_cache_compresses_large_values(self, backend):
+        """Test that large values are stored compressed and read back intact."""
+        from app.utils.cache_backends import ResultCache
+
+        backend, _ = backend
+        cache = ResultCache(backend, compress_min_bytes=100)
+        large = {'commits_by_author': {f'user{i}': i for i in range(1000)}}
+
+        cache.set('large', large)
+        cache.set('small', {'prs_merged': 1})
+
+        assert cache.get('large') == large
+        assert cache.get('small') == {'prs_merged': 1}
+        assert backend.get(cache._key('large'))[:1] == b'\x01'
+        assert backend.get(cache._key('small'))[:1] == b'\x00'
+
+    def test_versions_do_not_share_keys(self, backend):
+        """Test that bumping the cache version hides older entries."""
+        from app.utils.cache_backends import ResultCache
+
+        backend, _ = backend
+        ResultCache(backend, version=1).set('velocity', 1)
+
+        assert ResultCache(backend, version=1).get('velocity') == 1
+        assert ResultCache(backend, version=2).get('velocity') is None
+        assert ResultCache(backend, namespace='other').get('velocity') is None
+
+    def test_clearing_a_scope_keeps_other_entries(self, backend):
+        """Test that a scoped view only clears its own entries, and clearing the cache clears every scope."""
+        from app.utils.cache_backends import ResultCache
+
+        backend, _ = backend
+        cache = ResultCache(backend)
+        dashboard = cache.scoped('dashboard')
+        cache.set('timelines', 1)
+        dashboard.set('velocity', 2)
+
+        assert dashboard.get('timelines') is None and cache.get('velocity') is None
+        dashboard.clear()
+        assert dashboard.get('velocity') is None and cache.get('timelines') == 1
+        dashboard.set('velocity', 2)
+        cache.clear()
+        assert dashboard.get('velocity') is None
+
+    def test_get_or_set_computes_once(self, backend):
+        """Test that cached falsy values are hits and backend errors are misses."""
+        from app.utils.cache_backends import ResultCache
+
+        backend, _ = backend
+        cache = ResultCache(backend)
+        compute = MagicMock(return_value=0)
+
+        assert cache.get_or_set('zero', compute) == 0
+        assert cache.get_or_set('zero', compute) == 0
+        compute.assert_called_once()
+
+        broken = ResultCache(MagicMock(get=MagicMock(side_effect=ConnectionError)))
+        assert broken.get_or_set('x', lambda: 5) == 5
+        assert broken.stats() == {'hits': 0, 'misses': 1}
+
+    def test_services_share_results_through_the_cache(self, github_service_mock):
+        """Test that a second service instance is served from the shared cache."""
+        from app.services.github_service import GitHubService
+        from app.utils.cache_backends import MemoryBackend, ResultCache
+
+        cache = ResultCache(MemoryBackend())
+        first = GitHubService(token='t', org_name='org', cache=cache)
+        second = GitHubService(token='t', org_name='org', cache=cache)
+
+        velocity = first.get_team_velocity(days=7, repo_names=['b', 'a'])
+        org = github_service_mock.return_value.get_organization.return_value
+        calls = org.get_repo.call_count
+
+        assert second.get_team_velocity(days=7, repo_names=['a', 'b']) == velocity
+        assert org.get_repo.call_count == calls
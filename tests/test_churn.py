@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone
+
+from github import GithubException
+
+
+def _week(days_ago):
+    now = datetime.now(timezone.utc)
+    return int((now - timedelta(days=days_ago)).timestamp())
+
+
+class _Stats:
+    """Answers /stats requests with 202 for the first ``computing`` requests per endpoint."""
+
+    def __init__(self, computing, code_frequency, contributors):
+        self.computing = dict.fromkeys(['code_frequency', 'contributors'], computing)
+        self.responses = {'code_frequency': code_frequency, 'contributors': contributors}
+        self.requested = []
+
+    def __call__(self, verb, url):
+        endpoint = url.rsplit("/", 1)[-1]
+        self.requested.append(endpoint)
+        if self.computing[endpoint]:
+            self.computing[endpoint] -= 1
+            return {}, {}
+        response = self.responses[endpoint]
+        if isinstance(response, Exception):
+            raise response
+        return {}, response
+
+
+class TestPoll:
+    """Tests for polling sources that are not ready yet."""
+
+    def test_retries_until_ready_within_the_budget(self):
+        """Test that sources are retried while not ready and left pending at the deadline."""
+        from app.services.collection import Completeness, poll
+
+        attempts = {'web': 0}
+
+        def web():
+            attempts['web'] += 1
+            return "stats" if attempts['web'] == 3 else None
+
+        def broken():
+            raise RuntimeError("500 Internal Server Error")
+
+        completeness = Completeness()
+        results = poll(
+            {'web': web, 'api': lambda: None, 'infra': broken}, timeout=0.5, completeness=completeness, interval=0.02
+        )
+
+        assert results == {'web': "stats"} and attempts['web'] == 3
+        assert completeness.done == ['web'] and completeness.pending == ['api']
+        assert completeness.failed == {'infra': "500 Internal Server Error"}
+        assert completeness.timed_out
+
+
+class TestCodeChurn:
+    """Tests for churn from GitHub's repository statistics."""
+
+    def test_churn_is_polled_and_cached_by_pushed_at(self, github_service, monkeypatch):
+        """Test that 202 answers are polled and a repository is not requested again until it is pushed to."""
+        from app.services import collection
+        from app.utils.cache_backends import MemoryBackend, ResultCache
+
+        monkeypatch.setattr(collection.settings, 'STATS_POLL_INTERVAL', 0.01)
+
+        repo = github_service.org.get_repo.return_value
+        repo.url = "https://api.github.com/repos/test-org/test-repo"
+        repo.pushed_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        stats = _Stats(
+            computing=2,
+            code_frequency=[[_week(3), 120, -40], [_week(100), 5000, -5000]],
+            contributors=[
+                {'author': {'login': "alice"}, 'weeks': [
+                    {'w': _week(3), 'a': 100, 'd': 30, 'c': 4}, {'w': _week(100), 'a': 5000, 'd': 5000, 'c': 9},
+                ]},
+                {'author': {'login': "bob"}, 'weeks': [{'w': _week(3), 'a': 10, 'd': 10, 'c': 1}]},
+            ],
+        )
+        github_service.github.requester.requestJsonAndCheck.side_effect = stats
+        github_service.cache = ResultCache(MemoryBackend())
+
+        churn = github_service.get_code_churn(days=14, repo_names=[repo.name], timeout=5)
+
+        assert churn['lines_added'] == 120 and churn['lines_deleted'] == 40
+        assert churn['churn_by_repo'] == {'test-repo': {'additions': 120, 'deletions': 40, 'commits': 5}}
+        assert churn['churn_by_author']['alice'] == {'additions': 100, 'deletions': 30, 'commits': 4}
+        assert churn['completeness']['complete']
+        assert len(stats.requested) == 6
+
+        stats.requested.clear()
+        github_service.get_code_churn(days=14, repo_names=[repo.name], timeout=5)
+        assert stats.requested == []
+
+        repo.pushed_at = datetime(2024, 5, 2, tzinfo=timezone.utc)
+        github_service.get_code_churn(days=14, repo_names=[repo.name], timeout=5)
+        assert sorted(stats.requested) == ['code_frequency', 'contributors']
+
+    def test_large_repository_totals_come_from_contributors(self, github_service):
+        """Test that a 422 from code frequency falls back to summing the contributors."""
+        repo = github_service.org.get_repo.return_value
+        repo.url = "https://api.github.com/repos/test-org/test-repo"
+        github_service.github.requester.requestJsonAndCheck.side_effect = _Stats(
+            computing=0,
+            code_frequency=GithubException(422, {'message': "too many commits"}),
+            contributors=[{'author': None, 'weeks': [{'w': _week(3), 'a': 7, 'd': 2, 'c': 1}]}],
+        )
+
+        churn = github_service.get_code_churn(days=14, repo_names=[repo.name], timeout=5)
+
+        assert churn['lines_added'] == 7 and churn['lines_deleted'] == 2
+        assert churn['churn_by_author'] == {}
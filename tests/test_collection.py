@@ -0,0 +1,125 @@
+import threading
+
+
+class TestCollect:
+    """Tests for deadline-bounded collection."""
+
+    def test_slow_and_failing_sources_do_not_block(self):
+        """Test that the deadline returns the records so far and reports slow and failed sources."""
+        from app.services.collection import Completeness, collect
+        from app.utils.metrics import add_list_page
+
+        release = threading.Event()
+
+        def fast():
+            add_list_page()
+            add_list_page()
+            return iter(range(3))
+
+        def slow():
+            yield 100
+            release.wait(5)
+            yield 101
+
+        def broken():
+            raise RuntimeError("502 Bad Gateway")
+            yield
+
+        completeness = Completeness()
+        try:
+            records = list(collect(
+                {('web', 'pulls'): fast, ('api', 'pulls'): slow, ('infra', 'pulls'): broken},
+                timeout=0.5,
+                completeness=completeness,
+            ))
+        finally:
+            release.set()
+
+        assert sorted(records) == [0, 1, 2]
+        assert completeness.done == ['web']
+        assert completeness.pending == ['api']
+        assert completeness.failed == {'infra': "502 Bad Gateway"}
+        assert completeness.timed_out and not completeness.complete
+        assert completeness.pages == 2
+
+    def test_timed_out_lister_stops(self):
+        """Test that a lister still running at the deadline stops paging and is closed."""
+        import time
+
+        from app.services.collection import Completeness, collect
+
+        requested = []
+        closed = threading.Event()
+
+        def endless():
+            try:
+                for page in range(1000):
+                    requested.append(page)
+                    time.sleep(0.05)
+                    yield page
+            finally:
+                closed.set()
+
+        completeness = Completeness()
+        records = list(collect({('web', 'commits'): endless}, timeout=0.3, completeness=completeness))
+
+        assert closed.wait(1)
+        pages = len(requested)
+        time.sleep(0.2)
+        # The listing ended with at most the page in flight at the deadline
+        assert len(requested) == pages < 10
+        assert records == [] and completeness.pending == ['web']
+
+    def test_without_timeout_waits_for_every_source(self):
+        """Test that a source is done only once all of its listings finished."""
+        from app.services.collection import Completeness, collect
+
+        completeness = Completeness()
+        records = list(collect(
+            {('web', 'pulls'): lambda: range(250), ('web', 'commits'): lambda: range(5)},
+            timeout=None,
+            completeness=completeness,
+        ))
+
+        assert len(records) == 255
+        assert completeness.to_dict()['complete']
+        assert completeness.done == ['web'] and not completeness.timed_out
+
+
+class TestCompleteness:
+    """Tests for combining and checking completeness."""
+
+    def test_merge_and_is_partial(self):
+        """Test that a source missing from any merged part is not done."""
+        from app.services.collection import COMPLETENESS, Completeness, is_partial, merge_completeness
+
+        pulls = Completeness(done=['web', 'api'], pages=3, timeout=10).to_dict()
+        commits = Completeness(done=['web'], pending=['api'], pages=1, timeout=10, timed_out=True).to_dict()
+
+        merged = merge_completeness(pulls, commits)
+
+        assert merged['done'] == ['web'] and merged['pending'] == ['api']
+        assert merged['pages'] == 4 and merged['timed_out'] and not merged['complete']
+        assert is_partial({'prs_merged': 1, COMPLETENESS: merged})
+        assert is_partial({'Platform': {COMPLETENESS: merged}, 'AI Core': {COMPLETENESS: pulls}})
+        assert not is_partial({'prs_merged': 1, COMPLETENESS: pulls})
+        assert not is_partial(None)
+
+    def test_failed_repository_is_reported(self, github_service):
+        """Test that a repository that fails to list is reported rather than raising."""
+        repo = github_service.org.get_repo.return_value
+        repo.get_pulls.side_effect = RuntimeError("rate limited")
+
+        metrics = github_service.get_pr_metrics(days=11, repo_names=[repo.name], timeout=5)
+
+        assert metrics['completeness']['failed'] == {repo.name: "rate limited"}
+        assert not metrics['completeness']['complete']
+
+    def test_langsmith_failure_is_not_mocked(self, langsmith_service):
+        """Test that a LangSmith error yields a partial result instead of demo data."""
+        langsmith_service.client.list_runs.side_effect = ConnectionError("timed out")
+
+        results = langsmith_service.get_test_results(days=13, timeout=5)
+
+        assert results['total_tests'] == 0
+        assert results['completeness']['failed'] == {'test-project': "timed out"}
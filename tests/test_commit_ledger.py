@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from github import GithubException
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def _sha(n):
+    return f"{n:040x}"
+
+
+def _commit(n, author="alice", hours_ago=1):
+    return SimpleNamespace(
+        sha=_sha(n),
+        author=SimpleNamespace(login=author),
+        commit=SimpleNamespace(author=SimpleNamespace(
+            date=NOW - timedelta(hours=hours_ago), email=f"{author}@example.com", name=author.title()
+        )),
+    )
+
+
+def _branch(name, head):
+    return SimpleNamespace(name=name, commit=SimpleNamespace(sha=_sha(head)))
+
+
+class TestCommitLedger:
+    """Tests for the SHA-deduplicated commit ledger."""
+
+    def test_commits_are_stored_once(self, tmp_path):
+        """Test deduplication, time filtering and a save/load round trip."""
+        from app.services.commit_ledger import CommitLedger, LedgerStore
+
+        ledger = CommitLedger("web")
+        # Ends in a NUL byte, which numpy strips from fixed-width bytes
+        nul_sha = "ab" * 19 + "00"
+        assert ledger.add(nul_sha, "alice", NOW - timedelta(days=1))
+        assert ledger.add(_sha(2), "bob", NOW - timedelta(days=40))
+        assert ledger.add(_sha(3), "alice", NOW)
+        assert not ledger.add(nul_sha, "alice", NOW - timedelta(days=1))
+
+        store = LedgerStore(tmp_path)
+        ledger.heads = {'main': _sha(3)}
+        store.save("acme", ledger)
+        loaded = LedgerStore(tmp_path).load("acme", "web")
+
+        assert len(loaded) == 3
+        assert nul_sha in loaded and _sha(9) not in loaded
+        assert not loaded.add(nul_sha, "alice", NOW)
+        assert loaded.heads == {'main': _sha(3)}
+        recent = list(loaded.records(NOW - timedelta(days=30)))
+        assert [(r.sha, r.author, r.committed_at) for r in recent] == [
+            (nul_sha, "alice", NOW - timedelta(days=1)),
+            (_sha(3), "alice", NOW),
+        ]
+        assert loaded.prune(NOW - timedelta(days=30)) == 1
+        assert _sha(2) not in loaded
+
+    def test_unreadable_ledger_starts_empty(self, tmp_path):
+        """Test that a corrupt ledger file is discarded instead of failing the sync."""
+        from app.services.commit_ledger import LedgerStore
+
+        (tmp_path / "acme").mkdir()
+        (tmp_path / "acme" / "web.npz").write_bytes(b"not a ledger")
+
+        assert len(LedgerStore(tmp_path).load("acme", "web")) == 0
+
+
+class TestAllBranchCommits:
+    """Tests for counting commits across branches."""
+
+    @pytest.fixture
+    def repo(self, github_service_mock, monkeypatch, tmp_path):
+        from app.services import github_service
+
+        monkeypatch.setattr(github_service.settings, 'BRANCH_LEDGER_DIR', str(tmp_path))
+        repo = github_service_mock.return_value.get_organization.return_value.get_repos.return_value[0]
+        history = {1: [_commit(1)], 2: [_commit(2, "bob"), _commit(1)]}
+        repo.get_branches.return_value = [_branch("main", 1), _branch("feature", 2)]
+        repo.get_commits.side_effect = lambda sha, since: history[int(sha, 16)]
+        return repo
+
+    def test_branches_are_deduplicated_and_synced_incrementally(self, repo):
+        """Test that shared commits count once and unchanged branches are not listed again."""
+        from app.services.github_service import GitHubService
+
+        service = GitHubService(token="t", org_name="acme", all_branches=True)
+
+        first = service.get_commit_activity(days=7)
+        assert first['total_commits'] == 2
+        assert first['commits_by_author'] == {'alice': 1, 'bob': 1}
+        assert repo.get_commits.call_count == 2
+
+        # Nothing moved: no commits are listed
+        assert service.get_commit_activity(days=7)['total_commits'] == 2
+        assert repo.get_commits.call_count == 2
+
+        # The feature branch moved: only the comparison with its old head is read
+        repo.get_branches.return_value = [_branch("main", 1), _branch("feature", 4)]
+        repo.compare.return_value.commits = [_commit(4, "bob"), _commit(1)]
+        assert service.get_commit_activity(days=7)['total_commits'] == 3
+        repo.compare.assert_called_once_with(_sha(2), _sha(4))
+        assert repo.get_commits.call_count == 2
+
+    def test_force_pushed_branch_is_relisted(self, repo):
+        """Test that a branch whose old head cannot be compared is listed again."""
+        from app.services.github_service import GitHubService
+
+        service = GitHubService(token="t", org_name="acme", all_branches=True)
+        service.get_commit_activity(days=7)
+
+        repo.get_branches.return_value = [_branch("main", 5)]
+        repo.compare.side_effect = GithubException(404, {'message': "Not Found"}, None)
+        repo.get_commits.side_effect = lambda sha, since: [_commit(5), _commit(1)]
+
+        activity = service.get_commit_activity(days=7)
+
+        assert activity['total_commits'] == 3
+        assert service.ledgers.load("acme", repo.name).heads == {'main': _sha(5)}
+
+    def test_slices_older_than_the_ledger_list_branches(self, repo):
+        """Test that a slice older than BRANCH_LEDGER_RETENTION_DAYS is listed per branch, once per commit, without the ledger."""
+        from app.services.github_service import GitHubService
+
+        days = 800 * 24
+        history = {1: [_commit(7, hours_ago=days)], 2: [_commit(8, "bob", hours_ago=days), _commit(7, hours_ago=days)]}
+        repo.get_commits.side_effect = lambda sha, since, until: history[int(sha, 16)]
+        service = GitHubService(token="t", org_name="acme", all_branches=True)
+
+        records = service.get_commit_records(NOW - timedelta(days=810), [repo.name], until=NOW - timedelta(days=790))
+
+        assert sorted(record['sha'] for record in records) == [_sha(7), _sha(8)]
+        ledger = service.ledgers.load("acme", repo.name)
+        assert len(ledger) == 0 and ledger.heads == {}
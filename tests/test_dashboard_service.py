@@ -0,0 +1,168 @@
+from datetime import date, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.fixture
+def dashboard_service(tmp_path):
+    """Dashboard data layer with mocked service clients and an empty cache."""
+    from app.services import dashboard_service
+    from app.services.snapshot_store import SnapshotStore
+
+    github = MagicMock()
+    github.get_team_rollups.side_effect = lambda index, days, repo_names, timeout: {
+        team: {
+            'pr_cycle_time_days': 1.0,
+            'daily_commits': 2.0,
+            'active_contributors': 1,
+            'prs_merged': 1,
+            'prs_open': 0,
+            'daily_commits_data': [(date.today() - timedelta(days=1), 3), (date.today(), 1)],
+        }
+        for team in ["All Teams", *index.team_names()]
+    }
+    github.get_org_teams.return_value = {'Platform': {'repos': ['infra'], 'authors': []}}
+    langsmith = MagicMock()
+    langsmith.get_prompt_coverage.return_value = {'prompt_coverage': 50.0}
+
+    dashboard_service.clear_dashboard_cache()
+    with patch.object(dashboard_service, 'get_github_service', return_value=github), \
+            patch.object(dashboard_service, 'get_langsmith_service', return_value=langsmith), \
+            patch.object(dashboard_service, 'get_snapshot_store', return_value=SnapshotStore(tmp_path)), \
+            patch.object(dashboard_service.settings, 'TEAMS_FROM_GITHUB', True):
+        yield dashboard_service, github, langsmith
+    dashboard_service.clear_dashboard_cache()
+
+
+class TestDashboardService:
+    """Tests for the cached dashboard data layer."""
+
+    def test_velocity_metrics_are_memoized_by_filters(self, dashboard_service):
+        """Test that repeated reruns with the same filters hit the cache."""
+        service, github, _ = dashboard_service
+        start = date.today() - timedelta(days=7)
+
+        first = service.get_velocity_metrics(start, "All Teams", ["b", "a"])
+        second = service.get_velocity_metrics(start, "All Teams", ["a", "b", "a"])
+
+        assert first == second
+        github.get_team_rollups.assert_called_once()
+        assert github.get_team_rollups.call_args.kwargs == {
+            'days': 7, 'repo_names': ["a", "b"], 'timeout': service.settings.FETCH_TIME_BUDGET,
+        }
+
+    def test_switching_teams_reuses_the_same_fetch(self, dashboard_service):
+        """Test that only the date range, not the team, triggers a new fetch."""
+        service, github, _ = dashboard_service
+        start = date.today() - timedelta(days=6)
+
+        assert service.get_team_names() == ["All Teams", "Platform"]
+        assert service.get_velocity_metrics(start, "All Teams") is not None
+        assert service.get_velocity_metrics(start, "Platform") is not None
+        assert service.get_velocity_metrics(start, "Unknown") is None
+        service.get_velocity_metrics(start - timedelta(days=7), "Platform")
+
+        assert github.get_team_rollups.call_count == 2
+
+    def test_coverage_is_shared_between_teams(self, dashboard_service):
+        """Test that LangSmith results are memoized by the look-back window only."""
+        service, _, langsmith = dashboard_service
+        start = date.today() - timedelta(days=6)
+
+        service.get_coverage_metrics(start, "All Teams")
+        service.get_coverage_metrics(start, "Platform")
+        service.get_test_results(start, "All Teams")
+        service.get_test_results(start, "Platform")
+
+        langsmith.get_prompt_coverage.assert_called_once()
+        langsmith.get_test_results.assert_called_once()
+
+    def test_clear_dashboard_cache(self, dashboard_service):
+        """Test that the refresh path invalidates memoized results."""
+        service, github, langsmith = dashboard_service
+        start = date.today() - timedelta(days=6)
+
+        service.get_velocity_metrics(start, "All Teams")
+        service.get_coverage_metrics(start, "All Teams")
+        service.clear_dashboard_cache()
+        service.get_velocity_metrics(start, "All Teams")
+        service.get_coverage_metrics(start, "All Teams")
+
+        assert github.get_team_rollups.call_count == 2
+        assert langsmith.get_prompt_coverage.call_count == 2
+
+    def test_clear_dashboard_cache_keeps_validated_entries(self, dashboard_service):
+        """Test that the refresh path keeps result cache entries outside the dashboard's scope."""
+        from app.utils.cache_backends import DASHBOARD_SCOPE, get_result_cache
+
+        service, _, _ = dashboard_service
+        key = ('github', 'acme', 'review_timelines', 'web')
+        get_result_cache().set(key, {1: 'timeline'})
+        get_result_cache().scoped(DASHBOARD_SCOPE).set('velocity', 1)
+
+        service.clear_dashboard_cache()
+
+        assert get_result_cache().get(key) == {1: 'timeline'}
+        assert get_result_cache().scoped(DASHBOARD_SCOPE).get('velocity') is None
+
+    def test_unconfigured_services_return_none(self, dashboard_service):
+        """Test that missing credentials fall through to None instead of raising."""
+        service, _, _ = dashboard_service
+        start = date.today() - timedelta(days=6)
+
+        with patch.object(service, 'get_langsmith_service', return_value=None):
+            assert service.get_test_results(start, "All Teams") is None
+
+    def test_fresh_snapshot_is_served_without_fetching(self, dashboard_service):
+        """Test that a matching snapshot window skips the services entirely."""
+        service, github, _ = dashboard_service
+        service.get_snapshot_store().write('velocity', 30, {'All Teams': {'prs_merged': 42}})
+
+        with patch.object(service, '_refresh_in_background') as refresh:
+            metrics = service.get_velocity_metrics(
+                date.today() - timedelta(days=30), "All Teams"
+            )
+
+        assert metrics == {'prs_merged': 42}
+        github.get_team_rollups.assert_not_called()
+        refresh.assert_not_called()
+
+    def test_stale_snapshot_is_served_and_revalidated(self, dashboard_service):
+        """Test stale-while-revalidate: old data is returned and a refresh starts."""
+        service, github, _ = dashboard_service
+        service.get_snapshot_store().write('prompt_coverage', 7, {'prompt_coverage': 10.0})
+
+        with patch.object(service, '_refresh_in_background') as refresh, \
+                patch.object(service.settings, 'SNAPSHOT_MAX_AGE', -1):
+            metrics = service.get_coverage_metrics(
+                date.today() - timedelta(days=7), "All Teams"
+            )
+
+        assert metrics == {'prompt_coverage': 10.0}
+        refresh.assert_called_once_with('prompt_coverage', 7)
+
+    def test_load_concurrently_yields_in_completion_order(self):
+        """Test that sections are handed back as soon as their data is ready."""
+        import threading
+
+        from app.services.dashboard_service import load_concurrently
+
+        slow_started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            slow_started.set()
+            release.wait(timeout=5)
+            return 'velocity'
+
+        def fast():
+            slow_started.wait(timeout=5)
+            return 'coverage'
+
+        order = []
+        for name, future in load_concurrently({'velocity': slow, 'coverage': fast}):
+            order.append((name, future.result()))
+            release.set()
+
+        assert order == [('coverage', 'coverage'), ('velocity', 'velocity')]
@@ -0,0 +1,117 @@
+import csv
+import io
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import orjson
+import pytest
+
+pytest.importorskip("pyarrow")
+
+
+def _runs(count, consumed):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(count):
+        consumed.append(i)
+        yield {
+            'repo': 'evals',
+            'run_id': f"run-{i}",
+            'name': 'answer',
+            'run_type': 'llm',
+            'status': 'error' if i % 10 == 0 else 'success',
+            'tags': ['regression', 'v2'] if i % 2 else [],
+            'start_time': start + timedelta(minutes=i),
+            'end_time': None,
+            'latency_seconds': 0.5,
+            'prompt': "not exported",
+        }
+
+
+class TestEncode:
+    """Tests for chunked export encoding."""
+
+    @pytest.mark.parametrize('fmt', ['csv', 'ndjson', 'parquet'])
+    def test_streams_one_chunk_at_a_time(self, fmt):
+        """Test that each part is encoded after reading one chunk of records, and the parts form one file."""
+        import pyarrow.parquet as pq
+
+        from app.services.archive import RUNS, SCHEMAS
+        from app.services.export import encode, record_batches
+
+        consumed = []
+        parts = encode(record_batches(_runs(1050, consumed), SCHEMAS[RUNS], rows=100), SCHEMAS[RUNS], fmt)
+
+        first = next(parts)
+        assert first and len(consumed) == 100
+        data = first + b"".join(parts)
+        assert len(consumed) == 1050
+
+        if fmt == 'csv':
+            rows = list(csv.DictReader(io.StringIO(data.decode())))
+            assert rows[1]['tags'] == "regression;v2" and rows[0]['tags'] == ""
+        elif fmt == 'ndjson':
+            rows = [orjson.loads(line) for line in data.splitlines()]
+            assert rows[1]['tags'] == ['regression', 'v2']
+            assert rows[1]['start_time'] == "2024-01-01T00:01:00+00:00"
+        else:
+            parquet = pq.ParquetFile(io.BytesIO(data))
+            assert parquet.num_row_groups == 11
+            rows = parquet.read().to_pylist()
+        assert len(rows) == 1050
+        assert 'prompt' not in rows[0]
+
+    def test_empty_export_is_a_valid_file(self):
+        """Test that an export without records still has a header or footer."""
+        import pyarrow.parquet as pq
+
+        from app.services.archive import COMMITS, SCHEMAS
+        from app.services.export import encode
+
+        header = b"".join(encode(iter([]), SCHEMAS[COMMITS], 'csv'))
+        parquet = b"".join(encode(iter([]), SCHEMAS[COMMITS], 'parquet'))
+
+        assert header.decode().strip() == '"repo","sha","author","committed_at"'
+        assert pq.read_table(io.BytesIO(parquet)).num_rows == 0
+        assert b"".join(encode(iter([]), SCHEMAS[COMMITS], 'ndjson')) == b""
+
+
+class TestExport:
+    """Tests for exporting from the archive and from upstream."""
+
+    def test_daily_totals_from_archive(self, tmp_path):
+        """Test that a daily export of the archive counts records per day and repository."""
+        from app.services.archive import RUNS, MetricsArchive
+        from app.services.export import export
+
+        archive = MetricsArchive(tmp_path)
+        archive.write(RUNS, _runs(2000, []))
+
+        data = b"".join(export(
+            RUNS, 'ndjson', datetime(2024, 1, 2, tzinfo=timezone.utc), archive=archive, daily=True, rows=256,
+        ))
+
+        assert [orjson.loads(line) for line in data.splitlines()] == [
+            {'date': date(2024, 1, 2).isoformat(), 'repo': 'evals', 'records': 2000 - 24 * 60},
+        ]
+
+    def test_upstream_records_are_listed_lazily(self):
+        """Test that an upstream export reads the service's record generator, not its list method."""
+        from app.services.archive import PRS
+        from app.services.export import export
+
+        github = MagicMock()
+        github.iter_pr_records.return_value = iter([{
+            'repo': 'web', 'number': 7, 'author': 'alice', 'state': 'closed', 'merged': True,
+            'created_at': datetime(2024, 1, 1, tzinfo=timezone.utc), 'merged_at': None, 'closed_at': None,
+            'updated_at': datetime(2024, 1, 2, tzinfo=timezone.utc),
+        }])
+        since = datetime(2023, 12, 1, tzinfo=timezone.utc)
+
+        rows = list(csv.DictReader(io.StringIO(b"".join(export(PRS, 'csv', since, github_service=github)).decode())))
+
+        github.iter_pr_records.assert_called_once_with(since, None, None)
+        github.get_pr_records.assert_not_called()
+        assert [(row['repo'], row['number'], row['merged']) for row in rows] == [('web', '7', 'true')]
+
+        with pytest.raises(ValueError, match="LangSmith is not configured"):
+            export('langsmith_runs', 'csv', since, github_service=github)
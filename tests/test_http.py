@@ -0,0 +1,95 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    from app.utils.http import reset_transport_stats
+
+    reset_transport_stats()
+    yield
+    reset_transport_stats()
+
+
+class TestHttpTransport:
+    """Tests for the shared HTTP transport."""
+
+    def test_session_configuration(self):
+        """Test pool sizing, compression and per-host retry policies."""
+        from github.GithubRetry import GithubRetry
+
+        from app.utils.config import settings
+        from app.utils.http import GITHUB_API_URL, create_session, pool_size
+
+        session = create_session()
+        generic = session.get_adapter("https://api.smith.langchain.com/runs")
+        github = session.get_adapter(f"{GITHUB_API_URL}:443/orgs/x/repos")
+
+        assert pool_size() == max(settings.DASHBOARD_LOAD_WORKERS, settings.API_MAX_CONCURRENT_FETCHES)
+        assert generic._pool_maxsize == pool_size()
+        assert "gzip" in session.headers["Accept-Encoding"]
+        assert generic.max_retries.backoff_jitter == settings.HTTP_BACKOFF_JITTER
+        assert 503 in generic.max_retries.status_forcelist
+        assert isinstance(github.max_retries, GithubRetry)
+        assert not isinstance(generic.max_retries, GithubRetry)
+
+    def test_connections_are_reused_and_timed(self, local_server):
+        """Test that keep-alive connections are reused and requests are recorded."""
+        from app.utils.http import create_session, transport_stats
+
+        session = create_session()
+        for _ in range(3):
+            assert session.get(f"{local_server.url}/ping").text == "ok"
+
+        stats = transport_stats()[local_server.host]
+        assert stats['requests'] == 3
+        assert stats['connections_opened'] == 1
+        assert stats['reuse_ratio'] == pytest.approx(2 / 3, abs=1e-3)
+        assert stats['errors'] == 0
+        assert stats['max_ms'] >= stats['avg_ms'] > 0
+
+    def test_server_errors_are_retried(self, local_server):
+        """Test that a 503 with Retry-After is retried transparently."""
+        from app.utils.http import create_session
+
+        local_server.statuses = [503, 503]
+        local_server.headers = {'Retry-After': "0"}
+        response = create_session().get(f"{local_server.url}/flaky")
+
+        assert response.status_code == 200
+        assert local_server.statuses == []
+
+    def test_github_uses_shared_session(self):
+        """Test that PyGithub connections send requests through the shared session."""
+        from github.Requester import Requester
+
+        from app.utils.http import get_session, use_shared_session_for_github
+
+        use_shared_session_for_github()
+        connection_class = Requester._Requester__httpsConnectionClass
+        connection = connection_class("api.github.com", timeout=5)
+
+        assert connection.session is get_session()
+        connection.close()
+        assert get_session().adapters
+
+    def test_github_requests_are_not_throttled(self, local_server):
+        """Test that the GitHub client sends back-to-back requests without PyGithub's fixed delays."""
+        import time
+        from functools import partial
+        from unittest.mock import patch
+
+        from github import Github
+
+        from app.services.github_service import GitHubService
+
+        local_server.body = b'{"login": "acme"}'
+        local_server.headers = {'Content-Type': "application/json"}
+        with patch('app.services.github_service.Github', partial(Github, base_url=local_server.url)):
+            service = GitHubService(token="t", org_name="acme")
+
+        started = time.perf_counter()
+        for _ in range(8):
+            assert service.github.get_organization("acme").login == "acme"
+
+        # PyGithub's default throttle alone takes 0.25 s per request
+        assert time.perf_counter() - started < 1.0
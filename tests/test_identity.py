@@ -0,0 +1,142 @@
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture
+def synthetic_github():
+    """A synthetic organization whose bot commits have no linked GitHub account."""
+    from benchmarks.synthetic import TIERS, FakeGithub
+
+    return FakeGithub(TIERS['tiny'])
+
+
+def _service(client, **kwargs):
+    from app.services.github_service import GitHubService
+
+    with patch('app.services.github_service.Github', return_value=client):
+        return GitHubService(token="t", org_name="acme", **kwargs)
+
+
+class TestIdentityIndex:
+    """Tests for the commit author identity index."""
+
+    def test_linked_commits_resolve_unlinked_ones(self, tmp_path):
+        """Test that emails and names learned from linked commits resolve other commits."""
+        from app.services.identity_index import IdentityIndex
+
+        index = IdentityIndex(path="")
+        index.learn("Alice@Example.com ", "Alice Smith", "alice")
+        index.learn("bob@example.com", "Sam", "bob")
+        index.learn("carol@example.com", "Sam", "carol")
+
+        assert index.resolve("alice@example.com") == "alice"
+        assert index.resolve("alice@laptop.local", "alice  smith") == "alice"
+        assert index.resolve("123+dave@users.noreply.github.com") == "dave"
+        # Several logins use the name
+        assert index.resolve("sam@laptop.local", "Sam") is None
+        assert index.needs_lookup("sam@laptop.local") and not index.needs_lookup("bob@example.com")
+
+    def test_aliases_are_canonical(self):
+        """Test that every login the index returns is the canonical login of its person."""
+        from app.services.identity_index import IdentityIndex
+
+        index = IdentityIndex(path="", aliases={'alice': ["Alice-Work", "alice@old-corp.example"]})
+
+        assert index.learn("alice@work.example", "Alice", "alice-work") == "alice"
+        assert index.resolve("alice@work.example") == "alice"
+        assert index.resolve("ALICE@old-corp.example") == "alice"
+        assert index.canonical("bob") == "bob"
+        assert index.record_lookups({'x@example.com': "Alice-Work", 'y@example.com': None}) == {'x@example.com': "alice"}
+
+    def test_misses_are_looked_up_again_later(self, monkeypatch):
+        """Test that an email that did not resolve is only looked up again after IDENTITY_RETRY_DAYS."""
+        from app.services import identity_index
+        from app.services.identity_index import IdentityIndex
+
+        index = IdentityIndex(path="")
+        index.record_lookups({'ci@example.com': None})
+
+        assert not index.needs_lookup("ci@example.com")
+        monkeypatch.setattr(identity_index.settings, 'IDENTITY_RETRY_DAYS', 0)
+        assert index.needs_lookup("ci@example.com")
+
+    def test_saves_merge_with_the_file(self, tmp_path):
+        """Test that two indexes sharing a file both keep their entries, and unreadable files are discarded."""
+        from app.services.identity_index import IdentityIndex
+
+        path = tmp_path / "identities.json"
+        first, second = IdentityIndex(path), IdentityIndex(path)
+        first.learn("alice@example.com", "Alice", "alice")
+        first.save()
+        second.learn("bob@example.com", "Bob", "bob")
+        second.add_members('acme', [{'login': 'carol', 'name': "Carol", 'email': ""}])
+        second.save()
+
+        loaded = IdentityIndex(path)
+        assert loaded.resolve("alice@example.com") == "alice"
+        assert loaded.resolve("bob@example.com") == "bob"
+        assert loaded.resolve(None, "carol") == "carol"
+        assert not loaded.members_stale('acme') and loaded.members_stale('labs')
+
+        path.write_text("{not json")
+        assert len(IdentityIndex(path)) == 0
+
+
+class TestCommitAuthors:
+    """Tests for resolving commit authors during ingestion."""
+
+    def test_unseen_emails_are_looked_up_once(self, synthetic_github):
+        """Test that each repository's unseen emails cost one query, and a saved index answers them afterwards."""
+        from app.services.identity_index import IdentityIndex
+        from app.utils.config import settings
+
+        first = _service(synthetic_github).get_commit_activity(days=30)
+        cold = synthetic_github.requests
+        second = _service(synthetic_github).get_commit_activity(days=30)
+        warm = synthetic_github.requests - cold
+
+        assert first['total_commits'] == second['total_commits'] == synthetic_github.expected_commits
+        # The member listing and one lookup per repository were saved
+        assert cold - warm == 1 + len(synthetic_github.repositories)
+        index = IdentityIndex(settings.IDENTITY_INDEX_PATH)
+        assert index.resolve("dev00000@synthetic.example") == "dev00000"
+        assert not index.needs_lookup("build@repo-00000.invalid")
+
+    def test_lookups_take_the_pr_author(self, synthetic_github, monkeypatch):
+        """Test that unlinked commits count for the author of the PR that introduced them."""
+        from app.services.identity_index import IdentityIndex
+
+        baseline = _service(synthetic_github, identities=IdentityIndex(path="")).get_commit_activity(days=30)
+        graphql_query = synthetic_github.requester.graphql_query
+        lookups = []
+
+        def with_pr_authors(query, variables):
+            headers, data = graphql_query(query, variables)
+            if "associatedPullRequests" in query:
+                lookups.append(variables['name'])
+                for node in data['data']['repository'].values():
+                    node['associatedPullRequests']['nodes'] = [{'author': {'login': "dev00003"}}]
+            return headers, data
+
+        monkeypatch.setattr(synthetic_github.requester, 'graphql_query', with_pr_authors)
+        activity = _service(synthetic_github).get_commit_activity(days=30)
+
+        assert activity['total_commits'] == synthetic_github.tier.commits
+        unlinked = synthetic_github.tier.commits - synthetic_github.expected_commits
+        assert activity['commits_by_author']["dev00003"] == baseline['commits_by_author']["dev00003"] + unlinked
+        assert sorted(lookups) == [repo.name for repo in synthetic_github.repositories]
+
+    def test_aliases_merge_contributors(self, synthetic_github, monkeypatch):
+        """Test that a person's second login counts as the same contributor in PRs and commits."""
+        from app.utils.config import settings
+
+        before = _service(synthetic_github).get_team_velocity(days=30)
+        monkeypatch.setattr(settings, 'IDENTITY_ALIASES', {'dev00000': ["dev00001"]})
+        after = _service(synthetic_github).get_team_velocity(days=30)
+
+        assert after['active_contributors'] == before['active_contributors'] - 1
+        assert "dev00001" not in after['commits_by_author'] and "dev00001" not in after['prs_by_author']
+        assert after['commits_by_author']["dev00000"] == (
+            before['commits_by_author']["dev00000"] + before['commits_by_author']["dev00001"]
+        )
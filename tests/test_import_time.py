@@ -0,0 +1,92 @@
+"""Import-time budget for the app package.
+
+Each module is imported in a fresh interpreter with ``-X importtime`` and its
+cumulative import time is compared against a budget, so a heavy top-level
+import or an import-time side effect fails the build instead of silently
+slowing down container cold starts and test collection.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Cumulative import time budgets, in seconds
+IMPORT_BUDGETS = {
+    "app": 0.05,
+    "app.utils": 0.5,
+    "app.worker": 0.5,
+    "app.services.langsmith_service": 0.5,
+    "app.services.github_service": 1.5,
+    "app.services.dashboard_service": 2.5,
+}
+
+# Heavy dependencies that must only be imported when they are actually used
+LAZY_DEPENDENCIES = ["pandas", "github", "langsmith.client"]
+
+
+def _run(code, cwd=PROJECT_ROOT, *args):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        p for p in [str(PROJECT_ROOT), os.environ.get("PYTHONPATH")] if p
+    ))
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True,
+    )
+
+
+def _cumulative_import_seconds(module):
+    result = _run(f"import {module}", PROJECT_ROOT, "-X", "importtime")
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if name.strip() == module:
+            return int(cumulative) / 1_000_000
+    raise AssertionError(f"No import time reported for {module}")
+
+
+class TestImportTime:
+    """Tests for import-time cost and side effects."""
+
+    @pytest.mark.parametrize("module,budget", sorted(IMPORT_BUDGETS.items()))
+    def test_import_within_budget(self, module, budget):
+        """Test that importing a module stays within its time budget."""
+        seconds = _cumulative_import_seconds(module)
+        assert seconds <= budget, f"import {module} took {seconds:.3f}s (budget {budget}s)"
+
+    def test_heavy_dependencies_are_lazy(self):
+        """Test that the app package does not pull in heavy libraries at import."""
+        result = _run(
+            "import sys, app.utils, app.worker, app.services.langsmith_service, "
+            "app.services.dashboard_service; "
+            f"print([m for m in {LAZY_DEPENDENCIES!r} if m in sys.modules])"
+        )
+        assert result.stdout.strip() == "[]"
+
+    def test_import_has_no_side_effects(self, tmp_path):
+        """Test that importing does not build settings or create log files."""
+        result = _run(
+            "import app, app.utils, app.worker; "
+            "from app.utils.config import get_settings; "
+            "print(get_settings.cache_info().currsize)",
+            tmp_path,
+        )
+        assert result.stdout.strip() == "0"
+        assert not (tmp_path / "logs").exists()
+
+    def test_settings_patches_reach_the_instance(self, monkeypatch):
+        """Test that patching the settings proxy changes the built settings and undoing restores them."""
+        from app.utils.config import get_settings, settings
+
+        original = get_settings().SHARD_REPOS
+        monkeypatch.setattr(settings, 'SHARD_REPOS', original + 1)
+        assert get_settings().SHARD_REPOS == settings.SHARD_REPOS == original + 1
+        assert 'SHARD_REPOS' not in vars(settings)
+
+        monkeypatch.undo()
+        assert get_settings().SHARD_REPOS == settings.SHARD_REPOS == original
+        assert 'SHARD_REPOS' not in vars(settings)
@@ -0,0 +1,82 @@
+import logging
+
+import orjson
+import pytest
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    import importlib
+
+    # app.utils re-exports a ``logger`` object that shadows the module name
+    logger_module = importlib.import_module("app.utils.logger")
+    logger_module.shutdown_logging()
+    root = logging.getLogger()
+    level = root.level
+    yield logger_module, tmp_path
+    logger_module.shutdown_logging()
+    root.setLevel(level)
+
+
+def _record(msg, *args, level=logging.INFO, exc_info=None, **extra):
+    record = logging.LogRecord("ai_velocity.test", level, __file__, 1, msg, args, exc_info)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestLogger:
+    """Tests for the logging pipeline."""
+
+    def test_colored_formatter_reuses_formatters(self):
+        """Test that per-level formatters are built once, not per record."""
+        from app.utils.logger import ColoredFormatter
+
+        formatter = ColoredFormatter()
+        cached = dict(formatter._formatters)
+
+        assert "INFO" in formatter.format(_record("hello"))
+        assert "hello" in formatter.format(_record("hello", level=logging.ERROR))
+        assert formatter._formatters == cached
+        assert all(formatter._formatters[level] is cached[level] for level in cached)
+
+    def test_json_formatter_includes_extra_and_exception(self):
+        """Test that JSON lines carry extra fields and the formatted traceback."""
+        import sys
+
+        from app.utils.logger import JsonFormatter
+
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            exc_info = sys.exc_info()
+        line = JsonFormatter().format(
+            _record("fetched %d repos", 3, level=logging.ERROR, exc_info=exc_info, repo="org/a")
+        )
+        payload = orjson.loads(line)
+
+        assert payload['message'] == "fetched 3 repos"
+        assert payload['level'] == "ERROR"
+        assert payload['repo'] == "org/a"
+        assert "ValueError: boom" in payload['exception']
+
+    def test_records_are_written_by_the_listener(self, pipeline, monkeypatch):
+        """Test that setup is idempotent and shutdown flushes queued records."""
+        logger_module, log_dir = pipeline
+        monkeypatch.setattr(logger_module.settings, 'LOG_FORMAT', 'json')
+
+        logger_module.setup_logging(log_dir)
+        handler = logger_module._queue_handler
+        logger_module.setup_logging(log_dir)
+        assert logger_module._queue_handler is handler
+        assert logging.getLogger().handlers.count(handler) == 1
+
+        log = logger_module.get_logger("ai_velocity.test")
+        for i in range(50):
+            log.info("record %d", i, extra={'index': i})
+        logger_module.shutdown_logging()
+
+        assert handler not in logging.getLogger().handlers
+        lines = (log_dir / logger_module.LOG_FILE_NAME).read_text().splitlines()
+        records = [orjson.loads(line) for line in lines]
+        assert [r['index'] for r in records] == list(range(50))
+        assert records[-1]['message'] == "record 49"
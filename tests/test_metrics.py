@@ -0,0 +1,125 @@
+import time
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    from app.utils.metrics import REGISTRY
+
+    REGISTRY.reset()
+    yield
+    REGISTRY.reset()
+
+
+class TestMetrics:
+    """Tests for the metrics registry and instrumentation."""
+
+    def test_text_format(self):
+        """Test the Prometheus text rendering of counters, gauges and histograms."""
+        from app.utils.metrics import MetricsRegistry
+
+        registry = MetricsRegistry()
+        requests = registry.counter("requests_total", "Requests.", ("host",))
+        remaining = registry.gauge("remaining", "Remaining.")
+        latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+        requests.inc(host='api.github.com')
+        requests.inc(2, host='api.github.com')
+        remaining.set(42)
+        for value in (0.05, 0.1, 0.5, 3):
+            latency.observe(value)
+
+        text = registry.render()
+
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{host="api.github.com"} 3' in text
+        assert "remaining 42" in text
+        assert 'latency_seconds_bucket{le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{le="1"} 3' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+        assert "latency_seconds_sum 3.65" in text
+        assert "latency_seconds_count 4" in text
+        with pytest.raises(ValueError):
+            requests.inc(status='200')
+        with pytest.raises(ValueError):
+            registry.gauge("requests_total", "Clash.")
+
+    def test_session_records_upstream_requests(self, local_server):
+        """Test that requests are counted per endpoint with bytes, pages and rate limit."""
+        from app.utils.http import create_session, endpoint_template
+        from app.utils.metrics import (
+            RATE_LIMIT_REMAINING,
+            UPSTREAM_BYTES,
+            UPSTREAM_LATENCY,
+            UPSTREAM_PAGES,
+            UPSTREAM_REQUESTS,
+        )
+
+        pulls_body = b'[{"number": 1}, {"number": 2}]'
+        local_server.body = lambda path: pulls_body if path.endswith("/pulls") else b'{"name": "web"}'
+        local_server.headers = {
+            'Content-Type': "application/json", 'X-RateLimit-Remaining': "4321", 'X-RateLimit-Resource': "core",
+        }
+        server = local_server.host
+        session = create_session()
+        session.get(f"http://{server}/repos/acme/web/pulls")
+        session.get(f"http://{server}/repos/acme/web")
+
+        pulls = {'host': server, 'endpoint': "/repos/:owner/:repo/pulls"}
+        repo = {'host': server, 'endpoint': "/repos/:owner/:repo"}
+        assert endpoint_template("/repos/acme/web/pulls/12") == "/repos/:owner/:repo/pulls/:id"
+        compare = "/repos/:owner/:repo/compare/:base...:head"
+        assert endpoint_template(f"/repos/acme/web/compare/{'a' * 40}...{'b' * 40}") == compare
+        assert endpoint_template("/repos/acme/web/compare/main...feature/login?page=2") == compare
+        assert UPSTREAM_REQUESTS.value(status='200', **pulls) == 1
+        assert UPSTREAM_LATENCY.count(**repo) == 1
+        assert UPSTREAM_BYTES.value(**pulls) == len(pulls_body)
+        assert UPSTREAM_PAGES.value(**pulls) == 1
+        assert UPSTREAM_PAGES.value(**repo) == 0
+        assert RATE_LIMIT_REMAINING.value(host=server, resource='core') == 4321
+
+    def test_instrumented_separates_aggregation_time(self):
+        """Test that upstream time on the calling thread is not counted as aggregation."""
+        from app.utils.metrics import (
+            AGGREGATION_LATENCY,
+            SERVICE_CALLS,
+            SERVICE_LATENCY,
+            add_upstream_time,
+            instrumented,
+            service_summary,
+        )
+
+        @instrumented("github", "fetch")
+        def fetch(fail=False):
+            time.sleep(0.02)
+            add_upstream_time(0.02)
+            if fail:
+                raise RuntimeError("upstream down")
+
+        fetch()
+        with pytest.raises(RuntimeError):
+            fetch(fail=True)
+
+        labels = {'service': 'github', 'method': 'fetch'}
+        assert SERVICE_CALLS.value(outcome='ok', **labels) == 1
+        assert SERVICE_CALLS.value(outcome='error', **labels) == 1
+        assert SERVICE_LATENCY.total(**labels) >= 0.04
+        assert AGGREGATION_LATENCY.total(**labels) < SERVICE_LATENCY.total(**labels) - 0.03
+        [summary] = service_summary()
+        assert summary['calls'] == 2
+        assert summary['upstream_ms'] == pytest.approx(20, abs=1)
+
+    def test_service_calls_and_cache_hits_are_recorded(self, github_service_mock):
+        """Test that service methods and result cache lookups are instrumented."""
+        from app.services.github_service import GitHubService
+        from app.utils.cache_backends import MemoryBackend, ResultCache
+        from app.utils.metrics import CACHE_REQUESTS, SERVICE_CALLS
+
+        service = GitHubService(token='t', org_name='org', cache=ResultCache(MemoryBackend()))
+        service.get_team_velocity(days=7)
+        service.get_team_velocity(days=7)
+
+        assert SERVICE_CALLS.value(service='github', method='get_team_velocity', outcome='ok') == 2
+        assert SERVICE_CALLS.value(service='github', method='get_pr_metrics', outcome='ok') == 1
+        assert CACHE_REQUESTS.value(cache='result', result='miss') == 1
+        assert CACHE_REQUESTS.value(cache='result', result='hit') == 1
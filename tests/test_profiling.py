@@ -0,0 +1,77 @@
+import time
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _profile(duration):
+    from app.utils.profiling import SamplingProfiler
+
+    profiler = SamplingProfiler(interval=0.001)
+    with profiler:
+        _busy(0.01)
+    profiler.duration = duration
+    return profiler
+
+
+class TestProfiling:
+    """Tests for the sampling profiler and the profile store."""
+
+    def test_collapsed_stacks(self):
+        """Test that samples of the profiled thread are written as collapsed stacks."""
+        from app.utils.profiling import SamplingProfiler
+
+        with SamplingProfiler(interval=0.001) as profiler:
+            _busy(0.1)
+
+        lines = profiler.collapsed().splitlines()
+        stack, count = lines[0].rsplit(" ", 1)
+        assert profiler.samples > 0
+        assert int(count) > 0
+        assert any("_busy (test_profiling.py:" in line for line in lines)
+        assert "sampling-profiler" not in profiler.collapsed()
+
+    def test_store_keeps_slowest_recent_profiles(self, tmp_path):
+        """Test that only the slowest profiles per kind are kept on disk."""
+        from app.utils.profiling import ProfileStore
+
+        store = ProfileStore(tmp_path, keep=2, max_age=3600)
+        profiles = {duration: _profile(duration) for duration in (0.3, 0.1, 0.5, 0.2)}
+        for profiler in profiles.values():
+            store.save("rerun", profiler, {'team': 'All Teams'})
+        store.save("github.get_team_velocity", _profile(0.05), {'days': 7})
+
+        kept = store.records("rerun")
+        assert [r.duration_seconds for r in kept] == [0.5, 0.3]
+        assert kept[0].params == {'team': 'All Teams'}
+        assert len(list(tmp_path.glob("*.folded"))) == 3
+        assert (tmp_path / kept[0].path.rsplit("/", 1)[-1]).read_text() == profiles[0.5].collapsed()
+
+        expired = ProfileStore(tmp_path, keep=2, max_age=-1)
+        expired.save("rerun", _profile(0.01))
+        assert [r.duration_seconds for r in expired.records("rerun")] == [0.01]
+
+    def test_profiled_is_off_by_default(self, tmp_path, monkeypatch):
+        """Test that decorated calls are only profiled while PROFILING_ENABLED is set."""
+        from app.utils import profiling
+
+        store = profiling.ProfileStore(tmp_path, keep=5)
+        monkeypatch.setattr(profiling, '_store', store)
+
+        @profiling.profiled("github.get_team_velocity")
+        def get_team_velocity(self, days=30, repo_names=None):
+            _busy(0.01)
+            return days
+
+        assert get_team_velocity(None, days=7) == 7
+        assert store.records() == []
+
+        monkeypatch.setattr(profiling.settings, 'PROFILING_ENABLED', True)
+        assert get_team_velocity(None, days=7) == 7
+
+        [record] = store.records()
+        assert record.kind == "github.get_team_velocity"
+        assert record.params == {'days': '7', 'repo_names': 'None'}
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+
+class _LazyPR(SimpleNamespace):
+    """PR stand-in whose ``merged`` would trigger a request in PyGithub."""
+
+    @property
+    def merged(self):
+        raise AssertionError("reading merged completes the PR")
+
+
+class TestRecords:
+    """Tests for the compact PR, commit and run records."""
+
+    def test_pr_record_from_list_response(self):
+        """Test conversion without touching lazily completed attributes."""
+        from app.models.records import PRRecord
+
+        created = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        pr = _LazyPR(
+            number=7, user=SimpleNamespace(login="alice"), state="closed",
+            created_at=created, merged_at=created + timedelta(hours=6), closed_at=created + timedelta(hours=6),
+            updated_at=created + timedelta(hours=6),
+        )
+
+        record = PRRecord.from_github("web", pr)
+
+        assert record.merged
+        assert record.cycle_time_hours == 6
+        assert not hasattr(record, '__dict__')
+        with pytest.raises(AttributeError):
+            record.state = "open"
+
+    def test_repeated_strings_are_shared(self):
+        """Test that repositories and authors are interned across records."""
+        from app.models.records import CommitRecord
+
+        def commit(sha):
+            login = "".join(["bo", "b"])  # a fresh string object every time
+            return SimpleNamespace(
+                sha=sha, author=SimpleNamespace(login=login),
+                commit=SimpleNamespace(author=SimpleNamespace(date=datetime(2024, 5, 1, 12))),
+            )
+
+        first = CommitRecord.from_github("api", commit("a1"))
+        second = CommitRecord.from_github("api", commit("b2"))
+
+        assert first.author is second.author
+        assert first.day == datetime(2024, 5, 1).date()
+
+    def test_run_record_keeps_only_the_score(self):
+        """Test that run outputs are reduced to the evaluation score."""
+        from app.models.records import RunRecord
+
+        start = datetime(2024, 5, 1, 12)
+        run = SimpleNamespace(
+            id="r1", name="test_quality", run_type="llm", error=None, tags=["test"],
+            start_time=start, end_time=start + timedelta(seconds=3),
+            outputs={'evaluation': {'score': 0.4}, 'text': "x" * 10_000},
+        )
+
+        record = RunRecord.from_langsmith(run)
+
+        assert record.score == 0.4
+        assert record.tags == ("test",)
+        assert record.latency_seconds == 3
+        assert record.prompt is None
+        assert not record.error
+
+    def test_paginated_lists_are_drained(self):
+        """Test that consumed PaginatedList elements are released while iterating."""
+        from app.services.github_service import _drain
+
+        class Pages(list):
+            cleared = 0
+
+            def _clear(self):
+                Pages.cleared += 1
+
+        assert list(_drain(Pages([1, 2, 3]))) == [1, 2, 3]
+        assert Pages.cleared == 3
+        assert list(_drain(iter([4]))) == [4]
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+
+def _review(state, submitted, login="bob"):
+    return {'state': state, 'submittedAt': submitted.isoformat(), 'author': {'login': login}}
+
+
+class _GraphQL:
+    """Answers review queries with the same reviews for every PR and records the PRs asked for."""
+
+    def __init__(self, reviews):
+        self.reviews = reviews
+        self.queried = []
+
+    def __call__(self, query, variables):
+        import re
+
+        numbers = [int(number) for number in re.findall(r"pr(\d+): pullRequest", query)]
+        self.queried.append(numbers)
+        nodes = {f"pr{number}": {'author': {'login': "alice"}, 'reviews': {'nodes': self.reviews}} for number in numbers}
+        return {}, {'data': {'repository': nodes}}
+
+
+class TestReviewTimeline:
+    """Tests for review timelines built from GraphQL reviews."""
+
+    def test_rounds_and_approval(self):
+        """Test that author replies and pending reviews are ignored and approvals after the merge do not count."""
+        from app.models.records import PRRecord, ReviewTimeline
+
+        created = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        merged = created + timedelta(hours=30)
+        pr = PRRecord("web", 7, "alice", "closed", True, created, merged, merged, merged)
+        node = {'author': {'login': "alice"}, 'reviews': {'nodes': [
+            _review('COMMENTED', created + timedelta(hours=1), login="alice"),
+            _review('CHANGES_REQUESTED', created + timedelta(hours=4)),
+            _review('COMMENTED', created + timedelta(hours=5), login="carol"),
+            _review('APPROVED', created + timedelta(hours=20)),
+            {'state': 'PENDING', 'submittedAt': None, 'author': {'login': "dave"}},
+            _review('APPROVED', merged + timedelta(hours=1), login="carol"),
+        ]}}
+
+        timeline = ReviewTimeline.from_graphql(pr, node)
+
+        assert timeline.time_to_first_review_hours == 4
+        assert timeline.rounds == 2
+        assert timeline.approval_to_merge_hours == 10
+
+
+class TestReviewMetrics:
+    """Tests for the review metrics of get_pr_metrics."""
+
+    def test_one_query_per_page_and_cached_by_updated_at(self, github_service):
+        """Test that reviews take one query per batch, are cached once per pass and only updated PRs are queried again."""
+        from unittest.mock import MagicMock
+
+        from app.services.github_service import REVIEW_BATCH_SIZE
+        from app.utils.cache_backends import MemoryBackend, ResultCache
+
+        now = datetime.now(timezone.utc)
+        prs = [
+            SimpleNamespace(number=n, user=SimpleNamespace(login="alice"), state="closed",
+                            created_at=now - timedelta(hours=n + 10), merged_at=now - timedelta(hours=n),
+                            closed_at=now - timedelta(hours=n), updated_at=now - timedelta(hours=n))
+            for n in range(1, 151)
+        ]
+        repo = github_service.org.get_repo.return_value
+        repo.get_pulls.side_effect = lambda **kwargs: list(prs)
+        graphql = _GraphQL([_review('APPROVED', now + timedelta(hours=1))])
+        github_service.github.requester.graphql_query.side_effect = graphql
+        github_service.cache = cache = ResultCache(MemoryBackend())
+        cache.set = MagicMock(wraps=cache.set)
+
+        metrics = github_service.get_pr_metrics(days=30, repo_names=[repo.name], reviews=True)
+
+        assert [len(numbers) for numbers in graphql.queried] == [REVIEW_BATCH_SIZE, 50]
+        assert cache.set.call_count == 1
+        assert metrics['reviewed_prs'] == 150 and metrics['avg_review_rounds'] == 1
+        assert metrics['avg_approval_to_merge_hours'] == 0
+
+        graphql.reviews = [_review('APPROVED', now - timedelta(hours=5))]
+        prs[0].updated_at = now
+        graphql.queried.clear()
+        metrics = github_service.get_pr_metrics(days=30, repo_names=[repo.name], reviews=True)
+
+        assert graphql.queried == [[1]]
+        assert metrics['avg_approval_to_merge_hours'] == 4
+
+        velocity = github_service.get_team_velocity(days=30, repo_names=[repo.name])
+        assert velocity['prs_merged'] == 150 and graphql.queried == [[1]]
+
+    def test_failed_query_keeps_the_prs(self, github_service):
+        """Test that PRs whose reviews cannot be read are still counted, without review metrics."""
+        from github import GithubException
+
+        now = datetime.now(timezone.utc)
+        prs = [
+            SimpleNamespace(number=n, user=SimpleNamespace(login="alice"), state="open",
+                            created_at=now - timedelta(hours=n), merged_at=None, closed_at=None,
+                            updated_at=now - timedelta(hours=n))
+            for n in range(1, 4)
+        ]
+        repo = github_service.org.get_repo.return_value
+        repo.get_pulls.side_effect = lambda **kwargs: list(prs)
+        github_service.github.requester.graphql_query.side_effect = GithubException(502, "Bad Gateway", None)
+
+        metrics = github_service.get_pr_metrics(days=30, repo_names=[repo.name], reviews=True)
+
+        assert metrics['total_prs'] == 3 and metrics['reviewed_prs'] == 0
+        assert metrics['completeness']['failed'] == {}
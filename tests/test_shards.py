@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture
+def synthetic_github():
+    """Every GitHub client talks to the same synthetic organization."""
+    from app.services import shards
+    from benchmarks.synthetic import TIERS, FakeGithub
+
+    client = FakeGithub(TIERS['tiny'])
+    shards._services.clear()
+    with patch('app.services.github_service.Github', return_value=client):
+        yield client
+    shards._services.clear()
+
+
+class TestPlanShards:
+    """Tests for splitting organizations into shards."""
+
+    def test_shards_hand_out_tokens_in_turn(self):
+        """Test that shards never mix organizations and rotate through the tokens."""
+        from app.services.shards import Shard, plan_shards
+
+        shards = plan_shards({'acme': ['a', 'b', 'c'], 'labs': ['d']}, ['t1', 't2'], size=2)
+
+        assert shards == [
+            Shard('acme', 't1', ('a', 'b')),
+            Shard('acme', 't2', ('c',)),
+            Shard('labs', 't1', ('d',)),
+        ]
+
+    def test_shards_fit_the_pool(self):
+        """Test that with a shard limit every shard can run at once, split by organization size."""
+        from app.services.shards import plan_shards
+
+        repos = {'acme': [f'a{i}' for i in range(90)], 'labs': [f'l{i}' for i in range(10)], 'empty': []}
+        shards = plan_shards(repos, ['t'], size=5, max_shards=4)
+
+        assert len(shards) <= 4
+        assert sorted(len(shard.repos) for shard in shards if shard.org == 'acme') == [45, 45]
+        assert sum(len(shard.repos) for shard in shards) == 100
+        assert len(plan_shards(repos, ['t'], size=5, max_shards=1)) == 2
+
+
+class TestShardedGitHub:
+    """Tests for multi-organization collection."""
+
+    def test_merged_views_match_a_single_pass(self, synthetic_github):
+        """Test that merged shard rollups equal one pass per organization, and add up across them."""
+        from app.services import shards
+        from app.services.github_service import GitHubService
+        from app.services.shards import ShardedGitHub, org_view
+        from app.services.team_index import ALL_TEAMS, Team, TeamIndex
+
+        index = TeamIndex([Team("Core", repos={"repo-00001", "repo-00003"})])
+        single = GitHubService(token="t", org_name="acme").get_team_rollups(index, days=30)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            sharded = ShardedGitHub(
+                orgs=['acme', 'labs'], tokens=['t1', 't2'], shard_size=2, executor=executor
+            ).get_team_rollups(index, days=30)
+
+        acme = sharded[org_view('acme')]
+        for field in ('prs_merged', 'prs_open', 'total_commits', 'commits_by_author', 'daily_commits_data'):
+            assert acme[field] == single[ALL_TEAMS][field]
+        assert acme['pr_cycle_time_days'] == pytest.approx(single[ALL_TEAMS]['pr_cycle_time_days'])
+        assert sharded[ALL_TEAMS]['total_commits'] == 2 * single[ALL_TEAMS]['total_commits']
+        assert sharded["Core"]['prs_merged'] == 2 * single["Core"]['prs_merged']
+        assert len(sharded[ALL_TEAMS]['completeness']['done']) == 10
+        assert 'labs/repo-00004' in sharded[ALL_TEAMS]['completeness']['done']
+        # One client per organization and token
+        assert {('acme', 't1'), ('labs', 't1'), ('labs', 't2')} <= set(shards._services)
+
+    def test_failed_shard_is_reported(self, synthetic_github, monkeypatch):
+        """Test that a shard whose worker fails leaves its repositories failed, not the whole call."""
+        from app.services import shards
+        from app.services.team_index import ALL_TEAMS, TeamIndex
+
+        collect_shard = shards.collect_shard
+
+        def flaky(shard, *args):
+            if shard.org == 'labs':
+                raise RuntimeError("Bad credentials")
+            return collect_shard(shard, *args)
+
+        monkeypatch.setattr(shards, 'collect_shard', flaky)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            views = shards.ShardedGitHub(orgs=['acme', 'labs'], tokens=['t'], executor=executor).get_team_rollups(
+                TeamIndex(), days=30, timeout=30
+            )
+
+        assert views[shards.org_view('labs')]['total_commits'] == 0
+        assert views[ALL_TEAMS]['total_commits'] == views[shards.org_view('acme')]['total_commits'] > 0
+        completeness = views[ALL_TEAMS]['completeness']
+        assert completeness['failed']['labs/repo-00000'] == "Bad credentials"
+        assert 'acme/repo-00000' in completeness['done'] and not completeness['complete']
+
+    def test_organizations_try_the_tokens_in_turn(self, synthetic_github, monkeypatch):
+        """Test that each organization is listed with its own token and falls back to the others."""
+        from github import GithubException
+
+        from app.services import shards
+
+        used = []
+        shard_service = shards._shard_service
+
+        def service(org, token):
+            used.append((org, token))
+            if token == 't2':
+                raise GithubException(401, "Bad credentials", None)
+            return shard_service(org, token)
+
+        monkeypatch.setattr(shards, '_shard_service', service)
+        repos = shards.ShardedGitHub(orgs=['acme', 'labs'], tokens=['t1', 't2']).list_repos()
+
+        assert len(repos['acme']) == len(repos['labs']) == 5
+        assert used == [('acme', 't1'), ('labs', 't2'), ('labs', 't1')]
@@ -0,0 +1,51 @@
+from datetime import date, datetime
+from unittest.mock import MagicMock
+
+
+class TestSnapshotStore:
+    """Tests for SnapshotStore and the snapshot worker."""
+
+    def test_round_trip_preserves_dates(self, tmp_path):
+        """Test that dates in a payload survive being written and read back."""
+        from app.services.snapshot_store import SnapshotStore
+
+        store = SnapshotStore(tmp_path)
+        data = {
+            'daily_commits_data': [[date(2024, 1, 2), 5]],
+            'generated': datetime(2024, 1, 2, 3, 4, 5),
+        }
+        store.write('velocity', 7, data)
+        snapshot = store.read('velocity', 7)
+
+        assert snapshot.data == data
+        assert not snapshot.is_stale(max_age=60)
+        assert snapshot.is_stale(max_age=-1)
+
+    def test_missing_or_corrupt_snapshot(self, tmp_path):
+        """Test that unreadable snapshots are treated as absent."""
+        from app.services.snapshot_store import SnapshotStore
+
+        store = SnapshotStore(tmp_path)
+        assert store.read('velocity', 7) is None
+
+        (tmp_path / 'velocity-7d.json').write_text('{not json')
+        assert store.read('velocity', 7) is None
+
+    def test_run_once_writes_every_kind(self, tmp_path):
+        """Test that a worker pass snapshots each kind for each window."""
+        from app.services.snapshot_store import SnapshotStore
+        from app.worker import run_once
+
+        github = MagicMock()
+        github.get_team_rollups.return_value = {'All Teams': {'prs_merged': 1}}
+        langsmith = MagicMock()
+        langsmith.get_prompt_coverage.return_value = {'prompt_coverage': 50.0}
+        langsmith.get_test_results.side_effect = RuntimeError("boom")
+
+        written = run_once(SnapshotStore(tmp_path), github, langsmith, windows=[7, 30])
+
+        assert sorted((s.kind, s.days) for s in written) == [
+            ('prompt_coverage', 7), ('prompt_coverage', 30),
+            ('velocity', 7), ('velocity', 30),
+        ]
+        assert github.get_team_rollups.call_args.kwargs == {'days': 30}
@@ -0,0 +1,102 @@
+import json
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+class TestTeamIndex:
+    """Tests for the team index and per-team rollups."""
+
+    def test_teams_for_uses_repos_and_authors(self):
+        """Test that a record counts towards repo owners and author teams."""
+        from app.services.team_index import TeamIndex
+
+        index = TeamIndex.from_mapping({
+            'AI Core': {'repos': ['evals'], 'authors': ['alice']},
+            'Platform': {'repos': ['infra', 'evals']},
+        })
+
+        assert index.team_names() == ['AI Core', 'Platform']
+        assert index.teams_for('evals') == {'AI Core', 'Platform'}
+        assert index.teams_for('infra', 'alice') == {'AI Core', 'Platform'}
+        assert index.teams_for('web', 'bob') == set()
+
+    def test_all_teams_is_reserved(self):
+        """Test that the org-wide pseudo-team cannot be configured."""
+        from app.services.team_index import ALL_TEAMS, TeamIndex
+
+        with pytest.raises(ValueError):
+            TeamIndex.from_mapping({ALL_TEAMS: {'repos': ['web']}})
+
+    def test_load_team_index_merges_sources(self, tmp_path):
+        """Test that config file teams extend the GitHub organization's teams."""
+        from app.services.team_index import load_team_index
+
+        config = tmp_path / 'teams.json'
+        config.write_text(json.dumps({'Platform': {'authors': ['carol']}}))
+        github = MagicMock()
+        github.get_org_teams.return_value = {'Platform': {'repos': ['infra'], 'authors': ['bob']}}
+
+        with patch('app.services.team_index.settings') as settings:
+            settings.TEAMS_FROM_GITHUB = True
+            settings.TEAMS_CONFIG = str(config)
+            index = load_team_index(github)
+
+        assert index.to_mapping() == {'Platform': {'repos': ['infra'], 'authors': ['bob', 'carol']}}
+
+    def test_load_team_index_ignores_missing_config(self, tmp_path):
+        """Test that an unreadable config file yields an empty index."""
+        from app.services.team_index import load_team_index
+
+        with patch('app.services.team_index.settings') as settings:
+            settings.TEAMS_FROM_GITHUB = False
+            settings.TEAMS_CONFIG = str(tmp_path / 'missing.json')
+            assert len(load_team_index()) == 0
+
+    def test_get_team_rollups_matches_team_velocity(self, github_service):
+        """Test that the org-wide rollup equals get_team_velocity and teams are split."""
+        from app.services.team_index import ALL_TEAMS, TeamIndex
+
+        index = TeamIndex.from_mapping({
+            'Owners': {'repos': ['test-repo']},
+            'Others': {'repos': ['other-repo']},
+        })
+
+        rollups = github_service.get_team_rollups(index, days=7)
+
+        assert rollups[ALL_TEAMS] == github_service.get_team_velocity(days=7)
+        assert rollups['Owners'] == rollups[ALL_TEAMS]
+        assert rollups['Others']['prs_merged'] == 0
+        assert rollups['Others']['total_commits'] == 0
+
+    def test_pr_listing_stops_at_window(self, github_service, github_service_mock):
+        """Test that PRs older than the window end the listing early."""
+        from app.services.team_index import TeamIndex
+
+        repo = github_service_mock.return_value.get_organization.return_value.get_repo.return_value
+        old_pr = MagicMock(created_at=datetime.now() - timedelta(days=30))
+        prs = iter([*repo.get_pulls.return_value, old_pr, MagicMock()])
+        repo.get_pulls.return_value = prs
+
+        rollups = github_service.get_team_rollups(TeamIndex(), days=7, repo_names=['test-repo'])
+
+        assert rollups['All Teams']['prs_merged'] == 1
+        assert next(prs, None) is not None
+
+    def test_rollups_merge(self):
+        """Test that partial rollups add up to a single pass over all records."""
+        from app.services.aggregates import VelocityRollup
+
+        created = datetime(2024, 1, 1)
+        first, second = VelocityRollup(), VelocityRollup()
+        first.add_pr('web', 'alice', 'closed', True, created, created + timedelta(hours=2))
+        second.add_pr('api', 'bob', 'closed', True, created, created + timedelta(hours=4))
+        second.add_commit('api', 'bob', date(2024, 1, 1))
+
+        velocity = first.merge(second).to_velocity(days=1)
+
+        assert velocity['prs_merged'] == 2
+        assert velocity['pr_cycle_time_days'] == pytest.approx(3 / 24)
+        assert velocity['active_contributors'] == 2
+        assert velocity['daily_commits_data'] == [(date(2024, 1, 1), 1)]
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+
+class TestTimeseries:
+    """Tests for chart downsampling helpers."""
+
+    def test_choose_frequency_respects_budget(self):
+        """Test that longer ranges and more series pick coarser buckets."""
+        from app.utils.timeseries import choose_frequency
+
+        assert choose_frequency(30, n_series=3, point_budget=1500)[1] == 'daily'
+        assert choose_frequency(365, n_series=3, point_budget=1500)[1] == 'daily'
+        assert choose_frequency(365, n_series=20, point_budget=1500)[1] == 'weekly'
+        assert choose_frequency(365, n_series=100, point_budget=1500)[1] == 'monthly'
+        assert choose_frequency(365, n_series=1, plot_width=400)[1] == 'weekly'
+
+    def test_resample_counts_preserves_totals(self):
+        """Test that weekly resampling sums daily counts."""
+        from app.utils.timeseries import resample_counts
+
+        df = pd.DataFrame({
+            'date': pd.date_range('2024-01-01', periods=28, freq='D'),
+            'commits': np.arange(28),
+        })
+        weekly = resample_counts(df, 'date', 'W-MON')
+
+        assert len(weekly) == 4
+        assert weekly['commits'].sum() == df['commits'].sum()
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        """Test that LTTB returns the requested size and keeps extremes."""
+        from app.utils.timeseries import downsample_points, lttb
+
+        x = np.arange(10_000)
+        y = np.sin(x / 500.0)
+        y[4321] = 50.0
+
+        keep = lttb(x, y, 200)
+        assert len(keep) == 200
+        assert keep[0] == 0 and keep[-1] == len(x) - 1
+        assert np.all(np.diff(keep) > 0)
+        assert 4321 in keep
+
+        dates = pd.date_range('2024-01-01', periods=1000, freq='h')
+        xs, ys = downsample_points(dates.to_numpy(), np.random.default_rng(0).random(1000), 100)
+        assert len(xs) == len(ys) == 100
+
+    def test_build_activity_figure_stays_under_budget(self):
+        """Test that the activity chart payload is bounded and uses WebGL when large."""
+        from app.utils.timeseries import build_activity_figure
+
+        columns = [f'author_{i}' for i in range(12)]
+        df = pd.DataFrame({'date': pd.date_range('2024-01-01', periods=365, freq='D')})
+        for column in columns:
+            df[column] = 1
+
+        fig = build_activity_figure(df, 'date', columns, 'Activity', point_budget=1500)
+        points = sum(len(trace.x) for trace in fig.data)
+
+        assert points <= 1500
+        assert 'weekly' in fig.layout.title.text
+
+        small = build_activity_figure(df.head(30), 'date', columns[:3], 'Activity')
+        assert small.data[0].type == 'scatter'
+        large = build_activity_figure(df, 'date', columns[:3], 'Activity', point_budget=3000)
+        assert large.data[0].type == 'scattergl'
+
+    def test_many_series_stay_under_budget(self):
+        """Test that monthly buckets of many series are reduced with LTTB to fit the point budget."""
+        from app.utils.timeseries import build_activity_figure
+
+        columns = [f'author_{i}' for i in range(100)]
+        df = pd.DataFrame({
+            'date': pd.date_range('2022-01-01', periods=730, freq='D'),
+            **{column: np.arange(730) % (i + 2) for i, column in enumerate(columns)},
+        })
+
+        fig = build_activity_figure(df, 'date', columns, 'Activity', point_budget=1000)
+        points = [len(trace.x) for trace in fig.data]
+
+        assert len(points) == 100 and sum(points) <= 1000
+        assert 'monthly' in fig.layout.title.text
+        assert all(len(trace.x) == len(trace.y) for trace in fig.data)